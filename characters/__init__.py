@@ -1,4 +1,6 @@
 from .character import *
 from .attributes import *
 from .dice import *
-from .queries import *
\ No newline at end of file
+from .queries import *
+from .roster import *
+from .encounter import *
\ No newline at end of file
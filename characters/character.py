@@ -1,14 +1,31 @@
 from __future__ import annotations
 from abc import abstractmethod, ABC
 from enum import Enum, auto
-from dataclasses import dataclass
-from typing import Set
+from dataclasses import dataclass, field
+from typing import Set, TYPE_CHECKING
 
 from util import calculate_modifier
 
+if TYPE_CHECKING:
+    from characters.queries.monster.monster_queries import MonsterRecord
 
-@dataclass
-class AbilityScore:
+
+class Immutable:
+    """
+    Frozen components only hold immutable values, so copies of a character
+    can share them instead of duplicating them
+    """
+    __slots__ = ()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+@dataclass(frozen=True, slots=True)
+class AbilityScore(Immutable):
     value: int
 
     @property
@@ -17,6 +34,7 @@ class AbilityScore:
 
 
 class AbilityScores:
+    __slots__ = ("strength", "dexterity", "wisdom", "constitution", "intelligence", "charisma")
 
     def __init__(
             self,
@@ -46,8 +64,8 @@ class AbilityScores:
         return stri and dex and wis and con and inte and cha
 
 
-@dataclass
-class SavingThrows:
+@dataclass(frozen=True, slots=True)
+class SavingThrows(Immutable):
     strength: bool
     dexterity: bool
     wisdom: bool
@@ -68,14 +86,14 @@ class Goodness(Enum):
     EVIL = "evil"
 
 
-@dataclass
-class Alignment:
+@dataclass(frozen=True, slots=True)
+class Alignment(Immutable):
     lawfulness: Lawfulness
     goodness: Goodness
 
 
-@dataclass
-class Skills:
+@dataclass(frozen=True, slots=True)
+class Skills(Immutable):
     acrobatics: int
     animal_handling: int
     arcana: int
@@ -102,7 +120,7 @@ class Language(Enum):
     # TODO: Add all other languages lol
 
 
-@dataclass
+@dataclass(slots=True)
 class Languages:
     telepathic: bool
     languages: Set[Language]
@@ -116,7 +134,7 @@ class CharacterBuilder(ABC):
         pass
 
     def build_meta(self) -> CharacterBuilder:
-        self.character.meta_name = self.__class__.__name__
+        self._character.meta_name = self.__class__.__name__
         return self
 
     @abstractmethod
@@ -179,15 +197,15 @@ class CharacterSize(Enum):
 #     BEAST = auto()
 
 
-@dataclass
-class PhysicalStats:
+@dataclass(frozen=True, slots=True)
+class PhysicalStats(Immutable):
     size: CharacterSize
     type: str
     tags: str
 
 
-@dataclass
-class Speed:
+@dataclass(frozen=True, slots=True)
+class Speed(Immutable):
     walk: int
     burrow: int
     climb: int
@@ -195,7 +213,7 @@ class Speed:
     swim: int
 
 
-@dataclass
+@dataclass(slots=True)
 class BaseStats:
     armor_class: int
     hit_points: int
@@ -218,7 +236,7 @@ class DamageType(Enum):
     THUNDER = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class DamageModifiers:
     immunities: Set[DamageType]
     resistances: Set[DamageType]
@@ -232,23 +250,37 @@ class Sense(Enum):
     TRUESIGHT = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class Senses:
     passive_perception: int
     senses: Set[Sense]
 
 
-@dataclass
-class Challenge:
+# Experience points by challenge rating, from the Dungeon Master's Guide
+CHALLENGE_RATING_XP = {
+    0: 10, 0.125: 25, 0.25: 50, 0.5: 100,
+    1: 200, 2: 450, 3: 700, 4: 1100, 5: 1800,
+    6: 2300, 7: 2900, 8: 3900, 9: 5000, 10: 5900,
+    11: 7200, 12: 8400, 13: 10000, 14: 11500, 15: 13000,
+    16: 15000, 17: 18000, 18: 20000, 19: 22000, 20: 25000,
+    21: 33000, 22: 41000, 23: 50000, 24: 62000, 25: 75000,
+    26: 90000, 27: 105000, 28: 120000, 29: 135000, 30: 155000,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Challenge(Immutable):
     challenge_rating: float
 
     @property
     def experience_value(self) -> int:
-        run_sum = 0
-        for i in range(1, self.challenge_rating):
-            run_sum += (i + i // 7) * 100
-
-        return run_sum + 100
+        """
+        Raises ValueError for ratings that are not in CHALLENGE_RATING_XP
+        """
+        try:
+            return CHALLENGE_RATING_XP[self.challenge_rating]
+        except KeyError:
+            raise ValueError(f"Challenge rating {self.challenge_rating} has no experience value") from None
 
 
 class Trait(Enum):
@@ -257,7 +289,7 @@ class Trait(Enum):
     PSIONICS = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class Traits:
     traits: Set[Trait]
 
@@ -318,11 +350,16 @@ class NPCharacterBuilder(CharacterBuilder):
         return self
 
 
-@dataclass
+@dataclass(slots=True)
 class ICharacter(ABC):
     """
     Shared behaviour between player characters and non-playable characters
-    go in this interface
+    go in this interface.
+
+    Characters and their components are slotted, a bestiary's worth of
+    them is kept alive at once. Components nothing should change after
+    loading (scores, proficiencies, speeds...) are frozen as well, the
+    ones that take damage or gain conditions stay mutable.
     """
     physical_stats: PhysicalStats = None
     alignment: Alignment = None
@@ -337,11 +374,17 @@ class ICharacter(ABC):
     languages: Languages = None
     traits: Traits = None
     combat: str = None
+    # Name of the builder class that built the character
+    meta_name: str = field(default=None, compare=False)
 
 
+@dataclass(slots=True)
 class NPCharacter(ICharacter):
     """
-    Non-playable character behaviours go in this interface
+    Non-playable character behaviours go in this interface.
+
+    challenge is a field, so it takes part in equality: two NPCs that only
+    differ in challenge are not equal.
     """
     challenge: Challenge | None = None
 
@@ -350,7 +393,7 @@ class PlayableCharacter(ICharacter):
     """
     Playable character behaviours go in this interface
     """
-    pass
+    __slots__ = ()
 
 
 class CharacterDirector:
@@ -369,5 +412,23 @@ class CharacterDirector:
     def builder(self, builder: CharacterBuilder) -> None:
         self._builder = builder
 
-    def build_character(self, character_id: str) -> NPCharacter:
-        pass
+    def build_character(self, character_id: int) -> NPCharacter:
+        # The query layer imports the character types from this module
+        from characters.queries.monster.monster_queries import monster_record_by_id
+        return self.build_from_record(monster_record_by_id(character_id))
+
+    def build_from_record(self, record: MonsterRecord) -> NPCharacter:
+        builder = self._builder if self._builder is not None else NPCharacterBuilder()
+        return builder \
+            .build_physical_stats(record.physical_stats) \
+            .build_behaviours(record.alignment) \
+            .build_base_stats(record.base_stats) \
+            .build_ability_scores(record.ability_scores) \
+            .build_saving_throws(record.saving_throws) \
+            .build_skills(record.skills) \
+            .build_immunities(record.damage_modifiers) \
+            .build_senses(record.senses) \
+            .build_language(record.languages) \
+            .build_challenge(record.challenge) \
+            .build_meta() \
+            .character
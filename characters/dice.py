@@ -1,5 +1,11 @@
+from dataclasses import dataclass
 from enum import Enum
+import functools
+import math
 import random
+import re
+
+import numpy as np
 
 class Dice(Enum):
     d4 = 4
@@ -12,3 +18,294 @@ class Dice(Enum):
 
     def roll_die(self) -> int:
         return random.randint(1, self.value)
+
+    def distribution(self) -> "DiceDistribution":
+        return dice_distribution(f"1d{self.value}")
+
+
+class DiceExpressionError(ValueError):
+
+    def __init__(self, expression: str, reason: str):
+        self.expression = expression
+        super().__init__(f"Invalid dice expression {expression!r}: {reason}")
+
+
+# One signed term: NdM with an optional keep/drop suffix, or a constant
+_TERM_PATTERN = re.compile(r"([+-]?)(?:(\d*)d(\d+)(?:(kh|kl|k|dh|dl)(\d+))?|(\d+))")
+
+
+@dataclass(frozen=True)
+class DiceTerm:
+    """
+    count dice with sides faces, of which the keep highest (or lowest)
+    are summed. Drop suffixes are stored as the keep they amount to
+    """
+    count: int
+    sides: int
+    keep: int
+    highest: bool = True
+    sign: int = 1
+
+    def __str__(self) -> str:
+        notation = f"{self.count}d{self.sides}"
+        if self.keep < self.count:
+            notation += f"{'kh' if self.highest else 'kl'}{self.keep}"
+        return notation
+
+    def roll(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        rolls = rng.integers(1, self.sides + 1, size=(size, self.count))
+        if self.keep < self.count:
+            rolls.sort(axis=1)
+            rolls = rolls[:, self.count - self.keep:] if self.highest else rolls[:, :self.keep]
+        return self.sign * rolls.sum(axis=1)
+
+
+@dataclass(frozen=True)
+class DiceExpression:
+    """
+    A parsed dice expression, see parse_dice. str() gives its normalized
+    notation: dice terms first, then a single constant
+    """
+    terms: tuple[DiceTerm, ...]
+    modifier: int = 0
+
+    def __str__(self) -> str:
+        notation = ""
+        for term in self.terms:
+            notation += f"{'-' if term.sign < 0 else '+'}{term}"
+        if self.modifier or not self.terms:
+            notation += f"{self.modifier:+d}"
+        return notation.removeprefix("+")
+
+    @property
+    def minimum(self) -> int:
+        return self.modifier + sum(term.sign * (term.keep if term.sign > 0 else term.keep * term.sides)
+                                   for term in self.terms)
+
+    @property
+    def maximum(self) -> int:
+        return self.modifier + sum(term.sign * (term.keep * term.sides if term.sign > 0 else term.keep)
+                                   for term in self.terms)
+
+    def roll(self, rng: np.random.Generator, size: int | tuple[int, ...] | None = None) -> int | np.ndarray:
+        """
+        One total, or an int64 array of independent totals shaped size
+        """
+        shape = () if size is None else np.atleast_1d(size)
+        n = int(np.prod(shape))
+        totals = np.full(n, self.modifier, dtype=np.int64)
+        for term in self.terms:
+            totals += term.roll(rng, n)
+        return int(totals[0]) if size is None else totals.reshape(shape)
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_dice(expression: str) -> DiceExpression:
+    """
+    Parse standard dice notation such as "8d6+3", "2d20kh1" (advantage) or
+    "4d6dl1". Terms are NdM, dM, constants, and NdM followed by kh, kl
+    (k alone is kh), dh or dl and a count. Parsed expressions are cached,
+    each distinct string is only compiled once
+    """
+    text = re.sub(r"\s*([+-])\s*", r"\1", expression.strip().lower())
+    if not text:
+        raise DiceExpressionError(expression, "empty expression")
+
+    terms = []
+    modifier = 0
+    position = 0
+    while position < len(text):
+        match = _TERM_PATTERN.match(text, position)
+        if match is None or (position > 0 and not match.group(1)):
+            raise DiceExpressionError(expression, f"unexpected {text[position:]!r}")
+        position = match.end()
+        sign, count, sides, suffix, suffix_count, constant = match.groups()
+        sign = -1 if sign == "-" else 1
+        if constant is not None:
+            modifier += sign * int(constant)
+            continue
+
+        count = int(count) if count else 1
+        sides = int(sides)
+        if count < 1 or sides < 1:
+            raise DiceExpressionError(expression, "dice need at least one die and one face")
+        keep, highest = count, True
+        if suffix is not None:
+            n = int(suffix_count)
+            keep, highest = {
+                "kh": (n, True), "k": (n, True), "kl": (n, False),
+                "dl": (count - n, True), "dh": (count - n, False),
+            }[suffix]
+            if not 0 < keep <= count:
+                raise DiceExpressionError(expression, f"cannot {suffix}{n} out of {count} dice")
+        terms.append(DiceTerm(count=count, sides=sides, keep=keep, highest=highest, sign=sign))
+    return DiceExpression(terms=tuple(terms), modifier=modifier)
+
+
+class DiceRoller:
+    """
+    Rolls dice expressions in bulk from one seeded numpy Generator, give
+    each session its own roller to make its rolls reproducible
+    """
+
+    def __init__(self, seed: int | None = None):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def roll(self, expression: str | DiceExpression, size: int | tuple[int, ...] | None = None) -> int | np.ndarray:
+        if isinstance(expression, str):
+            expression = parse_dice(expression)
+        return expression.roll(self.rng, size)
+
+
+@dataclass(frozen=True, eq=False)
+class DiceDistribution:
+    """
+    Exact distribution of a dice total, pmf[i] is the probability of
+    rolling minimum + i
+    """
+    minimum: int
+    pmf: np.ndarray
+
+    @property
+    def maximum(self) -> int:
+        return self.minimum + len(self.pmf) - 1
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.arange(self.minimum, self.maximum + 1)
+
+    @property
+    def expected_value(self) -> float:
+        return float(self.values @ self.pmf)
+
+    @property
+    def variance(self) -> float:
+        return float((self.values - self.expected_value) ** 2 @ self.pmf)
+
+    def probability(self, value):
+        """
+        P(total == value), value may be an array
+        """
+        index = np.asarray(value) - self.minimum
+        inside = (index >= 0) & (index < len(self.pmf))
+        return np.where(inside, self.pmf[np.clip(index, 0, len(self.pmf) - 1)], 0.0)
+
+    def cdf(self, value):
+        """
+        P(total <= value), value may be an array
+        """
+        cumulative = np.cumsum(self.pmf)
+        index = np.asarray(value) - self.minimum
+        return np.where(index < 0, 0.0, cumulative[np.clip(index, 0, len(self.pmf) - 1)])
+
+    def at_least(self, value):
+        """
+        P(total >= value), the chance a damage roll drops value hit points
+        """
+        return 1.0 - self.cdf(np.asarray(value) - 1)
+
+    def percentile(self, q):
+        """
+        Smallest total whose cdf reaches q, q in [0, 1] and may be an array
+        """
+        # Leave room for the rounding of the cumulative sum at q = 1
+        cumulative = np.cumsum(self.pmf)
+        index = np.searchsorted(cumulative, np.asarray(q) - 1e-12)
+        return self.minimum + np.minimum(index, len(self.pmf) - 1)
+
+    def advantage(self) -> "DiceDistribution":
+        """
+        Distribution of the higher of two independent rolls
+        """
+        cumulative = np.cumsum(self.pmf) ** 2
+        return DiceDistribution(self.minimum, np.diff(cumulative, prepend=0.0))
+
+    def disadvantage(self) -> "DiceDistribution":
+        """
+        Distribution of the lower of two independent rolls
+        """
+        survival = np.cumsum(self.pmf[::-1])[::-1] ** 2
+        return DiceDistribution(self.minimum, -np.diff(survival, append=0.0))
+
+
+@functools.lru_cache(maxsize=None)
+def _sum_pmf(count: int, sides: int) -> np.ndarray:
+    # Sum of count dice, from count upwards. Halving the count keeps the
+    # number of convolutions logarithmic
+    if count == 1:
+        return np.full(sides, 1 / sides)
+    half = count // 2
+    return np.convolve(_sum_pmf(half, sides), _sum_pmf(count - half, sides))
+
+@functools.lru_cache(maxsize=None)
+def _keep_pmf(count: int, sides: int, keep: int, highest: bool) -> np.ndarray:
+    """
+    Sum of the keep highest (or lowest) of count dice, from 0 upwards.
+
+    Walks the faces from the kept end and decides how many of the dice
+    show each face, instead of enumerating all sides ** count rolls.
+    ways[m] is the distribution of the kept sum once m dice are placed;
+    the first keep dice placed are the kept ones.
+    """
+    ways = np.zeros((count + 1, keep * sides + 1))
+    ways[0, 0] = 1.0
+    faces = range(sides, 0, -1) if highest else range(1, sides + 1)
+    for face in faces:
+        placed = np.zeros_like(ways)
+        for m in range(count + 1):
+            if not ways[m].any():
+                continue
+            for j in range(count - m + 1):
+                shift = min(j, max(0, keep - m)) * face
+                weight = math.comb(m + j, j) / sides ** j
+                placed[m + j, shift:] += ways[m, :len(ways[m]) - shift] * weight
+        ways = placed
+    return ways[count]
+
+def _term_pmf(term: DiceTerm) -> tuple[int, np.ndarray]:
+    if term.keep == term.count:
+        pmf, minimum = _sum_pmf(term.count, term.sides), term.count
+    else:
+        pmf, minimum = _keep_pmf(term.count, term.sides, term.keep, term.highest)[term.keep:], term.keep
+    if term.sign < 0:
+        return -(minimum + len(pmf) - 1), pmf[::-1]
+    return minimum, pmf
+
+def _normalize(expression: DiceExpression) -> DiceExpression:
+    """
+    Sort the terms and merge plain terms rolling the same die, 1d6+1d6 and
+    2d6 are the same distribution
+    """
+    counts = {}
+    terms = []
+    for term in expression.terms:
+        if term.keep == term.count:
+            counts[term.sides, term.sign] = counts.get((term.sides, term.sign), 0) + term.count
+        else:
+            terms.append(term)
+    terms += [DiceTerm(count, sides, count, sign=sign) for (sides, sign), count in counts.items()]
+    return DiceExpression(
+        terms=tuple(sorted(terms, key=lambda term: (term.sign, term.sides, term.count, term.keep, term.highest))),
+        modifier=expression.modifier
+    )
+
+@functools.lru_cache(maxsize=1024)
+def _distribution(expression: DiceExpression) -> DiceDistribution:
+    minimum, pmf = expression.modifier, np.ones(1)
+    for term in expression.terms:
+        term_minimum, term_pmf = _term_pmf(term)
+        minimum += term_minimum
+        pmf = np.convolve(pmf, term_pmf)
+    pmf.flags.writeable = False
+    return DiceDistribution(minimum, pmf)
+
+def dice_distribution(expression: str | DiceExpression) -> DiceDistribution:
+    """
+    Exact distribution of a dice expression, computed by convolution and
+    memoized on its normalized form. Keep and drop terms are exact too, so
+    "2d20kh1" is advantage and "4d6dl1" an ability score roll
+    """
+    if isinstance(expression, str):
+        expression = parse_dice(expression)
+    return _distribution(_normalize(expression))
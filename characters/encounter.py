@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from enum import IntEnum
+
+import numpy as np
+
+from .character import CHALLENGE_RATING_XP
+
+CHALLENGE_RATINGS = np.array(sorted(CHALLENGE_RATING_XP), dtype=np.float64)
+CHALLENGE_XP = np.array([CHALLENGE_RATING_XP[rating] for rating in sorted(CHALLENGE_RATING_XP)], dtype=np.int64)
+
+# Easy, medium, hard and deadly XP thresholds of one character, row i is
+# character level i + 1
+LEVEL_XP_THRESHOLDS = np.array([
+    [25, 50, 75, 100],
+    [50, 100, 150, 200],
+    [75, 150, 225, 400],
+    [125, 250, 375, 500],
+    [250, 500, 750, 1100],
+    [300, 600, 900, 1400],
+    [350, 750, 1100, 1700],
+    [450, 900, 1400, 2100],
+    [550, 1100, 1600, 2400],
+    [600, 1200, 1900, 2800],
+    [800, 1600, 2400, 3600],
+    [1000, 2000, 3000, 4500],
+    [1100, 2200, 3400, 5100],
+    [1250, 2500, 3800, 5700],
+    [1400, 2800, 4300, 6400],
+    [1600, 3200, 4800, 7200],
+    [2000, 3900, 5900, 8800],
+    [2100, 4200, 6300, 9500],
+    [2400, 4900, 7300, 10900],
+    [2800, 5700, 8500, 12700],
+], dtype=np.int64)
+
+# Encounter multipliers, a group of monsters is stronger than its XP says.
+# MONSTER_COUNT_STEPS[i] is the fewest monsters using ENCOUNTER_MULTIPLIERS[i + 1],
+# small parties move one multiplier up and large ones one down
+ENCOUNTER_MULTIPLIERS = np.array([0.5, 1, 1.5, 2, 2.5, 3, 4, 5])
+MONSTER_COUNT_STEPS = np.array([1, 2, 3, 7, 11, 15])
+SMALL_PARTY = 3
+LARGE_PARTY = 6
+
+
+class Difficulty(IntEnum):
+    TRIVIAL = 0
+    EASY = 1
+    MEDIUM = 2
+    HARD = 3
+    DEADLY = 4
+
+
+def challenge_xp(challenge_ratings) -> np.ndarray:
+    """
+    XP of every challenge rating, raises ValueError for ratings that are
+    not in CHALLENGE_RATING_XP
+    """
+    ratings = np.asarray(challenge_ratings, dtype=np.float64)
+    index = np.minimum(np.searchsorted(CHALLENGE_RATINGS, ratings), len(CHALLENGE_RATINGS) - 1)
+    unknown = CHALLENGE_RATINGS[index] != ratings
+    if unknown.any():
+        raise ValueError(f"Unknown challenge rating(s) {np.unique(ratings[unknown]).tolist()}")
+    return CHALLENGE_XP[index]
+
+
+@dataclass
+class EncounterDifficulty:
+    """
+    Arrays with one entry per encounter, thresholds adds an easy, medium,
+    hard, deadly axis
+    """
+    xp: np.ndarray
+    adjusted_xp: np.ndarray
+    multiplier: np.ndarray
+    thresholds: np.ndarray
+    difficulty: np.ndarray
+
+
+def encounter_difficulty(party_levels, monster_challenge_ratings) -> EncounterDifficulty:
+    """
+    Score encounters with the Dungeon Master's Guide rules. The last axis of
+    party_levels lists the characters of a party and the last axis of
+    monster_challenge_ratings the monsters of an encounter, the leading
+    axes broadcast against each other so one party can face thousands of
+    candidate encounters. Pad ragged parties with level 0 and ragged
+    encounters with NaN.
+
+    A NaN rating is no monster at all. The bestiary stores the ratings of
+    templates (VARIES, TEMP) as NaN too, so such monsters are skipped:
+    they add no XP and do not count towards the multiplier. Any other
+    rating missing from CHALLENGE_RATING_XP raises ValueError.
+    """
+    levels = np.asarray(party_levels, dtype=np.int64)
+    ratings = np.asarray(monster_challenge_ratings, dtype=np.float64)
+    if np.any((levels < 0) | (levels > len(LEVEL_XP_THRESHOLDS))):
+        raise ValueError(f"Character levels go from 1 to {len(LEVEL_XP_THRESHOLDS)}, 0 pads a party")
+
+    present = ~np.isnan(ratings)
+    xp = np.where(present, challenge_xp(np.where(present, ratings, 0)), 0).sum(axis=-1)
+    monsters = present.sum(axis=-1)
+
+    in_party = levels > 0
+    thresholds = np.where(in_party[..., None], LEVEL_XP_THRESHOLDS[np.maximum(levels, 1) - 1], 0).sum(axis=-2)
+    party_size = in_party.sum(axis=-1)
+
+    step = np.searchsorted(MONSTER_COUNT_STEPS, monsters, side="right")
+    step = step + (party_size < SMALL_PARTY) - (party_size >= LARGE_PARTY)
+    multiplier = ENCOUNTER_MULTIPLIERS[np.clip(step, 0, len(ENCOUNTER_MULTIPLIERS) - 1)]
+    adjusted_xp = xp * multiplier
+
+    shape = np.broadcast_shapes(adjusted_xp.shape, party_size.shape)
+    adjusted_xp = np.broadcast_to(adjusted_xp, shape)
+    thresholds = np.broadcast_to(thresholds, shape + (4,))
+    return EncounterDifficulty(
+        xp=np.broadcast_to(xp, shape),
+        adjusted_xp=adjusted_xp,
+        multiplier=np.broadcast_to(multiplier, shape),
+        thresholds=thresholds,
+        difficulty=(adjusted_xp[..., None] >= thresholds).sum(axis=-1)
+    )
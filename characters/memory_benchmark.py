@@ -0,0 +1,102 @@
+import argparse
+import copy
+import gc
+import json
+import tracemalloc
+from enum import Enum
+
+from characters import CharacterDirector, NPCharacterBuilder, NPCharacter
+from characters.queries.monster import monster_records_by_ids
+from db import get_pool
+
+
+def _count_objects(character: NPCharacter) -> int:
+    seen = set()
+    stack = [character]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or obj is None or isinstance(obj, (int, float, str, bool)):
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (set, frozenset, list, tuple)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.extend(vars(obj).values())
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                stack.append(getattr(obj, slot, None))
+    return len(seen)
+
+class _Unslotted:
+    """
+    Plain object with an instance __dict__, deep copies duplicate all of it
+    """
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def _unslotted(obj):
+    """
+    obj with every slotted component replaced by an _Unslotted holding the
+    same values, the layout the character classes had before they were
+    slotted and their frozen components shared
+    """
+    if isinstance(obj, (set, frozenset, list, tuple)):
+        return type(obj)(map(_unslotted, obj))
+    slots = [slot for cls in type(obj).__mro__ for slot in getattr(cls, "__slots__", ())]
+    if not slots or isinstance(obj, Enum):
+        return obj
+    return _Unslotted(**{slot: _unslotted(getattr(obj, slot, None)) for slot in slots})
+
+def _measure_copies(templates: list, count: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        characters = [copy.deepcopy(templates[i % len(templates)]) for i in range(count)]
+        gc.collect()
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "bytes": allocated,
+        "bytes_per_character": allocated / count,
+        "objects_per_character": sum(map(_count_objects, characters[:len(templates)])) / min(count, len(templates)),
+    }
+
+def measure_character_memory(count: int = 10_000) -> dict:
+    """
+    tracemalloc bytes held by count live NPCharacters, each a deep copy
+    like MonsterCache hands out, built round robin over the bestiary. The
+    records themselves are loaded before tracing starts.
+
+    The same characters are measured again as an unslotted baseline, with
+    every component a plain object that deep copies duplicate.
+    """
+    with get_pool().connection() as con:
+        ids = [row["id"] for row in con.execute("SELECT id FROM monster ORDER BY id")]
+    records = monster_records_by_ids(ids)
+
+    director = CharacterDirector()
+    director.builder = NPCharacterBuilder()
+    templates = [director.build_from_record(record) for record in records]
+
+    return {
+        "characters": count,
+        "slotted": _measure_copies(templates, count),
+        "unslotted": _measure_copies([_unslotted(template) for template in templates], count),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory held by live NPCharacters")
+    parser.add_argument("--count", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(json.dumps(measure_character_memory(args.count), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,6 @@
-from .monster_queries import *
\ No newline at end of file
+from .monster_queries import *
+from .monster_cache import *
+from .monster_search import *
+from .monster_async import *
+from .bestiary_arrays import *
+from .monster_snapshot import *
\ No newline at end of file
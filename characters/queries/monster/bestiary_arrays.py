@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from util import calculate_modifier
+from db import get_pool
+
+from .monster_queries import monster_statements
+
+ABILITIES = ("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma")
+SPEEDS = ("walk", "burrow", "climb", "fly", "swim")
+SKILLS = (
+    "acrobatics", "animal_handling", "arcana", "athletics", "deception", "history",
+    "insight", "intimidation", "investigation", "medicine", "nature", "perception",
+    "performance", "persuasion", "religion", "sleight_of_hand", "stealth", "survival"
+)
+SENSES = ("blindsight", "darkvision", "tremorsense", "truesight")
+
+# The bestiary_arrays query selects one column per scalar field, then one
+# per name of every matrix field, in this order
+_SCALAR_FIELDS = (
+    ("ids", np.int32), ("names", object), ("challenge_ratings", np.float32),
+    ("armor_class", np.int16), ("hit_points", np.int32)
+)
+_MATRIX_FIELDS = (
+    ("ability_scores", ABILITIES, np.int8),
+    ("speeds", SPEEDS, np.int16),
+    ("saving_throw_proficiencies", ABILITIES, bool),
+    ("skill_proficiencies", SKILLS, bool),
+    ("senses", SENSES, np.int16),
+)
+_QUERY_WIDTH = len(_SCALAR_FIELDS) + sum(len(names) for _, names, _ in _MATRIX_FIELDS)
+
+
+@dataclass
+class BestiaryArrays:
+    """
+    Column oriented view of the whole bestiary. Row i of every array is the
+    monster ids[i], ids are sorted. Matrix columns follow ABILITIES, SPEEDS,
+    SKILLS and SENSES.
+    """
+    ids: np.ndarray
+    names: np.ndarray
+    challenge_ratings: np.ndarray
+    armor_class: np.ndarray
+    hit_points: np.ndarray
+    ability_scores: np.ndarray
+    speeds: np.ndarray
+    saving_throw_proficiencies: np.ndarray
+    skill_proficiencies: np.ndarray
+    senses: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def modifiers(self) -> np.ndarray:
+        # Widen before subtracting so the formula cannot wrap around in int8
+        return calculate_modifier(self.ability_scores.astype(np.int16)).astype(np.int8)
+
+    def rows(self, ids) -> np.ndarray:
+        """
+        Row index of every id, raises KeyError for ids that are not loaded
+        """
+        ids = np.asarray(ids)
+        rows = np.searchsorted(self.ids, ids)
+        found = (rows < len(self.ids)) & (self.ids[np.minimum(rows, len(self.ids) - 1)] == ids)
+        if not found.all():
+            raise KeyError(ids[~found].tolist())
+        return rows
+
+    def ability(self, name: str) -> np.ndarray:
+        return self.ability_scores[:, ABILITIES.index(name)]
+
+    def skill(self, name: str) -> np.ndarray:
+        return self.skill_proficiencies[:, SKILLS.index(name)]
+
+
+def load_bestiary_arrays() -> BestiaryArrays:
+    with get_pool().connection() as con:
+        rows = monster_statements.fetchall(con, "bestiary_arrays", {}, raw=True)
+
+    columns = list(zip(*rows)) if rows else [()] * _QUERY_WIDTH
+    if len(columns) != _QUERY_WIDTH:
+        raise ValueError(f"bestiary_arrays selects {len(columns)} columns, expected {_QUERY_WIDTH}")
+
+    # Unknown challenge ratings are NULL, which numpy turns into NaN
+    fields = {field: np.array(columns[index], dtype=dtype) for index, (field, dtype) in enumerate(_SCALAR_FIELDS)}
+
+    start = len(_SCALAR_FIELDS)
+    for field, names, dtype in _MATRIX_FIELDS:
+        width = len(names)
+        fields[field] = np.array(columns[start:start + width], dtype=dtype).T.reshape(len(rows), width)
+        start += width
+    return BestiaryArrays(**fields)
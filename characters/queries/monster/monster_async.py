@@ -0,0 +1,55 @@
+import asyncio
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, TypeVar
+
+from characters import NPCharacter
+
+from .monster_queries import monsters_by_ids, monster_record_by_id, MonsterRecord
+from .monster_search import search_monster_ids
+
+T = TypeVar("T")
+
+# sqlite releases the GIL while a query runs but building the dataclasses
+# does not, so more threads add no throughput and only compete with the
+# event loop for the GIL
+MAX_QUERY_THREADS = 2
+
+_executor = ThreadPoolExecutor(max_workers=MAX_QUERY_THREADS, thread_name_prefix="monster-query")
+
+
+async def _run(function: Callable[..., T], *args, **kwargs) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(function, *args, **kwargs))
+
+async def monster_record_by_id_async(id: int) -> MonsterRecord:
+    return await _run(monster_record_by_id, id)
+
+async def monster_by_id_async(id: int) -> NPCharacter:
+    return (await _run(monsters_by_ids, [id]))[0]
+
+async def monsters_by_ids_async(ids: Iterable[int]) -> list[NPCharacter]:
+    return await _run(monsters_by_ids, list(ids))
+
+async def search_monster_ids_async(**filters) -> list[int]:
+    return await _run(lambda: list(search_monster_ids(**filters)))
+
+async def search_monsters_async(chunk_size: int = 64, **filters) -> AsyncIterator[NPCharacter]:
+    """
+    Async counterpart of search_monsters. Every chunk is paged and hydrated
+    in one call on the query executor, which resumes the search after the
+    last id of the previous chunk, so no generator is shared between threads
+    """
+    def next_chunk(after: int) -> tuple[list[int], list[NPCharacter]]:
+        ids = list(itertools.islice(search_monster_ids(chunk_size=chunk_size, after=after, **filters), chunk_size))
+        return ids, monsters_by_ids(ids) if ids else []
+
+    after = -1
+    while True:
+        ids, monsters = await _run(next_chunk, after)
+        for monster in monsters:
+            yield monster
+        if len(ids) < chunk_size:
+            return
+        after = ids[-1]
@@ -0,0 +1,139 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from db import get_generation
+from characters import NPCharacter
+
+from .monster_queries import monsters_by_ids
+
+
+@dataclass
+class CacheStats:
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MonsterCache:
+    """
+    Bounded LRU cache of hydrated NPCharacters keyed by monster id.
+
+    The whole cache is dropped when the database generation changes, see
+    db.bump_generation. The generation is read at most once per batch and
+    once every generation_ttl seconds, so a new generation can go unnoticed
+    for that long; 0 checks it on every batch. Callers always get a deep
+    copy, so damaging one spawned goblin never touches the cached template.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = 256,
+            loader: Callable[[Iterable[int]], list[NPCharacter]] = monsters_by_ids,
+            generation: Callable[[], int] = get_generation,
+            generation_ttl: float = 1.0
+    ):
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1")
+        self.maxsize = maxsize
+        self.generation_ttl = generation_ttl
+        self._loader = loader
+        self._generation = generation
+        self._entries: OrderedDict[int, NPCharacter] = OrderedDict()
+        self._current_generation = None
+        self._generation_checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, id: int) -> NPCharacter:
+        return self.get_many([id])[0]
+
+    def _checked_generation(self) -> int | None:
+        # Reading the generation takes a pooled connection, within the ttl
+        # of the last read there is nothing to compare, None
+        now = time.monotonic()
+        if now - self._generation_checked_at < self.generation_ttl:
+            return None
+        generation = self._generation()
+        self._generation_checked_at = now
+        return generation
+
+    def get_many(self, ids: Iterable[int]) -> list[NPCharacter]:
+        """
+        Copies of the monsters of ids in order. Hits and misses are counted
+        once per distinct id
+        """
+        ids = [int(id) for id in ids]
+        generation = self._checked_generation()
+        with self._lock:
+            if generation is not None and generation != self._current_generation:
+                if self._entries:
+                    self._invalidations += 1
+                self._entries.clear()
+                self._current_generation = generation
+            generation = self._current_generation
+
+            templates = {}
+            missing = []
+            for id in dict.fromkeys(ids):
+                template = self._entries.get(id)
+                if template is None:
+                    self._misses += 1
+                    missing.append(id)
+                    continue
+                self._hits += 1
+                self._entries.move_to_end(id)
+                templates[id] = template
+
+        if missing:
+            loaded = dict(zip(missing, self._loader(missing)))
+            templates.update(loaded)
+            with self._lock:
+                if generation == self._current_generation:
+                    for id, template in loaded.items():
+                        self._entries[id] = template
+                        self._entries.move_to_end(id)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self._evictions += 1
+
+        return [copy.deepcopy(templates[id]) for id in ids]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation_checked_at = float("-inf")
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                size=len(self._entries),
+                maxsize=self.maxsize,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations
+            )
+
+
+shared_monster_cache = MonsterCache()
+
+def cached_monster_by_id(id: int) -> NPCharacter:
+    return shared_monster_cache.get(id)
+
+def cached_monsters_by_ids(ids: Iterable[int]) -> list[NPCharacter]:
+    return shared_monster_cache.get_many(ids)
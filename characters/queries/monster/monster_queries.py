@@ -1,100 +1,99 @@
+import json
 import os
+from dataclasses import dataclass
+from typing import Iterable
 
 import util
-from db import get_connection
+from db import get_pool, QueryRegistry
 
 from characters import PhysicalStats, Alignment, BaseStats, Speed, AbilityScores, SavingThrows, Skills, DamageModifiers, \
-    Senses
+    Senses, Languages, Challenge, CharacterDirector, NPCharacterBuilder, NPCharacter
 
-conn = get_connection()
+monster_statements = QueryRegistry(os.path.join(os.path.dirname(os.path.realpath(__file__)), "sql"))
+with get_pool().connection() as con:
+    monster_statements.validate(con)
+
+
+class MonsterNotFoundError(LookupError):
+
+    def __init__(self, ids: list[int]):
+        self.ids = ids
+        super().__init__(f"No monster with id(s) {', '.join(str(id) for id in ids)}")
+
+
+@dataclass
+class MonsterRecord:
+    """
+    Every component of a monster stat block, as loaded from the database,
+    ready to be handed to an NPCharacterBuilder
+    """
+    id: int
+    physical_stats: PhysicalStats
+    alignment: Alignment
+    base_stats: BaseStats
+    ability_scores: AbilityScores
+    saving_throws: SavingThrows
+    skills: Skills
+    damage_modifiers: DamageModifiers
+    senses: Senses
+    languages: Languages
+    challenge: Challenge | None
 
 def get_statement(filename: str) -> str:
-    cur_dir = os.path.realpath(os.path.join(os.path.dirname(__file__), '.'))
-    cur_path = os.path.join(cur_dir, f"sql/{filename}")
-    return open(cur_path, "r").read()
+    return monster_statements.statement(os.path.splitext(filename)[0])
 
 def physical_stats_by_id(id: int) -> PhysicalStats:
-    cur = conn.cursor()
-    statement = get_statement("physical_stats.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    stats = PhysicalStats(**res.fetchone())
-    cur.close()
-    return stats
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "physical_stats", {"id": id})
+    return PhysicalStats(**row)
 
 def alignment_by_id(id: int) -> Alignment:
-    cur = conn.cursor()
-    statement = get_statement("alignment.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    stats = Alignment(**res.fetchone())
-    cur.close()
-    return stats
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "alignment", {"id": id})
+    return Alignment(**row)
 
 def base_stats_by_id(id: int) -> BaseStats:
-    cur = conn.cursor()
-    statement = get_statement("base_stats.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    res = res.fetchone()
-    base_stats = BaseStats(
-        armor_class=res.get("armor_class"),
-        hit_points=res.get("hit_points"),
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "base_stats", {"id": id})
+    return _to_base_stats(row)
+
+def _to_base_stats(row: dict) -> BaseStats:
+    return BaseStats(
+        armor_class=row.get("armor_class"),
+        hit_points=row.get("hit_points"),
         speed=Speed(
-            burrow=res.get("burrow"),
-            climb=res.get("climb"),
-            fly=res.get("fly"),
-            swim=res.get("swim"),
-            walk=res.get("walk")
+            burrow=row.get("burrow"),
+            climb=row.get("climb"),
+            fly=row.get("fly"),
+            swim=row.get("swim"),
+            walk=row.get("walk")
         )
     )
-    cur.close()
-    return base_stats
 
 def ability_scores_by_id(id: int) -> AbilityScores:
-    cur = conn.cursor()
-    statement = get_statement("ability_scores.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    stats = AbilityScores(**res.fetchone())
-    cur.close()
-    return stats
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "ability_scores", {"id": id})
+    return AbilityScores(**row)
 
 def saving_throws_by_id(id: int) -> SavingThrows:
-    cur = conn.cursor()
-    statement = get_statement("saving_throws.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    int_dict = res.fetchone()
-    for key, value in int_dict.items():
-        int_dict[key] = bool(value)
-    stats = SavingThrows(**int_dict)
-    cur.close()
-    return stats
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "saving_throws", {"id": id})
+    return _to_saving_throws(row)
+
+def _to_saving_throws(row: dict) -> SavingThrows:
+    return SavingThrows(**{key: bool(value) for key, value in row.items()})
 
 def skills_by_id(id: int) -> Skills:
-    cur = conn.cursor()
-    statement = get_statement("skills.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    skills_dict: dict = res.fetchone()
-    stats = Skills(**skills_dict)
-    cur.close()
-    return stats
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "skills", {"id": id})
+    return Skills(**row)
 
 def immunities_by_id(id: int) -> DamageModifiers:
-    cur = conn.cursor()
-    statement = get_statement("immunities.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    immunities_dict: dict = res.fetchone()
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "immunities", {"id": id})
+    return _to_damage_modifiers(row)
+
+def _to_damage_modifiers(immunities_dict: dict) -> DamageModifiers:
     # Each key in sql is a damage type, need each key to be a
     # resistance level instead
     mod_dict = {
@@ -108,20 +107,18 @@ def immunities_by_id(id: int) -> DamageModifiers:
                 mod_dict["immunities"].add(key)
             case "resistance":
                 mod_dict["resistances"].add(key)
-            case "weak":
+            case "weak" | "weakness":
                 mod_dict["vulnerabilities"].add(key)
             case _:
                 pass
-    cur.close()
     return DamageModifiers(**mod_dict)
 
 def senses_by_id(id: int) -> Senses:
-    cur = conn.cursor()
-    statement = get_statement("senses.sql")
-    res = cur.execute(
-        statement, {"id": id}
-    )
-    sense_dict = res.fetchone()
+    with get_pool().connection() as con:
+        row = monster_statements.fetchone(con, "senses", {"id": id})
+    return _to_senses(row)
+
+def _to_senses(sense_dict: dict) -> Senses:
     out_dict = {
         "passive_perception": 0,
         "senses": set()
@@ -133,5 +130,70 @@ def senses_by_id(id: int) -> Senses:
             case _:
                 if value != 0:
                     out_dict["senses"].add(key)
-    cur.close()
     return Senses(**out_dict)
+
+def _to_languages(language_dict: dict) -> Languages:
+    language_dict = dict(language_dict)
+    telepathic = bool(language_dict.pop("telepathy", None))
+    return Languages(
+        telepathic=telepathic,
+        languages={key for key, value in language_dict.items() if value}
+    )
+
+def _to_challenge(challenge_rating: str | float | None) -> Challenge | None:
+    # Template rows carry placeholders such as 'VARIES' or 'TEMP'
+    try:
+        return Challenge(float(challenge_rating))
+    except (TypeError, ValueError):
+        return None
+
+def _to_monster_record(row: dict) -> MonsterRecord:
+    """
+    Split a row of monsters.sql into its components. Columns are aliased
+    as <component>__<field>, see monsters.sql
+    """
+    groups = {}
+    for key, value in row.items():
+        component, _, field = key.partition("__")
+        groups.setdefault(component, {})[field] = value
+
+    return MonsterRecord(
+        id=row["id"],
+        physical_stats=PhysicalStats(**groups["physical_stats"]),
+        alignment=Alignment(**groups["alignment"]),
+        base_stats=_to_base_stats(groups["base_stats"]),
+        ability_scores=AbilityScores(**groups["ability_scores"]),
+        saving_throws=_to_saving_throws(groups["saving_throws"]),
+        skills=Skills(**groups["skills"]),
+        damage_modifiers=_to_damage_modifiers(groups["damage_modifiers"]),
+        senses=_to_senses(groups["senses"]),
+        languages=_to_languages(groups["languages"]),
+        challenge=_to_challenge(groups["challenge"]["challenge_rating"])
+    )
+
+def monster_record_by_id(id: int) -> MonsterRecord:
+    """
+    Load every component of a monster in a single joined query
+    """
+    return monster_records_by_ids([id])[0]
+
+def monster_records_by_ids(ids: Iterable[int]) -> list[MonsterRecord]:
+    """
+    Load many monsters with one set-based query over every table. Records
+    come back in input order, duplicated ids each get their own record.
+    Raises MonsterNotFoundError listing every id that does not exist
+    """
+    ids = [int(id) for id in ids]
+    with get_pool().connection() as con:
+        res = monster_statements.fetchall(con, "monsters", {"ids": json.dumps(sorted(set(ids)))})
+    rows = {row["id"]: row for row in res}
+
+    missing = [id for id in dict.fromkeys(ids) if id not in rows]
+    if missing:
+        raise MonsterNotFoundError(missing)
+    return [_to_monster_record(rows[id]) for id in ids]
+
+def monsters_by_ids(ids: Iterable[int]) -> list[NPCharacter]:
+    director = CharacterDirector()
+    director.builder = NPCharacterBuilder()
+    return [director.build_from_record(record) for record in monster_records_by_ids(ids)]
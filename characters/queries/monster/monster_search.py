@@ -0,0 +1,142 @@
+from enum import Enum
+from typing import Iterable, Iterator
+
+from db import get_pool
+from characters import NPCharacter, CharacterSize, Lawfulness, Goodness, Sense, DamageType
+
+from .monster_queries import monsters_by_ids
+
+# The workbook misspells a couple of damage types, both spellings are columns
+DAMAGE_COLUMNS = {
+    DamageType.LIGHTNING: ("lightning", "lightining"),
+    DamageType.PSYCHIC: ("psychic", "pyschic"),
+}
+
+DAMAGE_LEVELS = {
+    "immune_to": ("immunity",),
+    "resistant_to": ("resistance",),
+    "vulnerable_to": ("weak", "weakness"),
+}
+
+
+def _value(value: Enum | str) -> str:
+    return value.value if isinstance(value, Enum) else value
+
+def _fts_query(name: str) -> str:
+    # Quote every word so user input is never parsed as FTS syntax, and
+    # prefix match so "gob" finds goblins
+    return " ".join('"' + word.replace('"', '""') + '"*' for word in name.split())
+
+def _search_clauses(
+        name: str | None,
+        cr_min: float | None,
+        cr_max: float | None,
+        type: str | None,
+        size: CharacterSize | str | None,
+        tag: str | None,
+        lawfulness: Lawfulness | str | None,
+        goodness: Goodness | str | None,
+        senses: dict[Sense | str, int] | None,
+        damage: dict[str, Iterable[DamageType]]
+) -> tuple[list[str], dict]:
+    clauses = []
+    params = {}
+
+    if name:
+        clauses.append("m.id IN (SELECT rowid FROM monster_fts WHERE monster_fts MATCH :name)")
+        params["name"] = _fts_query(name)
+    if cr_min is not None:
+        clauses.append("m.cr >= :cr_min")
+        params["cr_min"] = cr_min
+    if cr_max is not None:
+        clauses.append("m.cr <= :cr_max")
+        params["cr_max"] = cr_max
+    if type is not None:
+        clauses.append("m.type = :type")
+        params["type"] = type.lower()
+    if size is not None:
+        clauses.append("m.size = :size")
+        params["size"] = _value(size).lower()
+    if tag is not None:
+        # tags is a comma separated list such as 'giant, cloud'
+        clauses.append("',' || replace(m.tags, ' ', '') || ',' LIKE '%,' || :tag || ',%'")
+        params["tag"] = tag.replace(" ", "").lower()
+    # Alignments such as 'any' are stored as every value they allow
+    if lawfulness is not None:
+        clauses.append("instr(m.lawfulness, :lawfulness) > 0")
+        params["lawfulness"] = _value(lawfulness)
+    if goodness is not None:
+        clauses.append("instr(m.goodness, :goodness) > 0")
+        params["goodness"] = _value(goodness)
+
+    for sense, minimum in (senses or {}).items():
+        sense = Sense[sense.upper()] if isinstance(sense, str) else sense
+        column = sense.name.lower()
+        clauses.append(f"m.id IN (SELECT monster_id FROM sense WHERE {column} >= :sense_{column})")
+        params[f"sense_{column}"] = minimum
+
+    for level, damage_types in damage.items():
+        levels = ", ".join(f"'{value}'" for value in DAMAGE_LEVELS[level])
+        for damage_type in damage_types or ():
+            columns = DAMAGE_COLUMNS.get(damage_type, (damage_type.name.lower(),))
+            matches = " OR ".join(f"dm.{column} IN ({levels})" for column in columns)
+            clauses.append(f"m.id IN (SELECT monster_id FROM damage_mod dm WHERE {matches})")
+
+    return clauses, params
+
+def search_monster_ids(
+        *,
+        name: str | None = None,
+        cr_min: float | None = None,
+        cr_max: float | None = None,
+        type: str | None = None,
+        size: CharacterSize | str | None = None,
+        tag: str | None = None,
+        lawfulness: Lawfulness | str | None = None,
+        goodness: Goodness | str | None = None,
+        senses: dict[Sense | str, int] | None = None,
+        immune_to: Iterable[DamageType] | None = None,
+        resistant_to: Iterable[DamageType] | None = None,
+        vulnerable_to: Iterable[DamageType] | None = None,
+        chunk_size: int = 64,
+        after: int = -1
+) -> Iterator[int]:
+    """
+    Ids of every monster matching all of the given filters, in id order,
+    starting after the id after. Ids are paged out of the database
+    chunk_size at a time, so no connection is held while the caller
+    consumes them
+    """
+    clauses, params = _search_clauses(
+        name, cr_min, cr_max, type, size, tag, lawfulness, goodness, senses,
+        {"immune_to": immune_to, "resistant_to": resistant_to, "vulnerable_to": vulnerable_to}
+    )
+    clauses.append("m.id > :after")
+    statement = (
+        "SELECT m.id AS id FROM monster m WHERE "
+        + " AND ".join(clauses)
+        + " ORDER BY m.id LIMIT :chunk_size"
+    )
+
+    while True:
+        with get_pool().connection() as con:
+            rows = con.execute(statement, {**params, "after": after, "chunk_size": chunk_size}).fetchall()
+        for row in rows:
+            yield row["id"]
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1]["id"]
+
+def search_monsters(chunk_size: int = 64, **filters) -> Iterator[NPCharacter]:
+    """
+    Lazily hydrate every monster matching the filters of search_monster_ids,
+    one batched load per chunk
+    """
+    chunk = []
+    for id in search_monster_ids(chunk_size=chunk_size, **filters):
+        chunk.append(id)
+        if len(chunk) == chunk_size:
+            yield from monsters_by_ids(chunk)
+            chunk = []
+    if chunk:
+        yield from monsters_by_ids(chunk)
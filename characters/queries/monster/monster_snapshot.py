@@ -0,0 +1,310 @@
+import json
+import mmap
+import os
+import sqlite3
+import struct
+from collections.abc import Mapping
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from db import MONSTER_DB_PATH, dict_factory
+from characters import PhysicalStats, Alignment, BaseStats, Speed, AbilityScores, SavingThrows, Skills, \
+    DamageModifiers, Senses, Languages, Challenge, CharacterDirector, NPCharacterBuilder, NPCharacter
+
+from .monster_queries import monster_statements, MonsterNotFoundError, MonsterRecord, _to_monster_record
+
+MONSTER_SNAPSHOT_PATH = os.path.splitext(MONSTER_DB_PATH)[0] + ".snapshot"
+
+_SNAPSHOT_MAGIC = b"GTTGBEST"
+SNAPSHOT_VERSION = 1
+# magic, format version, database generation, record count, meta length
+_SNAPSHOT_HEADER = struct.Struct("<8sIIII")
+# Integer fields holding this value were NULL in the database
+_NULL_INT = np.iinfo(np.int32).min
+# String references holding this value were NULL in the database
+_NULL_STRING = np.iinfo(np.uint32).max
+
+_STRING_FIELDS = (
+    ("physical_stats", "size"), ("physical_stats", "type"), ("physical_stats", "tags"),
+    ("alignment", "lawfulness"), ("alignment", "goodness"),
+)
+_ABILITY_FIELDS = ("strength", "dexterity", "wisdom", "constitution", "intelligence", "charisma")
+_SPEED_FIELDS = ("walk", "burrow", "climb", "fly", "swim")
+_SAVING_THROW_FIELDS = tuple(SavingThrows.__dataclass_fields__)
+_SKILL_FIELDS = tuple(Skills.__dataclass_fields__)
+# Bitmask fields over a vocabulary collected from the data and stored in
+# the snapshot meta, bit i of the mask is word i of the vocabulary
+_VOCABULARY_FIELDS = ("immunities", "resistances", "vulnerabilities", "senses", "languages")
+
+
+class SnapshotVersionError(ValueError):
+
+    def __init__(self, path: str, version):
+        self.version = version
+        super().__init__(f"{path} is not a version {SNAPSHOT_VERSION} bestiary snapshot (found {version!r})")
+
+
+def _mask_bytes(words: int) -> int:
+    return max(1, (words + 7) // 8)
+
+def _record_dtype(vocabularies: dict[str, list[str]]) -> np.dtype:
+    """
+    One fixed-width record per monster, little endian and unpadded so the
+    layout only depends on the vocabulary sizes
+    """
+    fields = [("id", "<i4")]
+    fields += [(field, "<u4") for _, field in _STRING_FIELDS]
+    fields += [("armor_class", "<i4"), ("hit_points", "<i4")]
+    fields += [(field, "<i4") for field in _SPEED_FIELDS]
+    fields += [(field, "<i4") for field in _ABILITY_FIELDS]
+    fields += [("passive_perception", "<i4"), ("challenge_rating", "<f8")]
+    fields += [("saving_throws", "u1"), ("skills", "<u4"), ("telepathic", "u1")]
+    fields += [(name, "u1", (_mask_bytes(len(vocabularies[name])),)) for name in _VOCABULARY_FIELDS]
+    return np.dtype(fields)
+
+def _to_mask(names: Iterable[str], vocabulary: list[str]) -> int:
+    return sum(1 << vocabulary.index(name) for name in names)
+
+def _from_mask(mask: int, vocabulary: list[str]) -> set[str]:
+    return {word for i, word in enumerate(vocabulary) if mask >> i & 1}
+
+def _int_or_null(value) -> int:
+    return _NULL_INT if value is None else int(value)
+
+def _null_or_int(value) -> int | None:
+    return None if value == _NULL_INT else int(value)
+
+def _vocabulary_sets(record: MonsterRecord) -> dict[str, set[str]]:
+    return {
+        "immunities": record.damage_modifiers.immunities,
+        "resistances": record.damage_modifiers.resistances,
+        "vulnerabilities": record.damage_modifiers.vulnerabilities,
+        "senses": record.senses.senses,
+        "languages": record.languages.languages,
+    }
+
+
+def encode_monster_snapshot(records: list[MonsterRecord], generation: int) -> bytes:
+    """
+    The snapshot file for records: a struct header, a JSON meta section with
+    the vocabularies and section offsets, the fixed-width records sorted by
+    id, then an offset table into a blob of deduplicated UTF-8 strings
+    """
+    records = sorted(records, key=lambda record: record.id)
+    vocabularies = {name: set() for name in _VOCABULARY_FIELDS}
+    for record in records:
+        for name, words in _vocabulary_sets(record).items():
+            vocabularies[name] |= words
+    vocabularies = {name: sorted(words) for name, words in vocabularies.items()}
+    dtype = _record_dtype(vocabularies)
+
+    strings = {}
+    array = np.zeros(len(records), dtype=dtype)
+    for i, record in enumerate(records):
+        row = array[i]
+        row["id"] = record.id
+        for component, field in _STRING_FIELDS:
+            value = getattr(getattr(record, component), field)
+            row[field] = _NULL_STRING if value is None else strings.setdefault(value, len(strings))
+        row["armor_class"] = _int_or_null(record.base_stats.armor_class)
+        row["hit_points"] = _int_or_null(record.base_stats.hit_points)
+        for field in _SPEED_FIELDS:
+            row[field] = _int_or_null(getattr(record.base_stats.speed, field))
+        for field in _ABILITY_FIELDS:
+            row[field] = _int_or_null(getattr(record.ability_scores, field).value)
+        row["passive_perception"] = _int_or_null(record.senses.passive_perception)
+        row["challenge_rating"] = np.nan if record.challenge is None else record.challenge.challenge_rating
+        row["saving_throws"] = _to_mask(
+            (field for field in _SAVING_THROW_FIELDS if getattr(record.saving_throws, field)), _SAVING_THROW_FIELDS
+        )
+        row["skills"] = _to_mask(
+            (field for field in _SKILL_FIELDS if getattr(record.skills, field)), _SKILL_FIELDS
+        )
+        row["telepathic"] = record.languages.telepathic
+        for name, words in _vocabulary_sets(record).items():
+            mask = _to_mask(words, vocabularies[name])
+            row[name] = np.frombuffer(mask.to_bytes(dtype[name].shape[0], "little"), dtype=np.uint8)
+
+    encoded = [string.encode("utf-8") for string in strings]
+    string_offsets = np.cumsum([0] + [len(string) for string in encoded], dtype="<u4")
+
+    meta = {"vocabularies": vocabularies, "string_count": len(strings)}
+    # The offsets depend on the meta length, which depends on the offsets,
+    # so fix the offsets' width by reserving room for them first
+    meta.update(records_offset=0, strings_offset=0, blob_offset=0)
+    reserve = len(json.dumps(meta)) + 3 * 20
+    records_offset = _align(_SNAPSHOT_HEADER.size + reserve)
+    strings_offset = _align(records_offset + array.nbytes)
+    meta.update(
+        records_offset=records_offset,
+        strings_offset=strings_offset,
+        blob_offset=strings_offset + string_offsets.nbytes
+    )
+    meta_bytes = json.dumps(meta).encode("utf-8").ljust(reserve)
+
+    header = _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, SNAPSHOT_VERSION, generation, len(records), len(meta_bytes))
+    return b"".join([
+        header,
+        meta_bytes,
+        bytes(records_offset - len(header) - len(meta_bytes)),
+        array.tobytes(),
+        bytes(strings_offset - records_offset - array.nbytes),
+        string_offsets.tobytes(),
+        *encoded
+    ])
+
+def _align(offset: int, alignment: int = 8) -> int:
+    return -(-offset // alignment) * alignment
+
+def write_monster_snapshot(path: str = MONSTER_SNAPSHOT_PATH, db_path: str = MONSTER_DB_PATH) -> int:
+    """
+    Snapshot every monster of the database at db_path to path, replacing the
+    file atomically so running readers keep their mapping of the old one.
+    Returns the number of monsters written
+    """
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    con.row_factory = dict_factory
+    try:
+        ids = [row["id"] for row in con.execute("SELECT id FROM monster")]
+        rows = monster_statements.fetchall(con, "monsters", {"ids": json.dumps(ids)})
+        generation = con.execute("PRAGMA user_version").fetchone()["user_version"]
+    finally:
+        con.close()
+
+    data = encode_monster_snapshot([_to_monster_record(row) for row in rows], generation)
+    partial_path = f"{path}.partial"
+    with open(partial_path, "wb") as snapshot_file:
+        snapshot_file.write(data)
+    os.replace(partial_path, path)
+    return len(rows)
+
+
+class MonsterSnapshot(Mapping[int, NPCharacter]):
+    """
+    Read-only view of a bestiary snapshot, see encode_monster_snapshot.
+
+    The file is memory-mapped and the records are numpy views over the
+    mapping, so opening one costs a header parse. Characters are only built
+    when looked up. Processes mapping the same file share its page cache.
+    """
+
+    def __init__(self, path: str = MONSTER_SNAPSHOT_PATH):
+        self.path = path
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < _SNAPSHOT_HEADER.size:
+                raise SnapshotVersionError(path, None)
+            magic, version, generation, count, meta_length = _SNAPSHOT_HEADER.unpack_from(self._mmap)
+            if magic != _SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                raise SnapshotVersionError(path, version if magic == _SNAPSHOT_MAGIC else None)
+            meta = json.loads(self._mmap[_SNAPSHOT_HEADER.size:_SNAPSHOT_HEADER.size + meta_length])
+        except Exception:
+            self._mmap.close()
+            raise
+
+        self.generation = generation
+        self.vocabularies = meta["vocabularies"]
+        self._records = np.frombuffer(
+            self._mmap, dtype=_record_dtype(self.vocabularies), count=count, offset=meta["records_offset"]
+        )
+        self._string_offsets = np.frombuffer(
+            self._mmap, dtype="<u4", count=meta["string_count"] + 1, offset=meta["strings_offset"]
+        )
+        self._blob_offset = meta["blob_offset"]
+        self._director = CharacterDirector()
+        self._director.builder = NPCharacterBuilder()
+
+    def __enter__(self) -> "MonsterSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # The numpy views hold exports of the mapping, it cannot be closed
+        # while they are alive
+        self._records = self._string_offsets = None
+        self._mmap.close()
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._records["id"]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.ids.tolist())
+
+    def __contains__(self, id) -> bool:
+        return self._row(id) is not None
+
+    def __getitem__(self, id: int) -> NPCharacter:
+        if id not in self:
+            raise KeyError(id)
+        return self._director.build_from_record(self.record(id))
+
+    def _row(self, id) -> int | None:
+        row = int(np.searchsorted(self.ids, id))
+        return row if row < len(self._records) and self.ids[row] == id else None
+
+    def _string(self, ref: int) -> str | None:
+        if ref == _NULL_STRING:
+            return None
+        start = self._blob_offset + int(self._string_offsets[ref])
+        end = self._blob_offset + int(self._string_offsets[ref + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+    def _words(self, row: np.void, name: str) -> set[str]:
+        return _from_mask(int.from_bytes(row[name].tobytes(), "little"), self.vocabularies[name])
+
+    def record(self, id: int) -> MonsterRecord:
+        """
+        Raises MonsterNotFoundError if the snapshot has no monster with id
+        """
+        index = self._row(id)
+        if index is None:
+            raise MonsterNotFoundError([id])
+        row = self._records[index]
+        strings = {field: self._string(row[field]) for _, field in _STRING_FIELDS}
+        saving_throws = int(row["saving_throws"])
+        skills = int(row["skills"])
+        challenge_rating = float(row["challenge_rating"])
+        return MonsterRecord(
+            id=int(row["id"]),
+            physical_stats=PhysicalStats(size=strings["size"], type=strings["type"], tags=strings["tags"]),
+            alignment=Alignment(lawfulness=strings["lawfulness"], goodness=strings["goodness"]),
+            base_stats=BaseStats(
+                armor_class=_null_or_int(row["armor_class"]),
+                hit_points=_null_or_int(row["hit_points"]),
+                speed=Speed(**{field: _null_or_int(row[field]) for field in _SPEED_FIELDS})
+            ),
+            ability_scores=AbilityScores(**{field: _null_or_int(row[field]) for field in _ABILITY_FIELDS}),
+            saving_throws=SavingThrows(
+                **{field: bool(saving_throws >> i & 1) for i, field in enumerate(_SAVING_THROW_FIELDS)}
+            ),
+            skills=Skills(**{field: skills >> i & 1 for i, field in enumerate(_SKILL_FIELDS)}),
+            damage_modifiers=DamageModifiers(
+                immunities=self._words(row, "immunities"),
+                resistances=self._words(row, "resistances"),
+                vulnerabilities=self._words(row, "vulnerabilities")
+            ),
+            senses=Senses(
+                passive_perception=_null_or_int(row["passive_perception"]),
+                senses=self._words(row, "senses")
+            ),
+            languages=Languages(telepathic=bool(row["telepathic"]), languages=self._words(row, "languages")),
+            challenge=None if np.isnan(challenge_rating) else Challenge(challenge_rating)
+        )
+
+    def monsters(self, ids: Iterable[int]) -> list[NPCharacter]:
+        """
+        Same contract as monsters_by_ids, built from the snapshot
+        """
+        ids = [int(id) for id in ids]
+        missing = [id for id in dict.fromkeys(ids) if id not in self]
+        if missing:
+            raise MonsterNotFoundError(missing)
+        return [self[id] for id in ids]
@@ -0,0 +1,24 @@
+SELECT
+    m.id, m.name, m.cr, m.ac, m.hp,
+    m.str, m.dex, m.con, m.int, m.wis, m.cha,
+    coalesce(sp.walk, 0), coalesce(sp.burrow, 0), coalesce(sp.climb, 0),
+    coalesce(sp.fly, 0), coalesce(sp.swim, 0),
+    coalesce(st.str, 0), coalesce(st.dex, 0), coalesce(st.con, 0),
+    coalesce(st.int, 0), coalesce(st.wis, 0), coalesce(st.cha, 0),
+    coalesce(sk.acrobatics, 0), coalesce(sk.animal_handling, 0),
+    coalesce(sk.arcana, 0), coalesce(sk.athletics, 0),
+    coalesce(sk.deception, 0), coalesce(sk.history, 0),
+    coalesce(sk.insight, 0), coalesce(sk.intimidation, 0),
+    coalesce(sk.investigation, 0), coalesce(sk.medicine, 0),
+    coalesce(sk.nature, 0), coalesce(sk.perception, 0),
+    coalesce(sk.performance, 0), coalesce(sk.persuasion, 0),
+    coalesce(sk.religion, 0), coalesce(sk.sleight_of_hand, 0),
+    coalesce(sk.stealth, 0), coalesce(sk.survival, 0),
+    coalesce(se.blindsight, 0), coalesce(se.darkvision, 0),
+    coalesce(se.tremorsense, 0), coalesce(se.truesight, 0)
+FROM monster as m
+LEFT JOIN main.speed sp on m.id = sp.monster_id
+LEFT JOIN main.skills sk on m.id = sk.monster_id
+LEFT JOIN main.saving_throw st on m.id = st.monster_id
+LEFT JOIN main.sense se on m.id = se.monster_id
+ORDER BY m.id;
@@ -1,3 +1,3 @@
 SELECT *
 FROM damage_mod
-WHERE id=340;
\ No newline at end of file
+WHERE monster_id=:id;
\ No newline at end of file
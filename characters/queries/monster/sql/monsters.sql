@@ -0,0 +1,120 @@
+SELECT
+    m.id as id,
+    m.size as physical_stats__size, m.type as physical_stats__type,
+    m.tags as physical_stats__tags,
+    m.lawfulness as alignment__lawfulness, m.goodness as alignment__goodness,
+    m.ac as base_stats__armor_class, m.hp as base_stats__hit_points,
+    sp.burrow as base_stats__burrow, sp.walk as base_stats__walk,
+    sp.fly as base_stats__fly, sp.climb as base_stats__climb,
+    sp.swim as base_stats__swim,
+    m.str as ability_scores__strength, m.dex as ability_scores__dexterity,
+    m.wis as ability_scores__wisdom, m.con as ability_scores__constitution,
+    m.int as ability_scores__intelligence, m.cha as ability_scores__charisma,
+    st.str as saving_throws__strength, st.dex as saving_throws__dexterity,
+    st.wis as saving_throws__wisdom, st.con as saving_throws__constitution,
+    st.cha as saving_throws__charisma, st.int as saving_throws__intelligence,
+    sk.intimidation as skills__intimidation,
+    sk.perception as skills__perception,
+    sk.investigation as skills__investigation,
+    sk.acrobatics as skills__acrobatics,
+    sk.animal_handling as skills__animal_handling,
+    sk.religion as skills__religion,
+    sk.insight as skills__insight,
+    sk.survival as skills__survival,
+    sk.arcana as skills__arcana,
+    sk.medicine as skills__medicine,
+    sk.history as skills__history,
+    sk.sleight_of_hand as skills__sleight_of_hand,
+    sk.athletics as skills__athletics,
+    sk.nature as skills__nature,
+    sk.persuasion as skills__persuasion,
+    sk.stealth as skills__stealth,
+    sk.performance as skills__performance,
+    sk.deception as skills__deception,
+    se.darkvision as senses__darkvision, se.tremorsense as senses__tremorsense,
+    se.blindsight as senses__blindsight, se.truesight as senses__truesight,
+    m.wis as senses__passive_perception,
+    dm.cold as damage_modifiers__cold,
+    dm.nonadamantine as damage_modifiers__nonadamantine,
+    dm.spell as damage_modifiers__spell,
+    dm.acid as damage_modifiers__acid,
+    dm.stunned as damage_modifiers__stunned,
+    dm.charmed as damage_modifiers__charmed,
+    dm.exhaustion as damage_modifiers__exhaustion,
+    dm.thunder as damage_modifiers__thunder,
+    dm.lightining as damage_modifiers__lightining,
+    dm.grappled as damage_modifiers__grappled,
+    dm.frightened as damage_modifiers__frightened,
+    dm.unconscious as damage_modifiers__unconscious,
+    dm.paralyzed as damage_modifiers__paralyzed,
+    dm.nonsilvered as damage_modifiers__nonsilvered,
+    dm.trainde as damage_modifiers__trainde,
+    dm.deafened as damage_modifiers__deafened,
+    dm.necrotic as damage_modifiers__necrotic,
+    dm.prone as damage_modifiers__prone,
+    dm.psychic as damage_modifiers__psychic,
+    dm.darkness as damage_modifiers__darkness,
+    dm.fire as damage_modifiers__fire,
+    dm.force as damage_modifiers__force,
+    dm.magicalpiercing as damage_modifiers__magicalpiercing,
+    dm.poisoned as damage_modifiers__poisoned,
+    dm.blinded as damage_modifiers__blinded,
+    dm.slashing as damage_modifiers__slashing,
+    dm.paralyezd as damage_modifiers__paralyezd,
+    dm.poison as damage_modifiers__poison,
+    dm.petrified as damage_modifiers__petrified,
+    dm.magical as damage_modifiers__magical,
+    dm.pyschic as damage_modifiers__pyschic,
+    dm.exhuastion as damage_modifiers__exhuastion,
+    dm.bludgeoning as damage_modifiers__bludgeoning,
+    dm.trained as damage_modifiers__trained,
+    dm.lightning as damage_modifiers__lightning,
+    dm.piercing as damage_modifiers__piercing,
+    dm.radiant as damage_modifiers__radiant,
+    dm.nonmagical as damage_modifiers__nonmagical,
+    l.auran as languages__auran,
+    l."deep" as languages__deep,
+    l.telepathy as languages__telepathy,
+    l.common as languages__common,
+    l.dwarvish as languages__dwarvish,
+    l."any" as languages__any,
+    l.draconic as languages__draconic,
+    l."all" as languages__all,
+    l.celestial as languages__celestial,
+    l.creator as languages__creator,
+    l.ignan as languages__ignan,
+    l.elvish as languages__elvish,
+    l.abyssal as languages__abyssal,
+    l.goblin as languages__goblin,
+    l.infernal as languages__infernal,
+    l.undercommon as languages__undercommon,
+    l.terran as languages__terran,
+    l.druidic as languages__druidic,
+    l.sylvan as languages__sylvan,
+    l."own" as languages__own,
+    l.aquan as languages__aquan,
+    l.giant as languages__giant,
+    l.thieves as languages__thieves,
+    l.gnoll as languages__gnoll,
+    l."temp" as languages__temp,
+    l.spiders as languages__spiders,
+    l.elivhs as languages__elivhs,
+    l.orc as languages__orc,
+    l.gnomish as languages__gnomish,
+    l.primordial as languages__primordial,
+    l.olman as languages__olman,
+    l.modron as languages__modron,
+    l.thayan as languages__thayan,
+    l.primal as languages__primal,
+    l.alive as languages__alive,
+    l.bothii as languages__bothii,
+    l.yikaria as languages__yikaria,
+    m.cr as challenge__challenge_rating
+FROM monster as m
+LEFT JOIN main.speed sp on m.id = sp.monster_id
+LEFT JOIN main.skills sk on m.id = sk.monster_id
+LEFT JOIN main.saving_throw st on m.id = st.monster_id
+LEFT JOIN main.sense se on m.id = se.monster_id
+LEFT JOIN main.damage_mod dm on m.id = dm.monster_id
+LEFT JOIN main.language l on m.id = l.monster_id
+WHERE m.id IN (SELECT value FROM json_each(:ids));
\ No newline at end of file
@@ -3,4 +3,4 @@ SELECT
     s.blindsight as blindsight, s.truesight as truesight,
     m.wis as passive_perception
 FROM monster m INNER JOIN main.sense s on m.id = s.monster_id
-WHERE m.id=340;
\ No newline at end of file
+WHERE m.id=:id;
\ No newline at end of file
@@ -0,0 +1,274 @@
+import copy
+from dataclasses import dataclass
+from enum import IntFlag
+from typing import Sequence
+
+import numpy as np
+
+from util import calculate_modifier
+
+from .character import ICharacter, NPCharacter, AbilityScores, SavingThrows, BaseStats, Speed, Challenge
+from .queries.monster.bestiary_arrays import BestiaryArrays, ABILITIES, SPEEDS
+
+
+class Condition(IntFlag):
+    BLINDED = 1 << 0
+    CHARMED = 1 << 1
+    DEAFENED = 1 << 2
+    FRIGHTENED = 1 << 3
+    GRAPPLED = 1 << 4
+    INCAPACITATED = 1 << 5
+    INVISIBLE = 1 << 6
+    PARALYZED = 1 << 7
+    PETRIFIED = 1 << 8
+    POISONED = 1 << 9
+    PRONE = 1 << 10
+    RESTRAINED = 1 << 11
+    STUNNED = 1 << 12
+    UNCONSCIOUS = 1 << 13
+
+
+def proficiency_bonus(challenge_ratings) -> np.ndarray:
+    """
+    Proficiency bonus of monsters by challenge rating, +2 up to CR 4 then +1
+    every 4 ratings. Unknown ratings (NaN) get +2
+    """
+    ratings = np.nan_to_num(np.asarray(challenge_ratings, dtype=np.float64), nan=0.0)
+    return (2 + (np.maximum(np.ceil(ratings), 1) - 1) // 4).astype(np.int8)
+
+
+@dataclass
+class CombatantRoster:
+    """
+    Live combatants stored column-wise, row i of every array is combatant
+    i. Matrix columns follow ABILITIES and SPEEDS. Rows built from
+    NPCharacter templates point into templates, rows built from the
+    bestiary carry their monster id; the other is -1.
+
+    Every bulk operation takes rows, anything numpy can index the columns
+    with (an index array, a boolean mask or a slice), and defaults to the
+    whole roster.
+    """
+    monster_ids: np.ndarray
+    template_indices: np.ndarray
+    templates: list[NPCharacter]
+    challenge_ratings: np.ndarray
+    armor_class: np.ndarray
+    max_hit_points: np.ndarray
+    hit_points: np.ndarray
+    ability_scores: np.ndarray
+    saving_throw_proficiencies: np.ndarray
+    speeds: np.ndarray
+    conditions: np.ndarray
+
+    @classmethod
+    def from_characters(cls, characters: Sequence[NPCharacter], counts=1) -> "CombatantRoster":
+        """
+        counts copies of every character, counts is a scalar or one count
+        per character
+        """
+        characters = list(characters)
+        counts = np.broadcast_to(np.asarray(counts, dtype=np.intp), (len(characters),))
+
+        def column(values, dtype) -> np.ndarray:
+            return np.repeat(np.array(values, dtype=dtype).reshape(len(characters), -1), counts, axis=0)
+
+        challenge_ratings = [
+            np.nan if character.challenge is None else character.challenge.challenge_rating
+            for character in characters
+        ]
+        hit_points = column([character.base_stats.hit_points for character in characters], np.int32)[:, 0]
+        return cls(
+            monster_ids=np.full(int(counts.sum()), -1, dtype=np.int32),
+            template_indices=np.repeat(np.arange(len(characters), dtype=np.int32), counts),
+            templates=characters,
+            challenge_ratings=column(challenge_ratings, np.float32)[:, 0],
+            armor_class=column([character.base_stats.armor_class for character in characters], np.int16)[:, 0],
+            max_hit_points=hit_points,
+            hit_points=hit_points.copy(),
+            ability_scores=column([
+                [getattr(character.ability_scores, ability).value for ability in ABILITIES]
+                for character in characters
+            ], np.int8),
+            saving_throw_proficiencies=column([
+                [getattr(character.saving_throws, ability) for ability in ABILITIES]
+                for character in characters
+            ], bool),
+            speeds=column([
+                [getattr(character.base_stats.speed, speed) or 0 for speed in SPEEDS]
+                for character in characters
+            ], np.int16),
+            conditions=np.zeros(int(counts.sum()), dtype=np.uint32)
+        )
+
+    @classmethod
+    def from_bestiary(cls, bestiary: BestiaryArrays, ids, counts=1) -> "CombatantRoster":
+        """
+        counts copies of every monster in ids, straight from the bestiary
+        columns without building any character
+        """
+        ids = np.asarray(ids)
+        rows = np.repeat(bestiary.rows(ids), np.broadcast_to(np.asarray(counts, dtype=np.intp), ids.shape))
+        return cls(
+            monster_ids=bestiary.ids[rows],
+            template_indices=np.full(len(rows), -1, dtype=np.int32),
+            templates=[],
+            challenge_ratings=bestiary.challenge_ratings[rows],
+            armor_class=bestiary.armor_class[rows],
+            max_hit_points=bestiary.hit_points[rows],
+            hit_points=bestiary.hit_points[rows].copy(),
+            ability_scores=bestiary.ability_scores[rows],
+            saving_throw_proficiencies=bestiary.saving_throw_proficiencies[rows],
+            speeds=bestiary.speeds[rows],
+            conditions=np.zeros(len(rows), dtype=np.uint32)
+        )
+
+    def __len__(self) -> int:
+        return len(self.hit_points)
+
+    def __getitem__(self, row: int) -> "Combatant":
+        if not -len(self) <= row < len(self):
+            raise IndexError(row)
+        return Combatant(self, row % len(self))
+
+    def __iter__(self):
+        return (Combatant(self, row) for row in range(len(self)))
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self.hit_points > 0
+
+    @property
+    def modifiers(self) -> np.ndarray:
+        # Widen before subtracting so the formula cannot wrap around in int8
+        return calculate_modifier(self.ability_scores.astype(np.int16)).astype(np.int8)
+
+    @property
+    def proficiency_bonus(self) -> np.ndarray:
+        return proficiency_bonus(self.challenge_ratings)
+
+    def saving_throw_bonus(self, ability: str, rows=slice(None)) -> np.ndarray:
+        column = ABILITIES.index(ability)
+        modifiers = calculate_modifier(self.ability_scores[rows, column].astype(np.int16))
+        proficient = self.saving_throw_proficiencies[rows, column]
+        return modifiers + np.where(proficient, proficiency_bonus(self.challenge_ratings[rows]), 0)
+
+    def saving_throw(self, ability: str, dc: int, rng: np.random.Generator, rows=slice(None)) -> np.ndarray:
+        """
+        Whether each selected combatant succeeds on an ability saving throw
+        against dc
+        """
+        bonus = self.saving_throw_bonus(ability, rows)
+        return rng.integers(1, 21, size=bonus.shape) + bonus >= dc
+
+    def apply_damage(self, damage, rows=slice(None)) -> None:
+        """
+        Subtract damage, a scalar or one value per selected combatant, hit
+        points stop at 0. A row selected more than once takes every hit
+        """
+        np.subtract.at(self.hit_points, rows, np.asarray(damage, dtype=np.int32))
+        self.hit_points[rows] = np.maximum(self.hit_points[rows], 0)
+
+    def heal(self, amount, rows=slice(None)) -> None:
+        np.add.at(self.hit_points, rows, np.asarray(amount, dtype=np.int32))
+        self.hit_points[rows] = np.minimum(self.hit_points[rows], self.max_hit_points[rows])
+
+    def area_effect(
+            self,
+            ability: str,
+            dc: int,
+            damage,
+            rng: np.random.Generator,
+            rows=slice(None),
+            half_on_save: bool = True
+    ) -> np.ndarray:
+        """
+        A saving throw for everyone selected, damage on a failure and half
+        of it (rounded down) or nothing on a success, like a fireball.
+        Returns who saved
+        """
+        saved = self.saving_throw(ability, dc, rng, rows)
+        damage = np.broadcast_to(np.asarray(damage, dtype=np.int32), saved.shape)
+        self.apply_damage(np.where(saved, damage // 2 if half_on_save else 0, damage), rows)
+        return saved
+
+    def add_condition(self, condition: Condition, rows=slice(None)) -> None:
+        self.conditions[rows] |= np.uint32(condition)
+
+    def remove_condition(self, condition: Condition, rows=slice(None)) -> None:
+        self.conditions[rows] &= ~np.uint32(condition)
+
+    def has_condition(self, condition: Condition) -> np.ndarray:
+        return (self.conditions & np.uint32(condition)) != 0
+
+
+class Combatant:
+    """
+    View of one roster row that reads like an ICharacter. Components are
+    built from the columns on every access, write through hit_points and
+    conditions to change the combatant. Components the roster does not
+    store are copied from the row's template and are None without one.
+    """
+    __slots__ = ("roster", "row")
+
+    def __init__(self, roster: CombatantRoster, row: int):
+        self.roster = roster
+        self.row = row
+
+    def __repr__(self) -> str:
+        return f"Combatant(row={self.row}, hit_points={self.hit_points})"
+
+    def __getattr__(self, name: str):
+        if name not in ICharacter.__dataclass_fields__:
+            raise AttributeError(name)
+        template = self.template
+        # Rows share their template, a copy keeps one row's changes to itself
+        return copy.deepcopy(getattr(template, name)) if template is not None else None
+
+    @property
+    def template(self) -> NPCharacter | None:
+        index = self.roster.template_indices[self.row]
+        return self.roster.templates[index] if index >= 0 else None
+
+    @property
+    def monster_id(self) -> int | None:
+        id = int(self.roster.monster_ids[self.row])
+        return id if id >= 0 else None
+
+    @property
+    def hit_points(self) -> int:
+        return int(self.roster.hit_points[self.row])
+
+    @hit_points.setter
+    def hit_points(self, hit_points: int) -> None:
+        self.roster.hit_points[self.row] = hit_points
+
+    @property
+    def conditions(self) -> Condition:
+        return Condition(int(self.roster.conditions[self.row]))
+
+    @conditions.setter
+    def conditions(self, conditions: Condition) -> None:
+        self.roster.conditions[self.row] = conditions
+
+    @property
+    def base_stats(self) -> BaseStats:
+        roster = self.roster
+        return BaseStats(
+            armor_class=int(roster.armor_class[self.row]),
+            hit_points=self.hit_points,
+            speed=Speed(**dict(zip(SPEEDS, roster.speeds[self.row].tolist())))
+        )
+
+    @property
+    def ability_scores(self) -> AbilityScores:
+        return AbilityScores(**dict(zip(ABILITIES, self.roster.ability_scores[self.row].tolist())))
+
+    @property
+    def saving_throws(self) -> SavingThrows:
+        return SavingThrows(**dict(zip(ABILITIES, self.roster.saving_throw_proficiencies[self.row].tolist())))
+
+    @property
+    def challenge(self) -> Challenge | None:
+        rating = float(self.roster.challenge_ratings[self.row])
+        return None if np.isnan(rating) else Challenge(rating)
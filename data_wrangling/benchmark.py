@@ -0,0 +1,155 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from db import ConnectionPool
+from characters.queries.monster import monster_statements
+from util import ROOT_DIR
+
+from .data_munging import load_monster_frame, read_workbook_sheet, MONSTER_WORKBOOK_PATH, MONSTER_SHEET
+from .profiling import StageProfiler
+from .streaming_import import import_monster_file
+from .synthetic import write_synthetic_csv
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_RESULTS_PATH = os.path.join(ROOT_DIR, ".cache/benchmarks/etl_scaling.json")
+
+# name -> (statement, parameters for a random id array)
+QUERIES = {
+    "monster_by_id": (monster_statements.statement("monsters"), lambda ids: {"ids": json.dumps(ids[:1])}),
+    "monsters_batch_50": (monster_statements.statement("monsters"), lambda ids: {"ids": json.dumps(ids[:50])}),
+    "type_and_cr_page": (
+        "SELECT id FROM monster WHERE type = 'humanoid' AND cr <= :cr AND id > :after ORDER BY id LIMIT 64",
+        lambda ids: {"cr": 5, "after": ids[0]}
+    ),
+    "name_prefix_page": (
+        "SELECT rowid FROM monster_fts WHERE monster_fts MATCH '\"gob\"*' LIMIT 64",
+        lambda ids: {}
+    ),
+}
+
+
+def _percentiles(seconds: list[float]) -> dict[str, float]:
+    milliseconds = np.array(seconds) * 1000
+    return {
+        "p50_ms": float(np.percentile(milliseconds, 50)),
+        "p95_ms": float(np.percentile(milliseconds, 95)),
+        "p99_ms": float(np.percentile(milliseconds, 99)),
+    }
+
+def time_queries(db_path: str, repeats: int = 200, seed: int = 0) -> dict[str, dict[str, float]]:
+    rng = np.random.default_rng(seed)
+    pool = ConnectionPool(db_path, size=1)
+    try:
+        with pool.connection() as con:
+            all_ids = np.array([row["id"] for row in con.execute("SELECT id FROM monster")])
+            results = {}
+            for name, (statement, params) in QUERIES.items():
+                seconds = []
+                for _ in range(repeats):
+                    ids = rng.choice(all_ids, size=50, replace=False).tolist()
+                    start = time.perf_counter()
+                    con.execute(statement, params(ids)).fetchall()
+                    seconds.append(time.perf_counter() - start)
+                results[name] = _percentiles(seconds)
+    finally:
+        pool.close()
+    return results
+
+def benchmark_size(rows: int, work_dir: str, in_memory_limit: int, seed: int = 0) -> dict:
+    """
+    Generate rows synthetic monsters, load them, then time the queries on
+    the result. The in-memory ETL only runs up to in_memory_limit rows, past
+    that only the streaming importer does.
+    """
+    result = {"rows": rows}
+    csv_path = os.path.join(work_dir, f"bestiary_{rows}.csv")
+
+    start = time.perf_counter()
+    write_synthetic_csv(csv_path, rows, seed=seed)
+    result["generate_seconds"] = time.perf_counter() - start
+    result["csv_bytes"] = os.path.getsize(csv_path)
+
+    if rows <= in_memory_limit:
+        profiler = StageProfiler(trace_memory=False)
+        db_path = os.path.join(work_dir, f"full_{rows}.db")
+        df = profiler.run("read_csv", pd.read_csv, csv_path, dtype="string")
+        load_monster_frame(df, db_path=db_path, profiler=profiler)
+        del df
+        report = profiler.report()
+        result["full_load"] = {
+            "wall_seconds": report.wall_seconds,
+            "stages": {stage.name: stage.wall_seconds for stage in report.stages},
+        }
+        os.remove(db_path)
+    else:
+        result["full_load"] = None
+
+    # Imported on top of the official bestiary, the database every
+    # deployment starts from
+    db_path = os.path.join(work_dir, f"import_{rows}.db")
+    load_monster_frame(read_workbook_sheet(MONSTER_WORKBOOK_PATH, MONSTER_SHEET), db_path=db_path)
+    progress = import_monster_file(csv_path, db_path=db_path, progress=lambda _: None)
+    result["streaming_import"] = {
+        "seconds": progress.seconds,
+        "rows_per_second": progress.rows_per_second,
+        "rows_written": progress.rows_written,
+    }
+    result["db_bytes"] = os.path.getsize(db_path)
+    result["queries"] = time_queries(db_path, seed=seed)
+
+    os.remove(csv_path)
+    os.remove(db_path)
+    return result
+
+def run_benchmark(
+        sizes=DEFAULT_SIZES,
+        results_path: str = DEFAULT_RESULTS_PATH,
+        in_memory_limit: int = 100_000,
+        seed: int = 0
+) -> dict:
+    results = {
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+        "sizes": [],
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in sizes:
+            logger.info("Benchmarking %d rows", rows)
+            results["sizes"].append(benchmark_size(rows, work_dir, in_memory_limit, seed))
+
+    os.makedirs(os.path.dirname(os.path.abspath(results_path)), exist_ok=True)
+    with open(results_path, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the ETL and queries on synthetic bestiaries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH)
+    parser.add_argument(
+        "--in-memory-limit", type=int, default=100_000,
+        help="largest size also loaded with the in-memory ETL"
+    )
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.output, args.in_memory_limit)
+    logger.info("Results written to %s", args.output)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
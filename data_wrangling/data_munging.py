@@ -1,35 +1,319 @@
+import argparse
+import functools
+import hashlib
+import logging
+import pickle
 import re
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
 
+import openpyxl
 import pandas as pd
+from pandas.io.parsers import TextParser
 
-from db import write_df_to_db
+from db import write_tables, upsert_rows, read_source_hashes, MONSTER_DB_PATH, SOURCE_HASH_TABLE
 from util import ROOT_DIR
 
-def read_monster_workbook():
-    df: pd.DataFrame = pd.read_excel(
-        io=os.path.join(ROOT_DIR, 'resources/monster_excel.xlsx'),
-        sheet_name="Official Stats",
-        engine='openpyxl',
-        dtype="string"
+from .profiling import StageProfiler
+
+logger = logging.getLogger(__name__)
+
+MONSTER_WORKBOOK_PATH = os.path.join(ROOT_DIR, 'resources/monster_excel.xlsx')
+MONSTER_SHEET = "Official Stats"
+WORKBOOK_CACHE_DIR = os.path.join(ROOT_DIR, ".cache/workbooks")
+
+MONSTER_TABLES = ["monster", "speed", "skills", "damage_mod", "sense", "saving_throw", "language"]
+# Part of every row hash, bump it when a parser changes so the next
+# incremental load parses every row again
+PARSER_VERSION = 1
+
+# Starting worker processes costs more than the stages of a smaller
+# frame, such as an incremental delta, take to run
+PARALLEL_MIN_ROWS = 5_000
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    Builds the table named output from the input columns of the monster
+    frame, without side effects so it can run in another process
+    """
+    output: str
+    inputs: tuple[str, ...]
+    build: Callable[[pd.DataFrame], pd.DataFrame]
+
+
+# Shared by the table builders, compiled once
+WORD_PATTERN = re.compile(r"(\w+[a-zA-Z])")
+DIGIT_PATTERN = re.compile(r"(\w+[0-9])")
+DAMAGE_MOD_PATTERN = re.compile(r"(res|immun|weak|immmun|immu|immmu)")
+
+SPEED_COLUMNS = ["walk", "swim", "fly", "climb", "burrow"]
+SAVING_THROWS = ["str", "dex", "con", "int", "wis", "cha"]
+SENSE_COLUMNS = ["darkvision", "tremorsense", "blindsight", "truesight"]
+SENSE_NAMES = {
+    "darkvision": "darkvision",
+    "darkivision": "darkvision",
+    "blindsight": "blindsight",
+    "truesight": "truesight",
+    "tremorsense": "tremorsense",
+}
+DAMAGE_MOD_LEVELS = {
+    "res": "resistance",
+    "immun": "immunity",
+    "immmun": "immunity",
+    "immu": "immunity",
+    "immmu": "immunity",
+    "weak": "weakness",
+}
+
+SKILL_COLUMNS = [
+    "intimidation", "perception", "investigation", "acrobatics", "animal_handling",
+    "religion", "insight", "survival", "arcana", "medicine", "history",
+    "sleight_of_hand", "innate_spellcasting", "athletics", "death_burst", "nature",
+    "persuasion", "stealth", "performance", "deception",
+]
+# The keys as spelled in the sheet, typos and the trailing space included
+DAMAGE_MOD_COLUMNS = [
+    "cold", "nonadamantine", "spell", "acid", "frightened grappled", "stunned",
+    "charmed", "exhaustion", "thunder", "lightining", "grappled", "frightened",
+    "unconscious", "paralyzed", "nonsilvered", "trainde", "deafened", "necrotic",
+    "prone", "psychic", "darkness", "fire", "force", "magicalpiercing", "poisoned",
+    "blinded", "slashing", "temp", "paralyezd", "poison", "nonsilvered ",
+    "petrified", "magical", "pyschic", "exhuastion", "bludgeoning", "trained",
+    "lightning", "piercing", "radiant", "nonmagical",
+]
+
+
+@dataclass
+class ParseStats:
+    """
+    How much one call of a deduplicated builder saved. Nothing carries over
+    between calls, so a string repeated across streamed chunks counts as
+    unique in each of them
+    """
+    column: str
+    rows: int
+    unique: int
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        Share of rows whose string was already parsed for an earlier row of
+        the same call
+        """
+        return 1 - self.unique / self.rows if self.rows else 0.0
+
+def deduplicated(column: str):
+    """
+    Run a table builder once per distinct value of column rather than once
+    per row, and map the parsed rows back onto the frame. Stat blocks repeat
+    the same strings a lot, '30' alone is the speed of hundreds of monsters.
+    The table's parse_stats attr holds how much was saved.
+
+    Strings are only deduplicated within one call. Nothing is memoized
+    across calls, the builders run in worker processes and some tables get
+    their columns from the values, so every chunk of a streamed import
+    parses its distinct strings again.
+    """
+    def decorate(build: Callable[[pd.DataFrame], pd.DataFrame]) -> Callable[[pd.DataFrame], pd.DataFrame]:
+        @functools.wraps(build)
+        def build_deduplicated(df: pd.DataFrame) -> pd.DataFrame:
+            values = df[column]
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            unique_df = pd.DataFrame({column: pd.Series(uniques, dtype=values.dtype)})
+            table = build(unique_df).take(codes)
+            table.index = df.index
+            table = _as_table(table, table.attrs["table_name"])
+            table.attrs["parse_stats"] = ParseStats(column, len(values), len(uniques))
+            return table
+        return build_deduplicated
+    return decorate
+
+def _split_items(column: pd.Series) -> pd.Series:
+    """
+    One row per comma separated item, indexed by the monster it came from
+    """
+    return column.str.split(",").explode().dropna()
+
+def _pivot_last(keys: pd.Series, values, index: pd.Index, columns: list, fill) -> pd.DataFrame:
+    """
+    Spread (monster, key) -> value pairs into one column per key, the last
+    item of a monster wins like it did in the row parsers
+    """
+    pairs = pd.DataFrame({"key": keys, "value": values}).rename_axis("id")
+    wide = pairs.groupby(["id", "key"], sort=False)["value"].last().unstack()
+    wide = wide.reindex(index=index, columns=columns)
+    wide.columns.name = None
+    if fill is None:
+        return wide.astype(object).where(wide.notna(), None)
+    return wide.fillna(fill).astype(type(fill))
+
+def _as_table(table: pd.DataFrame, table_name: str) -> pd.DataFrame:
+    table.index = table.index.rename("id")
+    table["monster_id"] = table.index
+    table.attrs["table_name"] = table_name
+    return table
+
+def read_monster_workbook(
+        incremental: bool = False,
+        db_path: str = MONSTER_DB_PATH,
+        profiler: StageProfiler | None = None
+) -> int:
+    profiler = profiler or StageProfiler(trace_memory=False)
+    df = profiler.run("read_workbook_sheet", read_workbook_sheet, MONSTER_WORKBOOK_PATH, MONSTER_SHEET)
+    generation = load_monster_frame(df, incremental=incremental, db_path=db_path, profiler=profiler)
+
+    # Imported here, the query layer validates its statements against the
+    # database as it is imported
+    from characters.queries.monster import write_monster_snapshot
+    snapshot_path = os.path.splitext(db_path)[0] + ".snapshot"
+    profiler.run("write_monster_snapshot", write_monster_snapshot, snapshot_path, db_path)
+    return generation
+
+def workbook_cache_key(path: str, sheet_name: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as workbook:
+        while block := workbook.read(1 << 20):
+            digest.update(block)
+    digest.update(b"\0" + sheet_name.encode())
+    return digest.hexdigest()
+
+def read_workbook_sheet(path: str, sheet_name: str, cache_dir: str = WORKBOOK_CACHE_DIR) -> pd.DataFrame:
+    """
+    The sheet as pd.read_excel(dtype="string") returns it, cached as a
+    pickle keyed on the workbook content and sheet name, so an unchanged
+    workbook is never parsed twice
+    """
+    cache_path = os.path.join(cache_dir, workbook_cache_key(path, sheet_name) + ".pkl")
+    try:
+        with open(cache_path, "rb") as cache_file:
+            df = pickle.load(cache_file)
+        logger.info("Workbook cache hit for %s [%s]", path, sheet_name)
+        return df
+    except FileNotFoundError:
+        pass
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logger.warning("Ignoring unreadable workbook cache %s: %s", cache_path, e)
+
+    start = time.perf_counter()
+    df = stream_workbook_sheet(path, sheet_name)
+    logger.info(
+        "Workbook cache miss for %s [%s], parsed in %.1f ms",
+        path, sheet_name, (time.perf_counter() - start) * 1000
+    )
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written aside and renamed so a concurrent run never reads half a pickle
+    partial_path = f"{cache_path}.{os.getpid()}.partial"
+    with open(partial_path, "wb") as cache_file:
+        pickle.dump(df, cache_file, protocol=5)
+    os.replace(partial_path, cache_path)
+    return df
+
+def _excel_value(value):
+    # The cell conversion pd.read_excel does before parsing
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def stream_workbook_sheet(path: str, sheet_name: str) -> pd.DataFrame:
+    """
+    Read one sheet with openpyxl in read only mode, row values only, and
+    parse it with the same TextParser pd.read_excel uses, so the frame is
+    identical to pd.read_excel(dtype="string")
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        rows = [
+            [_excel_value(value) for value in row]
+            for row in workbook[sheet_name].iter_rows(values_only=True)
+        ]
+    finally:
+        workbook.close()
+    while rows and all(value == "" for value in rows[-1]):
+        rows.pop()
+    return TextParser(rows, header=0, dtype="string").read()
+
+def load_monster_frame(
+        df: pd.DataFrame,
+        incremental: bool = False,
+        db_path: str = MONSTER_DB_PATH,
+        profiler: StageProfiler | None = None
+) -> int:
+    """
+    Parse the raw sheet into the bestiary tables and write them, returns the
+    resulting generation.
+
+    A full load rebuilds the database. An incremental load compares every
+    row's hash with the one stored by the previous load and only parses and
+    upserts the rows that were added or changed, and deletes the rows that
+    are gone. It falls back to a full load when no hashes are stored yet.
+    Imported monsters live outside the workbook's ids and are never touched
+    by an incremental load, see import_monster_file.
+
+    Every step is timed by the profiler, see StageProfiler.
+    """
+    profiler = profiler or StageProfiler(trace_memory=False)
+    df = profiler.run("rename_monster_columns", rename_monster_columns, df)
+    hashes = profiler.run("hash_source_rows", hash_source_rows, df)
+
+    stored = read_source_hashes(db_path) if incremental else None
+    if stored is None:
+        tables = build_monster_tables(df, profiler=profiler)
+        tables.append(hashes)
+        return profiler.run("write_tables", write_tables, tables, db_path)
+
+    stored = pd.Series(stored, dtype=object)
+    changed = hashes.index[hashes["hash"].ne(stored.reindex(hashes.index))]
+    deleted = stored.index.difference(hashes.index)
+    logger.info("%d rows added or changed, %d deleted", len(changed), len(deleted))
+
+    tables = build_monster_tables(df.loc[changed].copy(), profiler=profiler) if not changed.empty else []
+    tables.append(hashes.loc[changed])
+    return profiler.run(
+        "upsert_rows",
+        upsert_rows,
+        tables,
+        ids=[*changed, *deleted],
+        table_names=[*MONSTER_TABLES, SOURCE_HASH_TABLE],
+        path=db_path
     )
 
-    df = rename_monster_columns(df)
-    df = transform_monster_size(df)
-    df = transform_monster_type(df)
-    df = transform_alignment(df)
-    df = make_col_ints(df)
-    df = create_speeds_table(df)
-    df = create_skills_table(df)
-    df = create_immunities_table(df)
-    df = create_senses_table(df)
-    df = create_saving_throws(df)
-    df = create_languages_table(df)
+def hash_source_rows(df: pd.DataFrame) -> pd.DataFrame:
+    header = tuple(df.columns)
+    values = df.astype(object).where(df.notna(), None)
+    hashes = [
+        hashlib.blake2b(repr((PARSER_VERSION, header, row)).encode(), digest_size=16).hexdigest()
+        for row in values.itertuples(index=False, name=None)
+    ]
+    table = pd.DataFrame({"hash": hashes}, index=df.index)
+    table.attrs["table_name"] = SOURCE_HASH_TABLE
+    return table
+
+def build_monster_tables(
+        df: pd.DataFrame,
+        max_workers: int | None = None,
+        profiler: StageProfiler | None = None
+) -> list[pd.DataFrame]:
+    profiler = profiler or StageProfiler(trace_memory=False)
+    for transform in (
+            transform_monster_size, transform_monster_type, transform_alignment,
+            transform_challenge_rating, make_col_ints
+    ):
+        df = profiler.run(transform.__name__, transform, df)
+    tables = profiler.run("run_table_stages", run_table_stages, df, TABLE_STAGES, max_workers=max_workers)
 
     # Good to here marker
 
     df = df.drop(
-        ["align", "font", "additional_info", "author"],
+        ["align", "font", "additional_info", "author"]
+        + [column for stage in TABLE_STAGES for column in stage.inputs],
         axis='columns'
     )
 
@@ -40,130 +324,79 @@ def read_monster_workbook():
 
     df.attrs["table_name"] = "monster"
 
-    write_df_to_db(df)
-
-def create_languages_table(df: pd.DataFrame) -> pd.DataFrame:
-    language_df = df.apply(
-        lambda x: parse_language(x['languages']),
-        axis='columns',
-        result_type='expand'
-    )
-    language_df.index = language_df.index.rename('id')
-    language_df["monster_id"] = language_df.index
-    language_df.attrs["table_name"] = "language"
-    write_df_to_db(language_df)
-    df = df.drop(columns='languages')
-    return df
-
-def parse_language(input_str: str) -> dict:
-    out_dict = {}
-    try:
-        input_str = input_str.split(",")
-    except Exception:
-        return out_dict
-
-    word_regex = r"\w+[a-zA-Z]"
-
-    for lang in input_str:
-        finder = re.search(word_regex, lang)
-        if finder:
-            out_dict[finder.group(0).lower()] = 1
-    return out_dict
-
-
-def parse_saving_throws(input_str: str) -> dict:
-    out_dict = {
-        "str": 0,
-        "dex": 0,
-        "con": 0,
-        "int": 0,
-        "wis": 0,
-        "cha": 0
-    }
-
-    try:
-        input_str = input_str.lower()
-    except AttributeError:
-        return out_dict
-    input_str = input_str.split(",")
-    for saving_throw in input_str:
-        val = saving_throw.strip()
-        if val == "temp":
-            continue
-        out_dict[val] = 1
-    return out_dict
-
-def create_saving_throws(df: pd.DataFrame) -> pd.DataFrame:
-    saving_throws = df.apply(
-        lambda x: parse_saving_throws(x["sav_throws"]),
-        axis='columns',
-        result_type='expand'
-    )
-    saving_throws.index = saving_throws.index.rename('id')
-    saving_throws["monster_id"] = saving_throws.index
-    saving_throws.attrs["table_name"] = "saving_throw"
-    write_df_to_db(saving_throws)
-    df = df.drop(columns="sav_throws")
-    return df
-
-def parse_senses(input_str: str) -> dict:
-    out_dict = {
-        "darkvision": 0,
-        "tremorsense": 0,
-        "blindsight": 0,
-        "truesight": 0
-    }
-
-    word_finder = r"\w+[a-zA-Z]"
-    digit_finder = r"\w+[0-9]"
-    senses = input_str.split(",")
-
-    for sense in senses:
-        word_group_found = re.search(word_finder, sense)
-        digit_group_found = re.search(digit_finder, sense)
-        if word_group_found:
-            word_group = word_group_found.group(0).lower()
-
-            match word_group:
-                case "darkvision" | "darkivision":
-                    key = "darkvision"
-                case "blindsight":
-                    key = "blindsight"
-                case "truesight":
-                    key = "truesight"
-                case "tremorsense":
-                    key = "tremorsense"
-                case _:
-                    continue
-            if digit_group_found:
-                out_dict[key] = int(digit_group_found.group(0))
-    return out_dict
-
-def create_senses_table(df: pd.DataFrame) -> pd.DataFrame:
-    senses_df = df.apply(
-        lambda x: parse_senses(x['senses']),
-        axis='columns',
-        result_type='expand'
-    )
-    senses_df.index = senses_df.index.rename('id')
-    senses_df["monster_id"] = senses_df.index
-    senses_df.attrs["table_name"] = "sense"
-    write_df_to_db(senses_df)
-    df = df.drop(columns="senses")
-    return df
-
-def create_immunities_table(df: pd.DataFrame) -> pd.DataFrame:
-    immunities_df = df.apply(
-        lambda x: generate_immunities_table(x['wri']),
-        axis='columns',
-        result_type='expand'
-    )
-    immunities_df.index = immunities_df.index.rename('id')
-    immunities_df['monster_id'] = immunities_df.index
-    immunities_df.attrs["table_name"] = "damage_mod"
-    write_df_to_db(immunities_df)
-    df = df.drop(columns="wri")
-    return df
+    tables.append(df)
+    return tables
+
+def run_table_stages(
+        df: pd.DataFrame,
+        stages: list[Stage],
+        max_workers: int | None = None,
+        min_parallel_rows: int = PARALLEL_MIN_ROWS
+) -> list[pd.DataFrame]:
+    """
+    Build the table of every stage, in stage order. The stages are
+    independent, so on big frames they run at the same time on a process
+    pool, each worker is sent only the columns its stage reads. Writing the
+    tables is left to the caller, so there is still a single writer.
+    """
+    max_workers = max_workers or min(len(stages), os.cpu_count() or 1)
+    if max_workers == 1 or len(df) < min_parallel_rows:
+        tables = [stage.build(df[list(stage.inputs)]) for stage in stages]
+        _log_parse_stats(tables)
+        return tables
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(stage.build, df[list(stage.inputs)]) for stage in stages]
+        tables = [future.result() for future in futures]
+    _log_parse_stats(tables)
+    return tables
+
+def _log_parse_stats(tables: list[pd.DataFrame]) -> None:
+    for table in tables:
+        if stats := table.attrs.get("parse_stats"):
+            logger.info(
+                "%s: parsed %d distinct %s strings for %d rows, %.0f%% hit ratio within the call",
+                table.attrs["table_name"], stats.unique, stats.column, stats.rows, stats.hit_ratio * 100
+            )
+
+@deduplicated("languages")
+def build_languages_table(df: pd.DataFrame) -> pd.DataFrame:
+    items = _split_items(df["languages"])
+    languages = items.str.extract(WORD_PATTERN, expand=False).str.lower().dropna()
+    # One column per language, in the order they first appear in the sheet
+    language_df = _pivot_last(languages, 1.0, df.index, list(pd.unique(languages)), float("nan"))
+    return _as_table(language_df, "language")
+
+@deduplicated("sav_throws")
+def build_saving_throws_table(df: pd.DataFrame) -> pd.DataFrame:
+    saving_throws = _split_items(df["sav_throws"]).str.lower().str.strip()
+    saving_throws = saving_throws[saving_throws != "temp"]
+    columns = list(SAVING_THROWS)
+    unknown = [value for value in pd.unique(saving_throws) if value not in columns]
+    saving_throws_df = _pivot_last(saving_throws, 1, df.index, columns, 0)
+    if unknown:
+        # Unexpected abbreviations still get a column, like the row parser did
+        extra = _pivot_last(saving_throws, 1.0, df.index, unknown, float("nan"))
+        saving_throws_df = pd.concat([saving_throws_df, extra], axis='columns')
+    return _as_table(saving_throws_df, "saving_throw")
+
+@deduplicated("senses")
+def build_senses_table(df: pd.DataFrame) -> pd.DataFrame:
+    items = _split_items(df["senses"])
+    senses = items.str.extract(WORD_PATTERN, expand=False).str.lower().map(SENSE_NAMES)
+    distances = items.str.extract(DIGIT_PATTERN, expand=False)
+    found = senses.notna() & distances.notna()
+    senses_df = _pivot_last(senses[found], distances[found].astype("int64"), df.index, SENSE_COLUMNS, 0)
+    return _as_table(senses_df, "sense")
+
+@deduplicated("wri")
+def build_immunities_table(df: pd.DataFrame) -> pd.DataFrame:
+    items = _split_items(df["wri"]).str.lower().str.strip()
+    damage_types = items.str.replace(DAMAGE_MOD_PATTERN, "", regex=True)
+    levels = items.str.extract(DAMAGE_MOD_PATTERN, expand=False).map(DAMAGE_MOD_LEVELS)
+    found = damage_types.isin(DAMAGE_MOD_COLUMNS) & levels.notna()
+    immunities_df = _pivot_last(damage_types[found], levels[found], df.index, DAMAGE_MOD_COLUMNS, None)
+    return _as_table(immunities_df, "damage_mod")
 
 def make_col_ints(df: pd.DataFrame) -> pd.DataFrame:
     integer_cols = {
@@ -186,166 +419,26 @@ def rename_monster_columns(df: pd.DataFrame) -> pd.DataFrame:
         )
     return df
 
-def generate_immunities_table(input_str: str) -> dict:
-    output_dict = {
-        "cold": None,
-        "nonadamantine": None,
-        "spell": None,
-        "acid": None,
-        "frightened grappled": None,
-        "stunned": None,
-        "charmed": None,
-        "exhaustion": None,
-        "thunder": None,
-        "lightining": None,
-        "grappled": None,
-        "frightened": None,
-        "unconscious": None,
-        "paralyzed": None,
-        "nonsilvered": None,
-        "trainde": None,
-        "deafened": None,
-        "necrotic": None,
-        "prone": None,
-        "psychic": None,
-        "darkness": None,
-        "fire": None,
-        "force": None,
-        "magicalpiercing": None,
-        "poisoned": None,
-        "blinded": None,
-        "slashing": None,
-        "temp": None,
-        "paralyezd": None,
-        "poison": None,
-        "nonsilvered ": None,
-        "petrified": None,
-        "magical": None,
-        "pyschic": None,
-        "exhuastion": None,
-        "bludgeoning": None,
-        "trained": None,
-        "lightning": None,
-        "piercing": None,
-        "radiant": None,
-        "nonmagical": None,
-    }
-
-    try:
-        list_of_immuns = input_str.split(",")
-    except Exception:
-        return output_dict
-
-    for damage_type in list_of_immuns:
-        damage_type = damage_type.lower().strip()
-        mods_regex = r"res|immun|weak|immmun|immu|immmu"
-        try:
-            subd = re.sub(mods_regex, "", damage_type)
-            matching = re.search(mods_regex, damage_type)
-            if subd in output_dict:
-                match matching.group(0):
-                    case 'res':
-                        output_dict[subd] = 'resistance'
-                    case 'immun' | 'immmun' | 'immu' | 'immmu':
-                        output_dict[subd] = 'immunity'
-                    case 'weak':
-                        output_dict[subd] = 'weakness'
-        except Exception:
-            continue
-
-    return output_dict
-
-def generate_skills_table(input_str: str) -> dict:
-    output_dict = {
-        "intimidation": 0,
-        "perception": 0,
-        "investigation": 0,
-        "acrobatics": 0,
-        "animal_handling": 0,
-        "religion": 0,
-        "insight": 0,
-        "survival": 0,
-        "arcana": 0,
-        "medicine": 0,
-        "history": 0,
-        "sleight_of_hand": 0,
-        "innate_spellcasting": 0,
-        "athletics": 0,
-        "death_burst": 0,
-        "nature": 0,
-        "persuasion": 0,
-        "stealth": 0,
-        "performance": 0,
-        "deception": 0,
-    }
-
-    try:
-        skill_list = input_str.split(",")
-    except AttributeError:
-        return output_dict
-    for skill in skill_list:
-        if skill.lower().strip() in output_dict:
-            if skill.lower().strip() == "intimation":
-                skill = "intimidation"
-            output_dict[skill.lower().strip().replace(" ", "_")] = 1
-    return output_dict
-
-
-def create_skills_table(df: pd.DataFrame) -> pd.DataFrame:
-    skill_set = set()
-    for skills in df['skills']:
-        try:
-            skill_list = skills.split(',')
-        except Exception:
-            continue
-        for skill in skill_list:
-            skill_set.add(skill.strip().lower())
-    skill_set.remove('temp')
-    skills_table = df.apply(
-        lambda x: generate_skills_table(x["skills"]), axis='columns', result_type='expand'
-    )
-    skills_table["monster_id"] = skills_table.index
-    skills_table.index = skills_table.index.rename("id")
-    skills_table.attrs["table_name"] = "skills"
-    write_df_to_db(skills_table)
-    df = df.drop(columns='skills')
-    return df
-
-def transform_speeds(input_str: str) -> dict:
-    out_dict = {
-        "walk": 0,
-        "swim": 0,
-        "fly": 0,
-        "climb": 0,
-        "burrow": 0
-    }
-    try:
-        speeds_list = input_str.split(",")
-    except AttributeError:
-        return out_dict
-
-    word_finder = r"\w+[a-zA-Z]"
-    digit_finder = r"\w+[0-9]"
-    for speed_item in speeds_list:
-        speed_finder = re.search(word_finder, speed_item)
-        speed_type = "walk" if not speed_finder else speed_finder.group(0)
-        if speed_type not in {'walk', 'swim', 'fly', 'climb', 'burrow'}:
-            continue
-        digit_found = re.search(digit_finder, speed_item)
-        if digit_found:
-            out_dict[speed_type] = int(digit_found.group(0))
-        else:
-            out_dict[speed_type] = 0
-    return out_dict
-
-
-def create_speeds_table(df: pd.DataFrame) -> pd.DataFrame:
-    speeds_table = df.apply(lambda x: transform_speeds(x["speeds"]), axis='columns', result_type='expand')
-    speeds_table.index = speeds_table.index.rename("id")
-    speeds_table["monster_id"] = speeds_table.index
-    speeds_table.attrs["table_name"] = "speed"
-    write_df_to_db(speeds_table)
-    df = df.drop(columns='speeds')
+@deduplicated("skills")
+def build_skills_table(df: pd.DataFrame) -> pd.DataFrame:
+    # Only single word skills match, 'animal handling' is never a key
+    skills = _split_items(df["skills"]).str.lower().str.strip()
+    skills = skills[skills.isin(SKILL_COLUMNS)]
+    skills_table = _pivot_last(skills, 1, df.index, SKILL_COLUMNS, 0)
+    return _as_table(skills_table, "skills")
+
+@deduplicated("speeds")
+def build_speeds_table(df: pd.DataFrame) -> pd.DataFrame:
+    items = _split_items(df["speeds"])
+    speed_types = items.str.extract(WORD_PATTERN, expand=False).fillna("walk")
+    values = items.str.extract(DIGIT_PATTERN, expand=False).fillna("0").astype("int64")
+    found = speed_types.isin(SPEED_COLUMNS)
+    speeds_table = _pivot_last(speed_types[found], values[found], df.index, SPEED_COLUMNS, 0)
+    return _as_table(speeds_table, "speed")
+
+def transform_challenge_rating(df: pd.DataFrame) -> pd.DataFrame:
+    # Templates hold 'VARIES' or 'TEMP' instead of a rating
+    df["cr"] = pd.to_numeric(df["cr"], errors="coerce")
     return df
 
 def transform_int_val(input_str: str) -> int:
@@ -482,18 +575,51 @@ def transform_monster_type(df: pd.DataFrame) -> pd.DataFrame:
 
     return df
 
-
 def transform_monster_size(df: pd.DataFrame) -> pd.DataFrame:
     df.monster_size = df.monster_size.apply(str.lower)
     df = df.loc[df.monster_size != 'varies']  # Drop these template items
     return df
 
 
+TABLE_STAGES = [
+    Stage("speed", ("speeds",), build_speeds_table),
+    Stage("skills", ("skills",), build_skills_table),
+    Stage("damage_mod", ("wri",), build_immunities_table),
+    Stage("sense", ("senses",), build_senses_table),
+    Stage("saving_throw", ("sav_throws",), build_saving_throws_table),
+    Stage("language", ("languages",), build_languages_table),
+]
+
 def main():
-    read_monster_workbook()
+    parser = argparse.ArgumentParser(description="Load the monster workbook into the bestiary database")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only write the monsters that changed since the last load"
+    )
+    parser.add_argument("--report", metavar="PATH", help="write a JSON run report of every stage to PATH")
+    parser.add_argument(
+        "--profile", metavar="STAGE",
+        help="run STAGE under cProfile, the stats are dumped next to the report"
+    )
+    args = parser.parse_args()
+
+    profile_path = None
+    if args.profile:
+        report_dir = os.path.dirname(os.path.abspath(args.report or "."))
+        profile_path = os.path.join(report_dir, f"{args.profile}.prof")
+    profiler = StageProfiler(trace_memory=args.report is not None, profile_stage=args.profile, profile_path=profile_path)
+
+    read_monster_workbook(incremental=args.incremental, profiler=profiler)
+
+    report = profiler.report()
+    for stage in report.stages:
+        logger.info("%s: %.1f ms", stage.name, stage.wall_seconds * 1000)
+    if args.report:
+        report.write(args.report)
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     pd.set_option('display.max_colwidth', None)
     pd.set_option('display.max_columns', None)
     pd.set_option('display.max_rows', None)
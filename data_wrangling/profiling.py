@@ -0,0 +1,152 @@
+import cProfile
+import datetime
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Callable, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T")
+
+
+@dataclass
+class StageReport:
+    name: str
+    wall_seconds: float
+    cpu_seconds: float
+    peak_memory_bytes: int | None
+    rows_in: int | None
+    rows_out: int | None
+    # Row count of every table a stage returns, by table name
+    tables: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def rows_dropped(self) -> int | None:
+        if self.rows_in is None or self.rows_out is None:
+            return None
+        return self.rows_in - self.rows_out
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "rows_dropped": self.rows_dropped}
+
+
+@dataclass
+class RunReport:
+    started_at: str
+    wall_seconds: float
+    cpu_seconds: float
+    stages: list[StageReport]
+    profiled_stage: str | None = None
+    profile_path: str | None = None
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "stages": [stage.to_dict() for stage in self.stages]}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as report_file:
+            report_file.write(self.to_json())
+
+
+def _cpu_seconds() -> float:
+    # Includes worker processes once they have been joined, so stages run
+    # on a process pool are not reported as nearly free
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def _row_count(value) -> int | None:
+    return len(value) if isinstance(value, pd.DataFrame) else None
+
+def _table_rows(value) -> dict[str, int]:
+    if not isinstance(value, (list, tuple)):
+        return {}
+    return {
+        table.attrs.get("table_name", str(i)): len(table)
+        for i, table in enumerate(value) if isinstance(table, pd.DataFrame)
+    }
+
+
+class StageProfiler:
+    """
+    Times every ETL stage run through it: wall and CPU time, the
+    tracemalloc peak above what was allocated when the stage started, and
+    the rows going in and out. The stage named profile_stage is also run
+    under cProfile and its stats dumped to profile_path.
+
+    tracemalloc slows pandas down noticeably, so memory is only traced
+    when trace_memory is set.
+    """
+
+    def __init__(
+            self,
+            trace_memory: bool = True,
+            profile_stage: str | None = None,
+            profile_path: str | None = None
+    ):
+        if profile_stage is not None and profile_path is None:
+            raise ValueError("profile_stage needs a profile_path to dump its stats to")
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile_path = profile_path
+        self.stages = []
+        self._started_at = datetime.datetime.now(datetime.timezone.utc)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+
+    def run(self, name: str, function: Callable[..., T], *args, **kwargs) -> T:
+        """
+        function(*args, **kwargs) as the stage called name, the rows in are
+        counted on the first argument
+        """
+        tracing = self.trace_memory
+        started_tracing = tracing and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_start = tracemalloc.get_traced_memory()[0]
+
+        profile = cProfile.Profile() if name == self.profile_stage else None
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        if profile:
+            profile.enable()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            if profile:
+                profile.disable()
+                os.makedirs(os.path.dirname(os.path.abspath(self.profile_path)), exist_ok=True)
+                profile.dump_stats(self.profile_path)
+            wall_seconds = time.perf_counter() - wall_start
+            cpu_seconds = _cpu_seconds() - cpu_start
+            peak = tracemalloc.get_traced_memory()[1] - memory_start if tracing else None
+            if started_tracing:
+                tracemalloc.stop()
+
+        self.stages.append(StageReport(
+            name=name,
+            wall_seconds=wall_seconds,
+            cpu_seconds=cpu_seconds,
+            peak_memory_bytes=peak,
+            rows_in=_row_count(args[0]) if args else None,
+            rows_out=_row_count(result),
+            tables=_table_rows(result)
+        ))
+        return result
+
+    def report(self) -> RunReport:
+        return RunReport(
+            started_at=self._started_at.isoformat(),
+            wall_seconds=time.perf_counter() - self._wall_start,
+            cpu_seconds=_cpu_seconds() - self._cpu_start,
+            stages=list(self.stages),
+            profiled_stage=self.profile_stage,
+            profile_path=self.profile_path
+        )
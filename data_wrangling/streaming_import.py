@@ -0,0 +1,107 @@
+import argparse
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+import pandas as pd
+
+from db import upsert_rows, next_monster_id, MONSTER_DB_PATH, IMPORTED_ID_START
+
+from .data_munging import rename_monster_columns, build_monster_tables
+
+logger = logging.getLogger(__name__)
+
+CSV_EXTENSIONS = {".csv"}
+JSONL_EXTENSIONS = {".jsonl", ".ndjson"}
+
+
+@dataclass
+class ImportProgress:
+    chunks: int = 0
+    rows_read: int = 0
+    rows_written: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+
+def _log_progress(progress: ImportProgress) -> None:
+    logger.info(
+        "Imported chunk %d, %d rows read, %d written, %.0f rows/s",
+        progress.chunks, progress.rows_read, progress.rows_written, progress.rows_per_second
+    )
+
+def read_monster_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    The rows of a CSV or JSON lines export, with the workbook's columns,
+    chunk_size rows at a time and as strings like the workbook is read
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in CSV_EXTENSIONS:
+        reader = pd.read_csv(path, dtype="string", chunksize=chunk_size)
+    elif extension in JSONL_EXTENSIONS:
+        reader = pd.read_json(path, lines=True, dtype="string", chunksize=chunk_size)
+    else:
+        raise ValueError(f"Can only import {sorted(CSV_EXTENSIONS | JSONL_EXTENSIONS)} files, not {path}")
+
+    with reader:
+        yield from reader
+
+def import_monster_file(
+        path: str,
+        chunk_size: int = 50_000,
+        db_path: str = MONSTER_DB_PATH,
+        max_workers: int | None = None,
+        progress: Callable[[ImportProgress], None] = _log_progress
+) -> ImportProgress:
+    """
+    Append every monster of a CSV or JSON lines export to an existing
+    bestiary. Only one chunk is in memory at a time, it goes through the
+    same transforms and table stages as the workbook and is committed, and
+    the generation bumped, on its own. The monsters get ids after the
+    highest imported one, from IMPORTED_ID_START up where workbook rows
+    never reach.
+
+    Imported monsters have no source row hash, so an incremental workbook
+    load leaves them alone, while a full load replaces them with the
+    workbook's monsters.
+    """
+    start = time.perf_counter()
+    first_id = next_monster_id(db_path, start=IMPORTED_ID_START)
+    report = ImportProgress()
+
+    for chunk in read_monster_chunks(path, chunk_size):
+        chunk.index = pd.RangeIndex(first_id + report.rows_read, first_id + report.rows_read + len(chunk))
+        report.rows_read += len(chunk)
+
+        tables = build_monster_tables(rename_monster_columns(chunk), max_workers=max_workers)
+        upsert_rows(tables, ids=[], table_names=[], path=db_path)
+
+        report.chunks += 1
+        report.rows_written += len(tables[-1])
+        report.seconds = time.perf_counter() - start
+        progress(report)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append a CSV or JSON lines bestiary export to the database")
+    parser.add_argument("path")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    report = import_monster_file(args.path, chunk_size=args.chunk_size)
+    logger.info(
+        "Imported %d of %d rows in %.1f s, %.0f rows/s",
+        report.rows_written, report.rows_read, report.seconds, report.rows_per_second
+    )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
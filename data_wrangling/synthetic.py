@@ -0,0 +1,110 @@
+import os
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from .data_munging import read_workbook_sheet, MONSTER_WORKBOOK_PATH, MONSTER_SHEET
+
+# Comma separated columns, generated item by item so there are more
+# distinct strings than the official sheet has
+LIST_COLUMNS = ["Speeds", "Sav. Throws", "Skills", "WRI", "Senses", "Languages", "Additional"]
+
+
+@dataclass
+class _ItemModel:
+    na_rate: float
+    counts: np.ndarray
+    count_weights: np.ndarray
+    items: np.ndarray
+    item_weights: np.ndarray
+
+    @classmethod
+    def fit(cls, column: pd.Series) -> "_ItemModel":
+        lists = column.dropna().str.split(",")
+        counts = lists.str.len().value_counts(normalize=True)
+        items = lists.explode().str.strip()
+        items = items[items != ""].value_counts(normalize=True)
+        return cls(
+            na_rate=float(column.isna().mean()),
+            counts=counts.index.to_numpy(),
+            count_weights=counts.to_numpy(),
+            items=items.index.to_numpy(dtype=object),
+            item_weights=items.to_numpy()
+        )
+
+    def sample(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        counts = rng.choice(self.counts, p=self.count_weights, size=n)
+        items = rng.choice(self.items, p=self.item_weights, size=int(counts.sum()))
+        return np.array([", ".join(row) for row in np.split(items, np.cumsum(counts)[:-1])], dtype=object)
+
+
+class BestiaryGenerator:
+    """
+    Synthetic monsters in the column layout of the "Official Stats" sheet,
+    as read_workbook_sheet returns it.
+
+    The scalar columns of a monster (size, type, alignment, armor class,
+    hit points, ability scores, rating...) are copied together from one
+    random official monster, so they stay consistent with each other. The
+    comma separated columns are drawn item by item from how often each
+    item and list length occur in the sheet. Each of those columns draws
+    from a pool of strings growing with the square root of the row count,
+    homebrew content repeats its phrasing much like the official books.
+    """
+
+    def __init__(self, source: pd.DataFrame | None = None, seed: int = 0):
+        self.source = source if source is not None else read_workbook_sheet(MONSTER_WORKBOOK_PATH, MONSTER_SHEET)
+        self.rng = np.random.default_rng(seed)
+        self.models = {column: _ItemModel.fit(self.source[column]) for column in LIST_COLUMNS}
+
+    def pool_size(self, rows: int) -> int:
+        return max(64, int(8 * rows ** 0.5))
+
+    def chunks(self, rows: int, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        pools = {
+            column: model.sample(self.rng, self.pool_size(rows))
+            for column, model in self.models.items()
+        }
+        scalar_columns = [column for column in self.source.columns if column not in LIST_COLUMNS]
+        source_rows = self.source[scalar_columns].astype(object).where(self.source[scalar_columns].notna(), None)
+
+        for start in range(0, rows, chunk_size):
+            n = min(chunk_size, rows - start)
+            picked = source_rows.iloc[self.rng.integers(len(source_rows), size=n)].reset_index(drop=True)
+            chunk = {column: picked[column].to_numpy() for column in scalar_columns}
+            chunk["Name"] = [f"{name} {start + i}" for i, name in enumerate(chunk["Name"])]
+            for column, model in self.models.items():
+                values = pools[column][self.rng.integers(len(pools[column]), size=n)]
+                values[self.rng.random(n) < model.na_rate] = None
+                chunk[column] = values
+            yield pd.DataFrame(chunk, columns=self.source.columns, dtype="string").set_axis(
+                pd.RangeIndex(start, start + n)
+            )
+
+    def frame(self, rows: int) -> pd.DataFrame:
+        return pd.concat(self.chunks(rows), ignore_index=False)
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int = 0, chunk_size: int = 100_000) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    for i, chunk in enumerate(BestiaryGenerator(seed=seed).chunks(rows, chunk_size)):
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+
+def write_synthetic_workbook(path: str, rows: int, seed: int = 0, chunk_size: int = 100_000) -> None:
+    """
+    An .xlsx with the synthetic monsters on an "Official Stats" sheet,
+    missing values are written as 'None' like the official sheet does
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(MONSTER_SHEET)
+    header_written = False
+    for chunk in BestiaryGenerator(seed=seed).chunks(rows, chunk_size):
+        if not header_written:
+            sheet.append(list(chunk.columns))
+            header_written = True
+        for row in chunk.fillna("None").itertuples(index=False, name=None):
+            sheet.append(list(row))
+    workbook.save(path)
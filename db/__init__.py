@@ -1 +1,4 @@
-from .dndb import *
\ No newline at end of file
+from .pool import *
+from .dndb import *
+from .query_registry import *
+from .migrate import *
\ No newline at end of file
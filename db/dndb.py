@@ -1,35 +1,286 @@
+import itertools
+import json
+import logging
 import os
 import sqlite3
+import time
+from typing import Iterable
 
 import pandas as pd
 
-from util import ROOT_DIR
+from .pool import MONSTER_DB_PATH, dict_factory, get_pool
+from .migrate import MIGRATIONS_DIR, apply_migrations
 
-def get_connection() -> sqlite3.Connection:
+STAGING_SUFFIX = ".staging"
+# Hash of the source row every monster was parsed from, see upsert_rows
+SOURCE_HASH_TABLE = "source_hash"
+# Ids of imported monsters start here. Workbook rows are keyed by their
+# row position and a sheet has at most 1,048,576 rows, so a growing
+# workbook never reaches them. Still below 2 ** 31, ids are stored as int32
+IMPORTED_ID_START = 1 << 30
+
+logger = logging.getLogger(__name__)
 
-    con = sqlite3.connect(os.path.join(ROOT_DIR, "db/monster.db"))
+def get_connection() -> sqlite3.Connection:
 
-    def dict_factory(cursor, row):
-        fields = [column[0] for column in cursor.description]
-        return {key: value for key, value in zip(fields, row)}
+    con = sqlite3.connect(MONSTER_DB_PATH)
 
     con.row_factory = dict_factory
 
     return con
 
-def write_df_to_db(df: pd.DataFrame) -> None:
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+def _sqlite_type(column: pd.Series) -> str:
+    # The same affinities pandas to_sql picks, so migrations see the schema
+    # they were written against
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_integer_dtype(column):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(column):
+        return "REAL"
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return "TIMESTAMP"
+    return "TEXT"
 
-    con = get_connection()
+def _python_values(column: pd.Series | pd.Index) -> list:
+    # Object cast turns numpy scalars into python ones, missing values become NULL
+    values = column.astype(object)
+    return [None if pd.isna(value) else value for value in values]
 
-    df.to_sql(
-        name=df.attrs.get("table_name"),
-        con=con,
-        if_exists='replace'
+def _table_columns(df: pd.DataFrame) -> list[tuple[str, str]]:
+    index_label = df.index.name or "index"
+    columns = [(index_label, _sqlite_type(df.index.to_series()))]
+    return columns + [(column, _sqlite_type(df[column])) for column in df.columns]
+
+def _insert_rows(con: sqlite3.Connection, df: pd.DataFrame, chunk_size: int) -> None:
+    names = ", ".join(_quote(column) for column, _ in _table_columns(df))
+    statement = (
+        f"INSERT INTO {_quote(df.attrs['table_name'])} ({names}) "
+        f"VALUES ({', '.join('?' * (len(df.columns) + 1))})"
     )
+    rows = zip(_python_values(df.index), *(_python_values(df[column]) for column in df.columns))
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        con.executemany(statement, chunk)
+
+def _insert_table(con: sqlite3.Connection, df: pd.DataFrame, chunk_size: int) -> None:
+    table = df.attrs["table_name"]
+    columns = _table_columns(df)
+    index_label = columns[0][0]
+
+    con.execute(f"CREATE TABLE {_quote(table)} ({', '.join(f'{_quote(c)} {t}' for c, t in columns)})")
+    con.execute(f"CREATE INDEX {_quote(f'ix_{table}_{index_label}')} ON {_quote(table)} ({_quote(index_label)})")
+    _insert_rows(con, df, chunk_size)
+
+def _remove_database(path: str) -> None:
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+def _fsync(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _file_generation(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return con.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        con.close()
+
+def _copy_into(staging: str, path: str, timeout: float) -> None:
+    # Renaming over a live WAL database would leave its -wal and -shm files
+    # next to the new file, and the next connection would replay the old
+    # database's frames onto it. The backup API instead writes the new
+    # pages through the live database's own journal in one transaction, so
+    # open readers keep their snapshot and later ones see the new bestiary
+    source = sqlite3.connect(f"file:{staging}?mode=ro", uri=True)
+    target = sqlite3.connect(path, timeout=timeout)
+    try:
+        target.execute("PRAGMA journal_mode=WAL")
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+def write_tables(
+        tables: Iterable[pd.DataFrame],
+        path: str = MONSTER_DB_PATH,
+        chunk_size: int = 10_000,
+        migrations_dir: str = MIGRATIONS_DIR,
+        timeout: float = 5.0
+) -> int:
+    """
+    Replace the database at path with the given tables, named by their
+    table_name attr, and return the new generation.
+
+    Everything is loaded into a staging file next to the database in one
+    transaction with syncing off and migrated. The staging file is then
+    copied into the live database with the backup API, in a single write
+    transaction, or renamed into place when there is no database yet.
+    Readers see either the old or the new bestiary, never a partly written
+    one. A failed load leaves the database untouched. timeout is how long
+    to wait for another writer to release the database.
+    """
+    start = time.perf_counter()
+    staging = path + STAGING_SUFFIX
+    _remove_database(staging)
+
+    con = sqlite3.connect(staging, isolation_level=None)
+    try:
+        # Nothing reads the staging file, a crash mid load just means
+        # starting over, so there is no need to sync or keep a durable journal
+        con.execute("PRAGMA journal_mode=MEMORY")
+        con.execute("PRAGMA synchronous=OFF")
+        con.execute("PRAGMA temp_store=MEMORY")
+        con.execute("PRAGMA cache_size=-65536")
 
-    con.commit()
+        con.execute("BEGIN")
+        for df in tables:
+            _insert_table(con, df, chunk_size)
+        con.execute("COMMIT")
+
+        apply_migrations(con, migrations_dir=migrations_dir)
+        generation = _file_generation(path) + 1
+        con.execute(f"PRAGMA user_version={generation}")
+        con.execute("PRAGMA journal_mode=WAL")
+    except BaseException:
+        con.close()
+        _remove_database(staging)
+        raise
     con.close()
 
+    if os.path.exists(path):
+        try:
+            _copy_into(staging, path, timeout)
+        finally:
+            _remove_database(staging)
+    else:
+        # Journal files left behind by a deleted database would be applied
+        # to the new one
+        _remove_database(path)
+        _fsync(staging)
+        os.replace(staging, path)
+        _fsync(os.path.dirname(os.path.abspath(path)))
+
+    logger.info("Wrote generation %d to %s in %.1f ms", generation, path, (time.perf_counter() - start) * 1000)
+    return generation
+
+def next_monster_id(path: str = MONSTER_DB_PATH, start: int = 0) -> int:
+    """
+    The id after the highest one from start upwards, start if there is none
+    """
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return con.execute(
+            "SELECT coalesce(max(id) + 1, :start) FROM monster WHERE id >= :start", {"start": start}
+        ).fetchone()[0]
+    finally:
+        con.close()
+
+def read_source_hashes(path: str = MONSTER_DB_PATH) -> dict[int, str] | None:
+    """
+    Source row hash of every monster id, None if the database has none yet
+    """
+    if not os.path.exists(path):
+        return None
+    con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if not con.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (SOURCE_HASH_TABLE,)
+        ).fetchone():
+            return None
+        return dict(con.execute(f"SELECT id, hash FROM {SOURCE_HASH_TABLE}"))
+    finally:
+        con.close()
+
+def _check_hashed(con: sqlite3.Connection, ids: list[int]) -> None:
+    unhashed = [row[0] for row in con.execute(
+        f"SELECT id FROM monster WHERE id IN (SELECT value FROM json_each(?)) "
+        f"AND id NOT IN (SELECT id FROM {SOURCE_HASH_TABLE}) ORDER BY id LIMIT 10",
+        (json.dumps(ids),)
+    )]
+    if unhashed:
+        raise ValueError(f"Refusing to overwrite monsters without a source hash, ids {unhashed}")
+
+def upsert_rows(
+        tables: Iterable[pd.DataFrame],
+        ids: Iterable[int],
+        table_names: Iterable[str],
+        path: str = MONSTER_DB_PATH,
+        chunk_size: int = 10_000
+) -> int:
+    """
+    Delete the rows of ids from every table in table_names, insert the
+    given frames in their place and bump the generation, all in one
+    transaction. Columns a frame has and its table lacks are added first.
+    Returns the generation, which is left as it was when there is nothing
+    to write.
+
+    An upsert of source hashes comes from the workbook, it raises
+    ValueError rather than replace a monster that has no source hash,
+    such as an imported one.
+    """
+    tables = [df for df in tables if not df.empty]
+    ids = sorted({int(id) for id in ids})
+    table_names = list(table_names)
+    if not ids and not tables:
+        return _file_generation(path)
+
+    start = time.perf_counter()
+    con = sqlite3.connect(path, isolation_level=None)
+    try:
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute("BEGIN IMMEDIATE")
+        if SOURCE_HASH_TABLE in table_names:
+            _check_hashed(con, ids)
+        for table in table_names:
+            con.execute(f"DELETE FROM {_quote(table)} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))
+        for df in tables:
+            table = df.attrs["table_name"]
+            existing = {row[1] for row in con.execute(f"PRAGMA table_info({_quote(table)})")}
+            for column, sqlite_type in _table_columns(df):
+                if column not in existing:
+                    con.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(column)} {sqlite_type}")
+            _insert_rows(con, df, chunk_size)
+        generation = con.execute("PRAGMA user_version").fetchone()[0] + 1
+        con.execute(f"PRAGMA user_version={generation}")
+        con.execute("COMMIT")
+    except BaseException:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        raise
+    finally:
+        con.close()
+
+    logger.info(
+        "Upserted %d ids as generation %d of %s in %.1f ms",
+        len(ids), generation, path, (time.perf_counter() - start) * 1000
+    )
+    return generation
+
+def get_generation() -> int:
+    """
+    Generation of the monster data, bumped every time the ETL rewrites it.
+    Stored in the sqlite user_version header field
+    """
+    with get_pool().connection() as con:
+        return con.execute("PRAGMA user_version").fetchone()["user_version"]
+
+def bump_generation() -> int:
+    with get_pool(read_only=False).connection() as con:
+        generation = con.execute("PRAGMA user_version").fetchone()["user_version"] + 1
+        con.execute(f"PRAGMA user_version={generation}")
+        con.commit()
+    return generation
+
 
 def get_monster(id: int) -> None:
     conn = get_connection()
@@ -0,0 +1,65 @@
+import os
+import sqlite3
+
+from util import ROOT_DIR
+
+MIGRATIONS_DIR = os.path.join(ROOT_DIR, "db/migrations")
+
+
+def available_migrations(migrations_dir: str = MIGRATIONS_DIR) -> list[tuple[int, str]]:
+    """
+    (version, file name) of every migration, files are named <version>_<name>.sql
+    """
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        version, _, rest = filename.partition("_")
+        if rest.endswith(".sql") and version.isdigit():
+            migrations.append((int(version), filename))
+    return sorted(migrations)
+
+def applied_migrations(con: sqlite3.Connection) -> set[int]:
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+        "applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    con.commit()
+    cur = con.cursor()
+    cur.row_factory = None
+    versions = {version for (version,) in cur.execute("SELECT version FROM schema_migrations")}
+    cur.close()
+    return versions
+
+def apply_migrations(con: sqlite3.Connection, migrations_dir: str = MIGRATIONS_DIR) -> list[str]:
+    """
+    Apply every pending migration, each in its own transaction, then
+    refresh the planner statistics with ANALYZE. write_tables runs them on
+    every freshly built database before it goes live.
+    """
+    applied = applied_migrations(con)
+
+    newly_applied = []
+    for version, filename in available_migrations(migrations_dir):
+        if version in applied:
+            continue
+        with open(os.path.join(migrations_dir, filename), "r") as sql_file:
+            script = sql_file.read()
+        # executescript commits on its own, so the whole migration and its
+        # bookkeeping row are wrapped in one explicit transaction
+        name = filename.replace("'", "''")
+        try:
+            con.executescript(
+                f"BEGIN;\n{script}\n"
+                f"INSERT INTO schema_migrations (version, name) VALUES ({version}, '{name}');\n"
+                "COMMIT;"
+            )
+        except sqlite3.Error:
+            if con.in_transaction:
+                con.rollback()
+            raise
+        newly_applied.append(filename)
+
+    if newly_applied:
+        con.execute("ANALYZE")
+        con.commit()
+    return newly_applied
@@ -0,0 +1,118 @@
+-- Replace the pandas generated schema with typed tables, primary keys,
+-- foreign keys and indexes on every join and filter column
+
+CREATE TABLE monster_new (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    size TEXT,
+    type TEXT,
+    ac INTEGER,
+    hp INTEGER,
+    str INTEGER,
+    dex INTEGER,
+    con INTEGER,
+    int INTEGER,
+    wis INTEGER,
+    cha INTEGER,
+    cr REAL,
+    additional TEXT,
+    tags TEXT,
+    lawfulness TEXT,
+    goodness TEXT
+);
+INSERT INTO monster_new
+SELECT
+    id, name, size, type, ac, hp, str, dex, con, int, wis, cha,
+    -- Template rows hold 'VARIES' or 'TEMP' instead of a rating
+    CASE WHEN cr GLOB '[0-9]*' THEN CAST(cr AS REAL) END,
+    additional, tags, lawfulness, goodness
+FROM monster;
+DROP TABLE monster;
+ALTER TABLE monster_new RENAME TO monster;
+CREATE INDEX ix_monster_cr ON monster (cr);
+CREATE INDEX ix_monster_type ON monster (type);
+CREATE INDEX ix_monster_size ON monster (size);
+
+CREATE TABLE speed_new (
+    id INTEGER PRIMARY KEY,
+    walk INTEGER NOT NULL DEFAULT 0,
+    swim INTEGER NOT NULL DEFAULT 0,
+    fly INTEGER NOT NULL DEFAULT 0,
+    climb INTEGER NOT NULL DEFAULT 0,
+    burrow INTEGER NOT NULL DEFAULT 0,
+    monster_id INTEGER NOT NULL REFERENCES monster (id) ON DELETE CASCADE
+);
+INSERT INTO speed_new (id, walk, swim, fly, climb, burrow, monster_id)
+SELECT id, walk, swim, fly, climb, burrow, monster_id
+FROM speed;
+DROP TABLE speed;
+ALTER TABLE speed_new RENAME TO speed;
+CREATE UNIQUE INDEX ix_speed_monster_id ON speed (monster_id);
+
+CREATE TABLE skills_new (
+    id INTEGER PRIMARY KEY,
+    intimidation INTEGER NOT NULL DEFAULT 0,
+    perception INTEGER NOT NULL DEFAULT 0,
+    investigation INTEGER NOT NULL DEFAULT 0,
+    acrobatics INTEGER NOT NULL DEFAULT 0,
+    animal_handling INTEGER NOT NULL DEFAULT 0,
+    religion INTEGER NOT NULL DEFAULT 0,
+    insight INTEGER NOT NULL DEFAULT 0,
+    survival INTEGER NOT NULL DEFAULT 0,
+    arcana INTEGER NOT NULL DEFAULT 0,
+    medicine INTEGER NOT NULL DEFAULT 0,
+    history INTEGER NOT NULL DEFAULT 0,
+    sleight_of_hand INTEGER NOT NULL DEFAULT 0,
+    innate_spellcasting INTEGER NOT NULL DEFAULT 0,
+    athletics INTEGER NOT NULL DEFAULT 0,
+    death_burst INTEGER NOT NULL DEFAULT 0,
+    nature INTEGER NOT NULL DEFAULT 0,
+    persuasion INTEGER NOT NULL DEFAULT 0,
+    stealth INTEGER NOT NULL DEFAULT 0,
+    performance INTEGER NOT NULL DEFAULT 0,
+    deception INTEGER NOT NULL DEFAULT 0,
+    monster_id INTEGER NOT NULL REFERENCES monster (id) ON DELETE CASCADE
+);
+INSERT INTO skills_new (id, intimidation, perception, investigation, acrobatics, animal_handling, religion, insight, survival, arcana, medicine, history, sleight_of_hand, innate_spellcasting, athletics, death_burst, nature, persuasion, stealth, performance, deception, monster_id)
+SELECT id, intimidation, perception, investigation, acrobatics, animal_handling, religion, insight, survival, arcana, medicine, history, sleight_of_hand, innate_spellcasting, athletics, death_burst, nature, persuasion, stealth, performance, deception, monster_id
+FROM skills;
+DROP TABLE skills;
+ALTER TABLE skills_new RENAME TO skills;
+CREATE UNIQUE INDEX ix_skills_monster_id ON skills (monster_id);
+
+CREATE TABLE saving_throw_new (
+    id INTEGER PRIMARY KEY,
+    str INTEGER NOT NULL DEFAULT 0,
+    dex INTEGER NOT NULL DEFAULT 0,
+    con INTEGER NOT NULL DEFAULT 0,
+    int INTEGER NOT NULL DEFAULT 0,
+    wis INTEGER NOT NULL DEFAULT 0,
+    cha INTEGER NOT NULL DEFAULT 0,
+    monster_id INTEGER NOT NULL REFERENCES monster (id) ON DELETE CASCADE
+);
+INSERT INTO saving_throw_new (id, str, dex, con, int, wis, cha, monster_id)
+SELECT id, str, dex, con, int, wis, cha, monster_id
+FROM saving_throw;
+DROP TABLE saving_throw;
+ALTER TABLE saving_throw_new RENAME TO saving_throw;
+CREATE UNIQUE INDEX ix_saving_throw_monster_id ON saving_throw (monster_id);
+
+CREATE TABLE sense_new (
+    id INTEGER PRIMARY KEY,
+    darkvision INTEGER NOT NULL DEFAULT 0,
+    tremorsense INTEGER NOT NULL DEFAULT 0,
+    blindsight INTEGER NOT NULL DEFAULT 0,
+    truesight INTEGER NOT NULL DEFAULT 0,
+    monster_id INTEGER NOT NULL REFERENCES monster (id) ON DELETE CASCADE
+);
+INSERT INTO sense_new (id, darkvision, tremorsense, blindsight, truesight, monster_id)
+SELECT id, darkvision, tremorsense, blindsight, truesight, monster_id
+FROM sense;
+DROP TABLE sense;
+ALTER TABLE sense_new RENAME TO sense;
+CREATE UNIQUE INDEX ix_sense_monster_id ON sense (monster_id);
+
+-- Columns of these two tables follow whatever the workbook contains,
+-- so only the join column is indexed
+CREATE UNIQUE INDEX IF NOT EXISTS ix_damage_mod_monster_id ON damage_mod (monster_id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_language_monster_id ON language (monster_id);
@@ -0,0 +1,30 @@
+-- Composite indexes for the encounter search filters, plus a full text
+-- index over monster names
+
+DROP INDEX IF EXISTS ix_monster_type;
+DROP INDEX IF EXISTS ix_monster_size;
+CREATE INDEX ix_monster_type_cr ON monster (type, cr);
+CREATE INDEX ix_monster_size_cr ON monster (size, cr);
+
+CREATE INDEX ix_sense_darkvision ON sense (darkvision, monster_id);
+CREATE INDEX ix_sense_blindsight ON sense (blindsight, monster_id);
+CREATE INDEX ix_sense_tremorsense ON sense (tremorsense, monster_id);
+CREATE INDEX ix_sense_truesight ON sense (truesight, monster_id);
+
+-- External content table, it survives the ETL replacing monster so it is
+-- rebuilt from scratch every time this migration runs
+CREATE VIRTUAL TABLE IF NOT EXISTS monster_fts USING fts5(
+    name, content='monster', content_rowid='id'
+);
+INSERT INTO monster_fts (monster_fts) VALUES ('rebuild');
+
+CREATE TRIGGER monster_fts_insert AFTER INSERT ON monster BEGIN
+    INSERT INTO monster_fts (rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER monster_fts_delete AFTER DELETE ON monster BEGIN
+    INSERT INTO monster_fts (monster_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER monster_fts_update AFTER UPDATE OF name ON monster BEGIN
+    INSERT INTO monster_fts (monster_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO monster_fts (rowid, name) VALUES (new.id, new.name);
+END;
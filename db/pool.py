@@ -0,0 +1,337 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+from util import ROOT_DIR
+
+MONSTER_DB_PATH = os.path.join(ROOT_DIR, "db/monster.db")
+
+# Set to "memory" to serve every monster lookup from an in-memory snapshot
+BESTIARY_MODE_ENV = "DND_BESTIARY_MODE"
+
+logger = logging.getLogger(__name__)
+
+
+def dict_factory(cursor, row):
+    fields = [column[0] for column in cursor.description]
+    return {key: value for key, value in zip(fields, row)}
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+@dataclass
+class PoolStats:
+    size: int
+    created: int
+    in_use: int
+    checkouts: int
+    waits: int
+    timeouts: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+    recycled: int = 0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.checkouts if self.checkouts else 0.0
+
+
+class ConnectionPool:
+    """
+    Bounded pool of sqlite connections to a single database file.
+
+    Connections are checked out for the duration of a `with pool.connection()`
+    block, so a connection is only ever used by one thread at a time. Read-only
+    pools open `mode=ro` URI connections and writer pools `mode=rw` ones, so
+    a missing database fails when the pool is created instead of being
+    created empty. Writer pools switch the database to WAL journaling, so
+    readers never block each other or the writer.
+
+    The ETL writes into the live file, but a database can still be
+    replaced on disk, e.g. restored from a backup. Every connection
+    remembers the inode it was opened on, and one that no longer matches the
+    file at the path is closed and replaced on its next checkout.
+    """
+
+    def __init__(
+            self,
+            path: str = MONSTER_DB_PATH,
+            size: int = 8,
+            read_only: bool = True,
+            timeout: float = 5.0,
+            mmap_size: int = 64 * 1024 * 1024,
+            cache_size_kib: int = 16 * 1024
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.path = path
+        self.size = size
+        self.read_only = read_only
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recycled = 0
+        self._inodes = {}
+
+        self._open_database()
+
+    def _open_database(self) -> None:
+        # Fail on a wrong path here instead of creating an empty database.
+        # journal_mode is persistent but can only be changed with write
+        # access, so only writer pools switch the file to WAL, write_tables
+        # leaves every bestiary it writes in WAL mode already
+        con = sqlite3.connect(f"file:{self.path}?mode={'ro' if self.read_only else 'rw'}", uri=True)
+        try:
+            con.execute("PRAGMA schema_version").fetchone()
+            if not self.read_only:
+                con.execute("PRAGMA journal_mode=WAL")
+        finally:
+            con.close()
+
+    def _file_inode(self) -> int | None:
+        try:
+            return os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Read before connecting, if the file is swapped in between the
+        # connection is only recycled once more than needed
+        inode = self._file_inode()
+        if self.read_only:
+            con = sqlite3.connect(
+                f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+            )
+            con.execute("PRAGMA query_only=ON")
+        else:
+            con = sqlite3.connect(f"file:{self.path}?mode=rw", uri=True, check_same_thread=False)
+            con.execute("PRAGMA synchronous=NORMAL")
+        con.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        # Negative cache_size is in KiB rather than pages
+        con.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        con.row_factory = dict_factory
+        with self._lock:
+            self._inodes[id(con)] = inode
+        return con
+
+    def _is_stale(self, con: sqlite3.Connection) -> bool:
+        with self._lock:
+            inode = self._inodes.get(id(con))
+        return inode is not None and inode != self._file_inode()
+
+    def _discard(self, con: sqlite3.Connection) -> None:
+        con.close()
+        with self._lock:
+            self._inodes.pop(id(con), None)
+            self._created -= 1
+            self._recycled += 1
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        start = time.perf_counter()
+        try:
+            con = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeoutError(
+                f"No connection to {self.path} became free within {self.timeout}s"
+            )
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._waits += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return con
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        con = self._checkout()
+        while self._is_stale(con):
+            self._discard(con)
+            con = self._checkout()
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+        try:
+            yield con
+        finally:
+            if con.in_transaction:
+                con.rollback()
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(con)
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                size=self.size,
+                created=self._created,
+                in_use=self._in_use,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                timeouts=self._timeouts,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+                recycled=self._recycled
+            )
+
+    def close(self) -> None:
+        """
+        Close every idle connection, new ones are opened on demand
+        """
+        while True:
+            try:
+                con = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            con.close()
+            with self._lock:
+                self._inodes.pop(id(con), None)
+                self._created -= 1
+
+
+@dataclass
+class SnapshotReport:
+    load_seconds: float
+    database_bytes: int
+    copies: int
+
+    @property
+    def resident_bytes(self) -> int:
+        return self.database_bytes * self.copies
+
+
+class MemorySnapshotPool(ConnectionPool):
+    """
+    Read-only pool served entirely from memory. The database file is read
+    once, with the sqlite backup API, into a master `:memory:` copy. Every
+    pooled connection is then cloned from that master, so lookups never
+    touch the disk and readers share no locks. Changes made to the file
+    after the snapshot is taken are not seen.
+    """
+
+    def __init__(self, path: str = MONSTER_DB_PATH, size: int = 8, timeout: float = 5.0):
+        start = time.perf_counter()
+        self._master_lock = threading.Lock()
+        self._master = sqlite3.connect(":memory:", check_same_thread=False)
+        source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            source.backup(self._master)
+        finally:
+            source.close()
+        super().__init__(path, size=size, read_only=True, timeout=timeout)
+        self.load_seconds = time.perf_counter() - start
+
+    def _open_database(self) -> None:
+        # The file was already read into the master copy
+        pass
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(":memory:", check_same_thread=False)
+        with self._master_lock:
+            self._master.backup(con)
+        con.execute("PRAGMA query_only=ON")
+        con.row_factory = dict_factory
+        return con
+
+    def report(self) -> SnapshotReport:
+        with self._master_lock:
+            page_count = self._master.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._master.execute("PRAGMA page_size").fetchone()[0]
+        return SnapshotReport(
+            load_seconds=self.load_seconds,
+            database_bytes=page_count * page_size,
+            copies=self.stats().created + 1
+        )
+
+    def close(self) -> None:
+        super().close()
+        with self._master_lock:
+            self._master.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(read_only: bool = True) -> ConnectionPool:
+    """
+    Shared pools for monster.db. Writes go through a single connection
+    since sqlite only allows one writer at a time
+    """
+    with _pools_lock:
+        if read_only not in _pools:
+            if read_only and os.environ.get(BESTIARY_MODE_ENV) == "memory":
+                _pools[read_only] = _load_memory_snapshot(MONSTER_DB_PATH, 8)
+            else:
+                _pools[read_only] = ConnectionPool(
+                    MONSTER_DB_PATH,
+                    size=8 if read_only else 1,
+                    read_only=read_only
+                )
+        return _pools[read_only]
+
+def use_memory_snapshot(path: str = MONSTER_DB_PATH, size: int = 8) -> MemorySnapshotPool:
+    """
+    Replace the shared read pool with an in-memory snapshot of the database
+    """
+    pool = _load_memory_snapshot(path, size)
+    with _pools_lock:
+        previous = _pools.get(True)
+        _pools[True] = pool
+    if previous is not None:
+        previous.close()
+    return pool
+
+def _load_memory_snapshot(path: str, size: int) -> MemorySnapshotPool:
+    pool = MemorySnapshotPool(path, size=size)
+    report = pool.report()
+    logger.info(
+        "Loaded bestiary snapshot of %s in %.1f ms, %d KiB per copy",
+        path, report.load_seconds * 1000, report.database_bytes // 1024
+    )
+    return pool
+
+def close_pools() -> None:
+    """
+    Close the shared pools, they are recreated on the next get_pool()
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
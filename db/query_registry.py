@@ -0,0 +1,108 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+
+class InvalidQueryError(Exception):
+
+    def __init__(self, name: str, reason: str):
+        self.name = name
+        super().__init__(f"{name}.sql does not match the database schema: {reason}")
+
+
+@dataclass
+class QueryStats:
+    calls: int = 0
+    total_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class QueryRegistry:
+    """
+    Loads every .sql file of a directory once and serves the statements by
+    name (file name without extension), timing each call.
+
+    sqlite3 keeps a per connection cache of compiled statements keyed on
+    the SQL text, so handing out the same string every time means each
+    statement is only prepared once per connection.
+    """
+
+    def __init__(self, sql_dir: str):
+        self._statements = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        for filename in sorted(os.listdir(sql_dir)):
+            name, extension = os.path.splitext(filename)
+            if extension != ".sql":
+                continue
+            with open(os.path.join(sql_dir, filename), "r") as sql_file:
+                self._statements[name] = sql_file.read()
+            self._stats[name] = QueryStats()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._statements
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._statements)
+
+    def statement(self, name: str) -> str:
+        return self._statements[name]
+
+    def validate(self, con: sqlite3.Connection) -> None:
+        """
+        Compile every statement against the connected database without
+        running it, so a bad table or column name fails at startup
+        """
+        for name, statement in self._statements.items():
+            params = {param: None for param in re.findall(r":(\w+)", statement)}
+            try:
+                con.execute(f"EXPLAIN {statement}", params).close()
+            except sqlite3.Error as e:
+                raise InvalidQueryError(name, str(e)) from e
+
+    def fetchone(self, con: sqlite3.Connection, name: str, params: dict) -> dict | None:
+        start = time.perf_counter()
+        cur = con.execute(self._statements[name], params)
+        row = cur.fetchone()
+        cur.close()
+        self._record(name, time.perf_counter() - start)
+        return row
+
+    def fetchall(self, con: sqlite3.Connection, name: str, params: dict, raw: bool = False) -> list[dict] | list[tuple]:
+        """
+        raw=True skips the connection's row factory and returns plain tuples
+        """
+        start = time.perf_counter()
+        cur = con.cursor()
+        if raw:
+            cur.row_factory = None
+        cur.execute(self._statements[name], params)
+        rows = cur.fetchall()
+        cur.close()
+        self._record(name, time.perf_counter() - start)
+        return rows
+
+    def _record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            stats.calls += 1
+            stats.total_seconds += seconds
+
+    def stats(self) -> dict[str, QueryStats]:
+        with self._lock:
+            return {
+                name: QueryStats(stats.calls, stats.total_seconds)
+                for name, stats in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = QueryStats()
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from characters import load_bestiary_arrays, ability_scores_by_id, saving_throws_by_id, skills_by_id, \
+    base_stats_by_id, monsters_by_ids, ABILITIES, SKILLS, SENSES
+from util import calculate_modifier
+
+
+@pytest.fixture(scope="module")
+def bestiary():
+    return load_bestiary_arrays()
+
+
+class TestBestiaryArrays:
+
+    def test_shapes_and_dtypes(self, bestiary):
+        n = len(bestiary)
+
+        assert n == 801
+        assert np.all(np.diff(bestiary.ids) > 0)
+        assert bestiary.ability_scores.shape == (n, 6)
+        assert bestiary.ability_scores.dtype == np.int8
+        assert bestiary.modifiers.shape == (n, 6)
+        assert bestiary.saving_throw_proficiencies.dtype == bool
+        assert bestiary.skill_proficiencies.shape == (n, len(SKILLS))
+        assert bestiary.senses.shape == (n, len(SENSES))
+
+    @pytest.mark.parametrize("monster_id", [340, 368])
+    def test_rows_match_queries(self, bestiary, monster_id):
+        row = bestiary.rows([monster_id])[0]
+        scores = ability_scores_by_id(monster_id)
+        saves = saving_throws_by_id(monster_id)
+        skills = skills_by_id(monster_id)
+        base_stats = base_stats_by_id(monster_id)
+
+        assert bestiary.ability_scores[row].tolist() == [getattr(scores, a).value for a in ABILITIES]
+        assert bestiary.modifiers[row].tolist() == [getattr(scores, a).modifier for a in ABILITIES]
+        assert bestiary.saving_throw_proficiencies[row].tolist() == [getattr(saves, a) for a in ABILITIES]
+        assert bestiary.skill_proficiencies[row].tolist() == [bool(getattr(skills, s)) for s in SKILLS]
+        assert bestiary.hit_points[row] == base_stats.hit_points
+        assert bestiary.speeds[row][0] == base_stats.speed.walk
+
+    def test_goblin(self, bestiary):
+        goblin = bestiary.rows([340])[0]
+
+        assert bestiary.names[goblin] == "Goblin"
+        assert bestiary.challenge_ratings[goblin] == pytest.approx(0.25)
+        assert bestiary.skill("stealth")[goblin]
+        assert bestiary.senses[goblin, SENSES.index("darkvision")] == 60
+        assert bestiary.ability("dexterity")[goblin] == 14
+
+    def test_modifiers_vectorized(self, bestiary):
+        expected = [[calculate_modifier(int(v)) for v in row] for row in bestiary.ability_scores]
+
+        assert bestiary.modifiers.tolist() == expected
+
+    def test_analytics(self, bestiary):
+        monsters = monsters_by_ids(bestiary.ids.tolist())
+        expected = np.mean([m.base_stats.hit_points for m in monsters if m.challenge and m.challenge.challenge_rating == 1])
+
+        cr_one = bestiary.challenge_ratings == 1
+        assert bestiary.hit_points[cr_one].mean() == pytest.approx(expected)
+        assert np.isnan(bestiary.challenge_ratings).sum() == 4
+
+    def test_rows_missing(self, bestiary):
+        with pytest.raises(KeyError):
+            bestiary.rows([340, -1])
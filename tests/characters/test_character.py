@@ -1,10 +1,13 @@
+import copy
+import dataclasses
+
 import pytest
 
 from characters import NPCharacterBuilder, PhysicalStats, CharacterSize, Alignment, Lawfulness, Goodness, \
     BaseStats, Speed, AbilityScores, SavingThrows, Skills, DamageType, \
     DamageModifiers, Senses, Sense, Challenge, Languages, Language, Traits, Trait, \
     physical_stats_by_id, alignment_by_id, base_stats_by_id, ability_scores_by_id, saving_throws_by_id, skills_by_id, \
-    immunities_by_id, senses_by_id
+    immunities_by_id, senses_by_id, CharacterDirector, NPCharacter, MonsterNotFoundError, monsters_by_ids
 
 
 class TestBuilders:
@@ -257,3 +260,112 @@ class TestSQLQueries:
         goblin_query = senses_by_id(goblin_id)
         assert goblin_query == goblin_senses
 
+
+
+class TestCharacterDirector:
+
+    @pytest.mark.parametrize("monster_id", [340, 368])
+    def test_build_character_matches_component_queries(self, monster_id):
+        director = CharacterDirector()
+        director.builder = NPCharacterBuilder()
+
+        character = director.build_character(monster_id)
+
+        assert isinstance(character, NPCharacter)
+        assert character.physical_stats == physical_stats_by_id(monster_id)
+        assert character.alignment == alignment_by_id(monster_id)
+        assert character.base_stats == base_stats_by_id(monster_id)
+        assert character.ability_scores == ability_scores_by_id(monster_id)
+        assert character.saving_throws == saving_throws_by_id(monster_id)
+        assert character.skills == skills_by_id(monster_id)
+        assert character.damage_modifiers == immunities_by_id(monster_id)
+        assert character.senses == senses_by_id(monster_id)
+        assert character.meta_name == "NPCharacterBuilder"
+
+    def test_build_character_goblin(self):
+        goblin = CharacterDirector().build_character(340)
+
+        assert goblin.challenge == Challenge(0.25)
+        assert goblin.languages == Languages(
+            telepathic=False,
+            languages={"common", "goblin"}
+        )
+
+    def test_build_character_missing_id(self):
+        with pytest.raises(MonsterNotFoundError):
+            CharacterDirector().build_character(-1)
+
+
+class TestBatchLoader:
+
+    def test_monsters_by_ids_keeps_input_order(self):
+        ids = [368, 340, 1, 368]
+
+        monsters = monsters_by_ids(ids)
+
+        assert [m.ability_scores for m in monsters] == [ability_scores_by_id(id) for id in ids]
+        assert [m.base_stats for m in monsters] == [base_stats_by_id(id) for id in ids]
+
+    def test_monsters_by_ids_duplicates_are_independent(self):
+        first, second = monsters_by_ids([340, 340])
+
+        first.base_stats.hit_points -= 5
+        assert second.base_stats.hit_points == 7
+
+    def test_monsters_by_ids_reports_missing(self):
+        with pytest.raises(MonsterNotFoundError) as exc_info:
+            monsters_by_ids([340, -1, 99999, -1])
+        assert exc_info.value.ids == [-1, 99999]
+
+    def test_monsters_by_ids_empty(self):
+        assert monsters_by_ids([]) == []
+
+
+class TestCompactCharacters:
+
+    def test_characters_have_no_instance_dict(self):
+        goblin = monsters_by_ids([340])[0]
+
+        for obj in (goblin, goblin.base_stats, goblin.base_stats.speed, goblin.ability_scores,
+                    goblin.ability_scores.strength, goblin.skills, goblin.senses, goblin.damage_modifiers):
+            assert not hasattr(obj, "__dict__")
+        with pytest.raises(AttributeError):
+            goblin.hp = 7
+
+    def test_stat_values_are_frozen(self):
+        goblin = monsters_by_ids([340])[0]
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            goblin.skills.stealth = 0
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            goblin.base_stats.speed.walk = 0
+        goblin.base_stats.hit_points = 0
+        assert goblin.base_stats.hit_points == 0
+
+    def test_copies_share_frozen_components(self):
+        goblin = monsters_by_ids([340])[0]
+
+        spawned = copy.deepcopy(goblin)
+
+        assert spawned == goblin
+        assert spawned.skills is goblin.skills
+        assert spawned.base_stats.speed is goblin.base_stats.speed
+        assert spawned.base_stats is not goblin.base_stats
+        assert spawned.senses.senses is not goblin.senses.senses
+
+    def test_equality_ignores_builder_name(self):
+        goblin = monsters_by_ids([340])[0]
+        spawned = copy.deepcopy(goblin)
+        spawned.meta_name = "PlayableCharacterBuilder"
+
+        assert spawned == goblin
+
+    def test_equality_compares_challenge(self):
+        goblin = monsters_by_ids([340])[0]
+        spawned = copy.deepcopy(goblin)
+
+        spawned.challenge = Challenge(1)
+
+        assert spawned != goblin
+        spawned.challenge = Challenge(0.25)
+        assert spawned == goblin
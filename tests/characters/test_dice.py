@@ -0,0 +1,131 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from characters import Dice, DiceRoller, DiceExpression, DiceTerm, DiceExpressionError, parse_dice, \
+    dice_distribution
+
+
+class TestParseDice:
+
+    @pytest.mark.parametrize("expression, normalized", [
+        ("8d6+3", "8d6+3"),
+        ("2d20kh1", "2d20kh1"),
+        ("2d20kl1", "2d20kl1"),
+        ("4d6dl1", "4d6kh3"),
+        ("4d6dh1", "4d6kl3"),
+        ("4d6k3", "4d6kh3"),
+        ("D20 + 2 - 1", "1d20+1"),
+        ("1d4-1d6", "1d4-1d6"),
+        ("-2+d4", "1d4-2"),
+        ("7", "7"),
+    ])
+    def test_normalized_notation(self, expression, normalized):
+        assert str(parse_dice(expression)) == normalized
+
+    def test_terms(self):
+        assert parse_dice("4d6dl1+2") == DiceExpression(
+            terms=(DiceTerm(count=4, sides=6, keep=3, highest=True),),
+            modifier=2
+        )
+
+    def test_parsed_once(self):
+        assert parse_dice("3d8+2") is parse_dice("3d8+2")
+
+    @pytest.mark.parametrize("expression", ["", "8d", "8d6+", "2d20kh3", "0d6", "d0", "xd6", "2d6 3", "1d62d4"])
+    def test_invalid(self, expression):
+        with pytest.raises(DiceExpressionError):
+            parse_dice(expression)
+
+    def test_bounds(self):
+        assert (parse_dice("8d6+3").minimum, parse_dice("8d6+3").maximum) == (11, 51)
+        assert (parse_dice("1d4-1d6").minimum, parse_dice("1d4-1d6").maximum) == (-5, 3)
+
+
+class TestDiceRoller:
+
+    def test_bulk_rolls_stay_in_bounds(self):
+        rolls = DiceRoller(seed=0).roll("8d6+3", size=10_000)
+
+        assert rolls.shape == (10_000,)
+        assert rolls.min() >= 11 and rolls.max() <= 51
+        assert abs(rolls.mean() - 31) < 0.5
+
+    def test_keep_highest_is_advantage(self):
+        rolls = DiceRoller(seed=0).roll("2d20kh1", size=20_000)
+
+        assert rolls.min() >= 1 and rolls.max() <= 20
+        # Expected value of the higher of two d20s is 13.825
+        assert abs(rolls.mean() - 13.825) < 0.2
+
+    def test_drop_lowest(self):
+        rolls = DiceRoller(seed=0).roll("4d6dl1", size=20_000)
+
+        assert rolls.min() >= 3 and rolls.max() <= 18
+        assert abs(rolls.mean() - 12.24) < 0.1
+
+    def test_seeded_sessions_repeat(self):
+        assert np.array_equal(DiceRoller(seed=7).roll("3d8", 100), DiceRoller(seed=7).roll("3d8", 100))
+        assert isinstance(DiceRoller(seed=7).roll("1d20"), int)
+        assert DiceRoller(seed=7).roll("2d4", size=(2, 3)).shape == (2, 3)
+
+    def test_roll_die_unchanged(self):
+        assert 1 <= Dice.d20.roll_die() <= 20
+
+
+def brute_force(count: int, sides: int, keep: int, highest: bool) -> dict[int, float]:
+    totals = Counter()
+    for roll in itertools.product(range(1, sides + 1), repeat=count):
+        roll = sorted(roll)
+        totals[sum(roll[count - keep:] if highest else roll[:keep])] += 1
+    return {total: n / sides ** count for total, n in totals.items()}
+
+
+class TestDiceDistribution:
+
+    def test_sum_of_dice(self):
+        distribution = dice_distribution("3d8+2")
+
+        assert (distribution.minimum, distribution.maximum) == (5, 26)
+        assert distribution.pmf.sum() == pytest.approx(1)
+        assert distribution.expected_value == pytest.approx(15.5)
+        assert distribution.variance == pytest.approx(3 * 63 / 12)
+        # 3d8 rolls 13 or more
+        assert distribution.at_least(15) == pytest.approx(0.59375)
+
+    @pytest.mark.parametrize("count, sides, keep, highest", [
+        (4, 6, 3, True), (4, 6, 3, False), (3, 8, 1, True), (5, 4, 2, False), (2, 20, 1, True),
+    ])
+    def test_keep_matches_brute_force(self, count, sides, keep, highest):
+        expected = brute_force(count, sides, keep, highest)
+        distribution = dice_distribution(f"{count}d{sides}{'kh' if highest else 'kl'}{keep}")
+
+        totals = np.arange(0, count * sides + 2)
+        assert distribution.probability(totals) == pytest.approx([expected.get(t, 0.0) for t in totals])
+
+    def test_advantage_and_disadvantage(self):
+        d20 = Dice.d20.distribution()
+
+        assert d20.advantage().expected_value == pytest.approx(13.825)
+        assert d20.disadvantage().expected_value == pytest.approx(7.175)
+        assert np.allclose(d20.advantage().pmf, dice_distribution("2d20kh1").pmf)
+        assert np.allclose(d20.disadvantage().pmf, dice_distribution("2d20kl1").pmf)
+
+    def test_negative_terms(self):
+        distribution = dice_distribution("1d4-1d6")
+
+        assert (distribution.minimum, distribution.maximum) == (-5, 3)
+        assert distribution.expected_value == pytest.approx(-1)
+
+    def test_cdf_and_percentiles(self):
+        distribution = dice_distribution("3d6")
+
+        assert distribution.cdf([2, 10, 18, 30]).tolist() == pytest.approx([0, 0.5, 1, 1])
+        assert distribution.percentile([0, 0.5, 1]).tolist() == [3, 10, 18]
+        assert distribution.probability(2) == 0
+
+    def test_memoized_on_normalized_expression(self):
+        assert dice_distribution("1d6 + 1d6 + 2") is dice_distribution("2+2d6")
+        assert dice_distribution("4d6dl1") is dice_distribution("4d6kh3")
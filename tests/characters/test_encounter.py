@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from characters import Challenge, CHALLENGE_RATING_XP, Difficulty, challenge_xp, encounter_difficulty, \
+    load_bestiary_arrays
+
+
+@pytest.fixture(scope="module")
+def bestiary():
+    return load_bestiary_arrays()
+
+
+class TestChallengeXP:
+
+    @pytest.mark.parametrize("rating, xp", [(0, 10), (0.125, 25), (0.25, 50), (0.5, 100), (1, 200), (5, 1800), (30, 155000)])
+    def test_experience_value(self, rating, xp):
+        assert Challenge(rating).experience_value == xp
+
+    def test_every_rating(self):
+        assert len(CHALLENGE_RATING_XP) == 34
+        assert challenge_xp(list(CHALLENGE_RATING_XP)).tolist() == list(CHALLENGE_RATING_XP.values())
+
+    def test_unknown_rating(self):
+        with pytest.raises(ValueError, match="0.3"):
+            Challenge(0.3).experience_value
+        with pytest.raises(ValueError):
+            challenge_xp([1, 0.3, 31])
+
+
+class TestEncounterDifficulty:
+
+    def test_single_encounter(self):
+        # A bugbear and three hobgoblins against a party of four
+        result = encounter_difficulty([3, 3, 3, 2], [1, 0.5, 0.5, 0.5])
+
+        assert result.xp == 500
+        assert result.multiplier == 2
+        assert result.adjusted_xp == 1000
+        assert result.thresholds.tolist() == [275, 550, 825, 1400]
+        assert result.difficulty == Difficulty.HARD
+
+    def test_party_size_shifts_multiplier(self):
+        one_ogre = [[2]] * 3
+        parties = [[5, 5, 0, 0, 0, 0], [5, 5, 5, 5, 0, 0], [5, 5, 5, 5, 5, 5]]
+
+        result = encounter_difficulty(parties, one_ogre)
+
+        assert result.multiplier.tolist() == [1.5, 1, 0.5]
+        assert result.adjusted_xp.tolist() == [675, 450, 225]
+        assert result.difficulty.tolist() == [Difficulty.EASY, Difficulty.TRIVIAL, Difficulty.TRIVIAL]
+
+    def test_many_candidate_encounters(self):
+        rng = np.random.default_rng(0)
+        ratings = rng.choice([0.125, 0.25, 0.5, 1, 2, 3, np.nan], size=(2_000, 8))
+
+        result = encounter_difficulty([4, 4, 4, 4], ratings)
+
+        assert result.difficulty.shape == (2_000,)
+        for row in rng.choice(len(ratings), size=20, replace=False):
+            expected = encounter_difficulty([4, 4, 4, 4], ratings[row][~np.isnan(ratings[row])])
+            assert result.adjusted_xp[row] == expected.adjusted_xp
+            assert result.difficulty[row] == expected.difficulty
+
+    def test_monster_count_multipliers(self):
+        counts = [1, 2, 3, 6, 7, 10, 11, 14, 15, 20]
+        ratings = np.full((len(counts), 20), np.nan)
+        for i, count in enumerate(counts):
+            ratings[i, :count] = 0
+
+        result = encounter_difficulty([1, 1, 1, 1], ratings)
+
+        assert result.multiplier.tolist() == [1, 1.5, 2, 2, 2.5, 2.5, 3, 3, 4, 4]
+
+    def test_unrated_monsters_are_skipped(self, bestiary):
+        unrated = bestiary.ids[np.isnan(bestiary.challenge_ratings)]
+        goblins = bestiary.challenge_ratings[bestiary.rows([340, 340])]
+        ratings = np.append(goblins, bestiary.challenge_ratings[bestiary.rows(unrated[:1])])
+
+        result = encounter_difficulty([1, 1], ratings)
+
+        assert len(unrated) > 0
+        assert result.xp == 100
+        assert result.multiplier == encounter_difficulty([1, 1], goblins).multiplier
+
+    def test_invalid_levels(self):
+        with pytest.raises(ValueError):
+            encounter_difficulty([21, 3], [1])
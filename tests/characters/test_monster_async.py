@@ -0,0 +1,87 @@
+import asyncio
+import gc
+import statistics
+import time
+
+from characters import MAX_QUERY_THREADS, monster_by_id_async, monsters_by_ids_async, search_monster_ids_async, \
+    search_monsters_async, monster_record_by_id_async, monsters_by_ids, search_monster_ids, search_monsters
+
+IN_FLIGHT = 100
+ENCOUNTER_SIZE = 50
+# A loop stalled by a query would lag for a whole encounter load or more.
+# Query threads only take the GIL from it for a switch interval at a time
+MAX_LOOP_LAG = 0.05
+
+
+def p99(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=100)[98]
+
+
+class TestAsyncQueries:
+
+    def test_results_match_sync(self):
+        async def run():
+            return (
+                await monster_by_id_async(340),
+                await monsters_by_ids_async([368, 340]),
+                await search_monster_ids_async(type="humanoid", cr_max=0.5),
+                [m async for m in search_monsters_async(name="goblin", chunk_size=1)],
+                [m async for m in search_monsters_async(type="humanoid", chunk_size=7)],
+                await monster_record_by_id_async(368)
+            )
+
+        goblin, batch, found, streamed, humanoids, record = asyncio.run(run())
+
+        assert goblin == monsters_by_ids([340])[0]
+        assert batch == monsters_by_ids([368, 340])
+        assert found == list(search_monster_ids(type="humanoid", cr_max=0.5))
+        assert streamed == monsters_by_ids([340, 341])
+        assert humanoids == list(search_monsters(type="humanoid", chunk_size=7))
+        assert record.id == 368
+
+    def test_event_loop_stays_responsive(self):
+        """
+        With 100 encounter loads in flight, a heartbeat sharing the event
+        loop keeps a flat p99 lag, and no load waits much longer than the
+        queue on the bounded executor predicts
+        """
+        all_ids = list(search_monster_ids(chunk_size=1000))
+        encounters = [all_ids[i * 7:i * 7 + ENCOUNTER_SIZE] for i in range(IN_FLIGHT)]
+
+        async def heartbeat(stop: asyncio.Event) -> list[float]:
+            lags = []
+            while not stop.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - start - 0.001)
+            return lags
+
+        async def timed(ids: list[int]) -> tuple[list, float]:
+            start = time.perf_counter()
+            loaded = await monsters_by_ids_async(ids)
+            return loaded, time.perf_counter() - start
+
+        async def run(in_flight: int) -> tuple[list[list], list[float], list[float]]:
+            stop = asyncio.Event()
+            pinger = asyncio.create_task(heartbeat(stop))
+            await asyncio.sleep(0.01)
+            results = []
+            for start in range(0, len(encounters), in_flight):
+                results += await asyncio.gather(*(timed(ids) for ids in encounters[start:start + in_flight]))
+            stop.set()
+            return [loaded for loaded, _ in results], [latency for _, latency in results], await pinger
+
+        asyncio.run(run(1))
+        # Freeze a clean heap, a full collection walking everything earlier
+        # tests loaded stalls the loop for longer than any query would
+        gc.collect()
+        gc.freeze()
+        try:
+            _, alone, _ = asyncio.run(run(1))
+            loaded, latencies, lags = asyncio.run(run(IN_FLIGHT))
+        finally:
+            gc.unfreeze()
+
+        assert [len(encounter) for encounter in loaded] == [ENCOUNTER_SIZE] * IN_FLIGHT
+        assert p99(lags) < MAX_LOOP_LAG
+        assert p99(latencies) < 2 * IN_FLIGHT / MAX_QUERY_THREADS * p99(alone)
@@ -0,0 +1,93 @@
+import pytest
+
+from characters import MonsterCache, monsters_by_ids, MonsterNotFoundError
+
+
+class FakeLoader:
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ids):
+        self.calls.append(list(ids))
+        return monsters_by_ids(ids)
+
+
+class TestMonsterCache:
+
+    def test_hits_and_misses(self):
+        loader = FakeLoader()
+        cache = MonsterCache(maxsize=4, loader=loader, generation=lambda: 0)
+
+        goblin = cache.get(340)
+        assert cache.get(340) == goblin
+        cache.get_many([340, 368, 368])
+
+        assert loader.calls == [[340], [368]]
+        stats = cache.stats()
+        assert stats.hits == 2
+        assert stats.misses == 2
+        assert stats.size == 2
+
+    def test_returns_defensive_copies(self):
+        cache = MonsterCache(maxsize=4, generation=lambda: 0)
+
+        first, second = cache.get_many([340, 340])
+        first.base_stats.hit_points = 0
+        first.senses.senses.add("truesight")
+
+        assert second.base_stats.hit_points == 7
+        assert cache.get(340).base_stats.hit_points == 7
+        assert cache.get(340).senses.senses == {"darkvision"}
+
+    def test_lru_eviction(self):
+        loader = FakeLoader()
+        cache = MonsterCache(maxsize=2, loader=loader, generation=lambda: 0)
+
+        cache.get(1)
+        cache.get(2)
+        cache.get(1)
+        cache.get(3)
+        cache.get(1)
+        cache.get(2)
+
+        assert loader.calls == [[1], [2], [3], [2]]
+        assert cache.stats().evictions == 2
+
+    def test_invalidated_on_generation_change(self):
+        loader = FakeLoader()
+        generation = [0]
+        cache = MonsterCache(maxsize=4, loader=loader, generation=lambda: generation[0], generation_ttl=0)
+
+        cache.get(340)
+        cache.get(340)
+        generation[0] += 1
+        cache.get(340)
+
+        assert loader.calls == [[340], [340]]
+        assert cache.stats().invalidations == 1
+
+    def test_generation_read_once_per_ttl(self):
+        reads = []
+        cache = MonsterCache(maxsize=4, generation=lambda: reads.append(1) or 0, generation_ttl=60)
+
+        cache.get_many([340, 368])
+        cache.get(340)
+        cache.get(368)
+
+        assert len(reads) == 1
+        assert cache.stats().hits == 2
+
+    def test_missing_ids_are_not_cached(self):
+        cache = MonsterCache(maxsize=4, generation=lambda: 0)
+
+        with pytest.raises(MonsterNotFoundError):
+            cache.get_many([340, -1])
+        assert cache.stats().size == 0
+
+    def test_live_generation(self):
+        cache = MonsterCache(maxsize=4)
+
+        assert cache.get(368) == monsters_by_ids([368])[0]
+        assert cache.get(368) == monsters_by_ids([368])[0]
+        assert cache.stats().hits == 1
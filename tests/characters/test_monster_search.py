@@ -0,0 +1,72 @@
+import sqlite3
+from typing import Iterator
+
+import pytest
+
+from characters import search_monster_ids, search_monsters, NPCharacter, CharacterSize, Sense, DamageType, \
+    Lawfulness
+from db import MONSTER_DB_PATH
+
+
+@pytest.fixture(scope="module")
+def con() -> sqlite3.Connection:
+    con = sqlite3.connect(MONSTER_DB_PATH)
+    yield con
+    con.close()
+
+
+def ids(con: sqlite3.Connection, statement: str, params: dict | None = None) -> list[int]:
+    return [row[0] for row in con.execute(statement, params or {})]
+
+
+class TestMonsterSearch:
+
+    def test_name(self):
+        assert list(search_monster_ids(name="gob")) == [340, 341]
+        assert list(search_monster_ids(name="hobgoblin")) == [368, 369, 370, 371, 372]
+        assert list(search_monster_ids(name="hobgoblin war")) == [372]
+        assert list(search_monster_ids(name='"')) == []
+
+    def test_cr_range_and_type(self, con):
+        expected = ids(con, "SELECT id FROM monster WHERE type='humanoid' AND cr BETWEEN 0.25 AND 2 ORDER BY id")
+
+        assert list(search_monster_ids(type="humanoid", cr_min=0.25, cr_max=2)) == expected
+        assert 340 in expected
+
+    def test_size_tag_and_alignment(self, con):
+        expected = ids(
+            con,
+            "SELECT id FROM monster WHERE size='small' AND tags='goblinoid' "
+            "AND lawfulness LIKE '%neutral%' ORDER BY id"
+        )
+
+        found = search_monster_ids(size=CharacterSize.SMALL, tag="goblinoid", lawfulness=Lawfulness.NEUTRAL)
+        assert list(found) == expected
+        assert 340 not in expected
+        assert list(search_monster_ids(tag="cloud")) == ids(con, "SELECT id FROM monster WHERE tags='giant, cloud'")
+
+    def test_senses(self, con):
+        expected = ids(con, "SELECT monster_id FROM sense WHERE darkvision >= 120 AND truesight >= 30 ORDER BY monster_id")
+
+        assert list(search_monster_ids(senses={Sense.DARKVISION: 120, "truesight": 30})) == expected
+
+    def test_damage_modifiers(self, con):
+        expected = ids(con, "SELECT monster_id FROM damage_mod WHERE fire='immunity' ORDER BY monster_id")
+
+        found = list(search_monsters(immune_to=[DamageType.FIRE]))
+        assert [m.damage_modifiers.immunities >= {"fire"} for m in found] == [True] * len(expected)
+        assert len(found) == len(expected)
+
+        resistant = set(search_monster_ids(resistant_to=[DamageType.COLD, DamageType.FIRE]))
+        assert resistant == set(ids(con, "SELECT monster_id FROM damage_mod WHERE cold='resistance' AND fire='resistance'"))
+
+    def test_streams_lazily(self, con):
+        results = search_monsters(size="huge", chunk_size=4)
+
+        assert isinstance(results, Iterator)
+        monsters = list(results)
+        assert len(monsters) == len(ids(con, "SELECT id FROM monster WHERE size='huge'"))
+        assert all(isinstance(m, NPCharacter) and m.physical_stats.size == "huge" for m in monsters)
+
+    def test_no_filters(self):
+        assert len(list(search_monster_ids(chunk_size=100))) == 801
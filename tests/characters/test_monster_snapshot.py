@@ -0,0 +1,63 @@
+import struct
+
+import pytest
+
+from characters import MonsterSnapshot, SnapshotVersionError, MonsterNotFoundError, NPCharacter, \
+    write_monster_snapshot, monster_records_by_ids, monsters_by_ids, SNAPSHOT_VERSION
+
+
+@pytest.fixture(scope="module")
+def snapshot_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("snapshot") / "monster.snapshot")
+    write_monster_snapshot(path)
+    return path
+
+
+@pytest.fixture
+def snapshot(snapshot_path):
+    with MonsterSnapshot(snapshot_path) as snapshot:
+        yield snapshot
+
+
+class TestMonsterSnapshot:
+
+    def test_records_match_database(self, snapshot):
+        ids = list(snapshot)
+
+        assert len(snapshot) == 801
+        assert ids == sorted(ids)
+        assert [snapshot.record(id) for id in ids] == monster_records_by_ids(ids)
+
+    def test_builds_characters(self, snapshot):
+        goblin = snapshot[340]
+
+        assert isinstance(goblin, NPCharacter)
+        assert goblin == monsters_by_ids([340])[0]
+        assert snapshot.monsters([368, 340]) == monsters_by_ids([368, 340])
+
+    def test_missing_ids(self, snapshot):
+        assert 674 not in snapshot
+        assert snapshot.get(674) is None
+        with pytest.raises(MonsterNotFoundError) as e:
+            snapshot.monsters([340, 674, 10_000])
+        assert e.value.ids == [674, 10_000]
+
+    def test_rejects_other_versions(self, snapshot_path, tmp_path):
+        with open(snapshot_path, "rb") as snapshot_file:
+            data = bytearray(snapshot_file.read())
+        struct.pack_into("<I", data, 8, SNAPSHOT_VERSION + 1)
+        path = tmp_path / "future.snapshot"
+        path.write_bytes(bytes(data))
+
+        with pytest.raises(SnapshotVersionError) as e:
+            MonsterSnapshot(str(path))
+        assert e.value.version == SNAPSHOT_VERSION + 1
+
+    def test_replacing_keeps_open_readers(self, snapshot_path, tmp_path):
+        path = str(tmp_path / "monster.snapshot")
+        write_monster_snapshot(path)
+        with MonsterSnapshot(path) as snapshot:
+            before = snapshot.record(340)
+            write_monster_snapshot(path)
+
+            assert snapshot.record(340) == before
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from characters import CombatantRoster, Combatant, Condition, load_bestiary_arrays, monsters_by_ids, \
+    proficiency_bonus, ability_scores_by_id, Challenge, ABILITIES
+
+
+@pytest.fixture(scope="module")
+def bestiary():
+    return load_bestiary_arrays()
+
+
+@pytest.fixture
+def roster(bestiary):
+    # Three goblins then two hobgoblins
+    return CombatantRoster.from_bestiary(bestiary, [340, 368], counts=[3, 2])
+
+
+class TestCombatantRoster:
+
+    def test_from_bestiary_matches_characters(self, roster):
+        from_characters = CombatantRoster.from_characters(monsters_by_ids([340, 368]), counts=[3, 2])
+
+        assert len(roster) == len(from_characters) == 5
+        assert roster.monster_ids.tolist() == [340, 340, 340, 368, 368]
+        assert from_characters.template_indices.tolist() == [0, 0, 0, 1, 1]
+        for column in ("armor_class", "hit_points", "ability_scores", "saving_throw_proficiencies", "speeds"):
+            assert np.array_equal(getattr(roster, column), getattr(from_characters, column))
+            assert getattr(roster, column).dtype == getattr(from_characters, column).dtype
+
+    def test_rows_read_like_characters(self, roster):
+        goblin = roster[0]
+
+        assert isinstance(goblin, Combatant)
+        assert goblin.monster_id == 340
+        assert goblin.ability_scores == ability_scores_by_id(340)
+        assert goblin.base_stats.hit_points == 7
+        assert goblin.challenge == Challenge(0.25)
+        assert roster[-1].monster_id == 368
+        with pytest.raises(IndexError):
+            roster[5]
+
+    def test_template_components(self):
+        goblin = monsters_by_ids([340])[0]
+        roster = CombatantRoster.from_characters([goblin], counts=2)
+
+        assert roster[1].skills == goblin.skills
+        assert roster[1].languages == goblin.languages
+        assert roster[1].base_stats == goblin.base_stats
+        with pytest.raises(AttributeError):
+            roster[1].not_a_component
+
+    def test_template_components_are_copies(self):
+        goblin = monsters_by_ids([340])[0]
+        roster = CombatantRoster.from_characters([goblin], counts=2)
+
+        roster[0].languages.languages.clear()
+
+        assert roster[1].languages == goblin.languages
+        assert goblin.languages.languages
+
+    def test_damage_and_healing(self, roster):
+        roster.apply_damage(np.array([3, 10]), rows=[0, 3])
+        roster[1].hit_points = 2
+
+        assert roster.hit_points.tolist() == [4, 2, 7, 1, 11]
+        roster.apply_damage(5)
+        assert roster.hit_points.tolist() == [0, 0, 2, 0, 6]
+        assert roster.alive.tolist() == [False, False, True, False, True]
+        roster.heal(100, rows=roster.alive)
+        assert roster.hit_points.tolist() == [0, 0, 7, 0, 11]
+
+    def test_repeated_rows_take_every_hit(self, roster):
+        roster.apply_damage(np.array([3, 3, 1, 20]), rows=[0, 0, 3, 4])
+
+        assert roster.hit_points.tolist() == [1, 7, 7, 10, 0]
+        roster.heal(np.array([2, 2, 2]), rows=[0, 0, 3])
+        assert roster.hit_points.tolist() == [5, 7, 7, 11, 0]
+
+    def test_saving_throw_bonus(self, roster, bestiary):
+        bonus = roster.saving_throw_bonus("dexterity")
+        modifiers = roster.modifiers[:, ABILITIES.index("dexterity")]
+        proficient = roster.saving_throw_proficiencies[:, ABILITIES.index("dexterity")]
+
+        assert np.array_equal(bonus, modifiers + np.where(proficient, roster.proficiency_bonus, 0))
+        assert proficiency_bonus([0.25, 4, 5, 17, 30, np.nan]).tolist() == [2, 2, 3, 6, 9, 2]
+
+    def test_area_effect_halves_on_save(self, roster):
+        rng = np.random.default_rng(3)
+        expected = roster.saving_throw("dexterity", 13, np.random.default_rng(3), rows=[0, 1, 2])
+
+        saved = roster.area_effect("dexterity", 13, 6, rng, rows=[0, 1, 2])
+
+        assert np.array_equal(saved, expected)
+        assert roster.hit_points[:3].tolist() == [4 if s else 1 for s in saved]
+        assert roster.hit_points[3:].tolist() == [11, 11]
+
+    def test_conditions(self, roster):
+        roster.add_condition(Condition.PRONE | Condition.POISONED, rows=[0, 4])
+        roster.remove_condition(Condition.POISONED, rows=[4])
+
+        assert roster.has_condition(Condition.PRONE).tolist() == [True, False, False, False, True]
+        assert roster[0].conditions == Condition.PRONE | Condition.POISONED
+        assert roster[4].conditions == Condition.PRONE
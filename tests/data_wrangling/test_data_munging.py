@@ -0,0 +1,376 @@
+import logging
+import os
+import sqlite3
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from data_wrangling.data_munging import load_monster_frame, MONSTER_TABLES, SOURCE_HASH_TABLE, \
+    read_workbook_sheet, stream_workbook_sheet, MONSTER_WORKBOOK_PATH, MONSTER_SHEET, \
+    run_table_stages, TABLE_STAGES, \
+    rename_monster_columns, transform_monster_size, \
+    build_speeds_table, build_skills_table, build_immunities_table, build_senses_table, \
+    build_saving_throws_table, build_languages_table, WORD_PATTERN, DIGIT_PATTERN, DAMAGE_MOD_PATTERN
+from util import ROOT_DIR
+
+
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_excel(
+        io=os.path.join(ROOT_DIR, 'resources/monster_excel.xlsx'),
+        sheet_name="Official Stats",
+        engine='openpyxl',
+        dtype="string"
+    )
+
+@pytest.fixture(scope="module")
+def monster_df(raw_df):
+    df = rename_monster_columns(raw_df.copy())
+    return transform_monster_size(df)
+
+def table_rows(path: str, table: str) -> list[dict]:
+    # Columns by name, incremental loads append new columns at the end
+    con = sqlite3.connect(path)
+    con.row_factory = sqlite3.Row
+    rows = [dict(row) for row in con.execute(f"SELECT * FROM {table} ORDER BY id")]
+    con.close()
+    return rows
+
+def row_parsed(df: pd.DataFrame, column: str, parser) -> pd.DataFrame:
+    # The row by row reference the vectorized builders replaced
+    table = df.apply(lambda x: parser(x[column]), axis='columns', result_type='expand')
+    table.index = table.index.rename("id")
+    table["monster_id"] = table.index
+    return table
+
+
+# The row parsers the ETL used before the vectorized builders, kept as the
+# golden reference they are checked against
+def parse_language(input_str: str) -> dict:
+    out_dict = {}
+    try:
+        input_str = input_str.split(",")
+    except Exception:
+        return out_dict
+
+    for lang in input_str:
+        finder = WORD_PATTERN.search(lang)
+        if finder:
+            out_dict[finder.group(0).lower()] = 1
+    return out_dict
+
+def parse_saving_throws(input_str: str) -> dict:
+    out_dict = {
+        "str": 0,
+        "dex": 0,
+        "con": 0,
+        "int": 0,
+        "wis": 0,
+        "cha": 0
+    }
+
+    try:
+        input_str = input_str.lower()
+    except AttributeError:
+        return out_dict
+    input_str = input_str.split(",")
+    for saving_throw in input_str:
+        val = saving_throw.strip()
+        if val == "temp":
+            continue
+        out_dict[val] = 1
+    return out_dict
+
+def parse_senses(input_str: str) -> dict:
+    out_dict = {
+        "darkvision": 0,
+        "tremorsense": 0,
+        "blindsight": 0,
+        "truesight": 0
+    }
+
+    senses = input_str.split(",")
+
+    for sense in senses:
+        word_group_found = WORD_PATTERN.search(sense)
+        digit_group_found = DIGIT_PATTERN.search(sense)
+        if word_group_found:
+            word_group = word_group_found.group(0).lower()
+
+            match word_group:
+                case "darkvision" | "darkivision":
+                    key = "darkvision"
+                case "blindsight":
+                    key = "blindsight"
+                case "truesight":
+                    key = "truesight"
+                case "tremorsense":
+                    key = "tremorsense"
+                case _:
+                    continue
+            if digit_group_found:
+                out_dict[key] = int(digit_group_found.group(0))
+    return out_dict
+
+def generate_immunities_table(input_str: str) -> dict:
+    output_dict = {
+        "cold": None,
+        "nonadamantine": None,
+        "spell": None,
+        "acid": None,
+        "frightened grappled": None,
+        "stunned": None,
+        "charmed": None,
+        "exhaustion": None,
+        "thunder": None,
+        "lightining": None,
+        "grappled": None,
+        "frightened": None,
+        "unconscious": None,
+        "paralyzed": None,
+        "nonsilvered": None,
+        "trainde": None,
+        "deafened": None,
+        "necrotic": None,
+        "prone": None,
+        "psychic": None,
+        "darkness": None,
+        "fire": None,
+        "force": None,
+        "magicalpiercing": None,
+        "poisoned": None,
+        "blinded": None,
+        "slashing": None,
+        "temp": None,
+        "paralyezd": None,
+        "poison": None,
+        "nonsilvered ": None,
+        "petrified": None,
+        "magical": None,
+        "pyschic": None,
+        "exhuastion": None,
+        "bludgeoning": None,
+        "trained": None,
+        "lightning": None,
+        "piercing": None,
+        "radiant": None,
+        "nonmagical": None,
+    }
+
+    try:
+        list_of_immuns = input_str.split(",")
+    except Exception:
+        return output_dict
+
+    for damage_type in list_of_immuns:
+        damage_type = damage_type.lower().strip()
+        try:
+            subd = DAMAGE_MOD_PATTERN.sub("", damage_type)
+            matching = DAMAGE_MOD_PATTERN.search(damage_type)
+            if subd in output_dict:
+                match matching.group(0):
+                    case 'res':
+                        output_dict[subd] = 'resistance'
+                    case 'immun' | 'immmun' | 'immu' | 'immmu':
+                        output_dict[subd] = 'immunity'
+                    case 'weak':
+                        output_dict[subd] = 'weakness'
+        except Exception:
+            continue
+
+    return output_dict
+
+def generate_skills_table(input_str: str) -> dict:
+    output_dict = {
+        "intimidation": 0,
+        "perception": 0,
+        "investigation": 0,
+        "acrobatics": 0,
+        "animal_handling": 0,
+        "religion": 0,
+        "insight": 0,
+        "survival": 0,
+        "arcana": 0,
+        "medicine": 0,
+        "history": 0,
+        "sleight_of_hand": 0,
+        "innate_spellcasting": 0,
+        "athletics": 0,
+        "death_burst": 0,
+        "nature": 0,
+        "persuasion": 0,
+        "stealth": 0,
+        "performance": 0,
+        "deception": 0,
+    }
+
+    try:
+        skill_list = input_str.split(",")
+    except AttributeError:
+        return output_dict
+    for skill in skill_list:
+        if skill.lower().strip() in output_dict:
+            if skill.lower().strip() == "intimation":
+                skill = "intimidation"
+            output_dict[skill.lower().strip().replace(" ", "_")] = 1
+    return output_dict
+
+def transform_speeds(input_str: str) -> dict:
+    out_dict = {
+        "walk": 0,
+        "swim": 0,
+        "fly": 0,
+        "climb": 0,
+        "burrow": 0
+    }
+    try:
+        speeds_list = input_str.split(",")
+    except AttributeError:
+        return out_dict
+
+    for speed_item in speeds_list:
+        speed_finder = WORD_PATTERN.search(speed_item)
+        speed_type = "walk" if not speed_finder else speed_finder.group(0)
+        if speed_type not in {'walk', 'swim', 'fly', 'climb', 'burrow'}:
+            continue
+        digit_found = DIGIT_PATTERN.search(speed_item)
+        if digit_found:
+            out_dict[speed_type] = int(digit_found.group(0))
+        else:
+            out_dict[speed_type] = 0
+    return out_dict
+
+
+class TestVectorizedTables:
+
+    @pytest.mark.parametrize("builder, column, parser", [
+        (build_speeds_table, "speeds", transform_speeds),
+        (build_skills_table, "skills", generate_skills_table),
+        (build_immunities_table, "wri", generate_immunities_table),
+        (build_senses_table, "senses", parse_senses),
+        (build_saving_throws_table, "sav_throws", parse_saving_throws),
+        (build_languages_table, "languages", parse_language),
+    ])
+    def test_matches_row_parser(self, monster_df, builder, column, parser):
+        pd.testing.assert_frame_equal(builder(monster_df), row_parsed(monster_df, column, parser))
+
+    def test_parallel_stages_match_serial(self, monster_df):
+        serial = run_table_stages(monster_df, TABLE_STAGES, max_workers=1)
+        parallel = run_table_stages(monster_df, TABLE_STAGES, max_workers=2, min_parallel_rows=0)
+
+        assert [table.attrs["table_name"] for table in parallel] == [stage.output for stage in TABLE_STAGES]
+        for serial_table, parallel_table in zip(serial, parallel):
+            pd.testing.assert_frame_equal(parallel_table, serial_table)
+
+    def test_parses_each_string_once(self):
+        df = pd.DataFrame({"speeds": ["30", "30, fly 60", "30", pd.NA, "30", pd.NA]}, dtype="string").rename_axis("id")
+
+        speeds = build_speeds_table(df)
+
+        assert speeds["walk"].tolist() == [30, 30, 30, 0, 30, 0]
+        assert speeds["fly"].tolist() == [0, 60, 0, 0, 0, 0]
+        assert speeds["monster_id"].tolist() == list(range(6))
+        stats = speeds.attrs["parse_stats"]
+        assert (stats.rows, stats.unique) == (6, 3)
+        assert stats.hit_ratio == pytest.approx(0.5)
+
+    def test_quirks(self):
+        df = pd.DataFrame(
+            {
+                "speeds": ["30, fly 60, fly 5", pd.NA],
+                "senses": ["darkivision 60 ft., blindsight", "truesight 120 ft."],
+                "wri": ["Fireres, nonsilvered immun, coldimmu, coldweak", pd.NA],
+            },
+            dtype="string"
+        ).rename_axis("id")
+
+        speeds = build_speeds_table(df)
+        senses = build_senses_table(df)
+        immunities = build_immunities_table(df)
+
+        # A lone digit is not a speed, the last fly wins
+        assert speeds.loc[0, ["walk", "fly"]].tolist() == [30, 0]
+        assert speeds.loc[1].tolist() == [0, 0, 0, 0, 0, 1]
+        assert senses.loc[0, ["darkvision", "blindsight"]].tolist() == [60, 0]
+        assert immunities.loc[0, ["fire", "nonsilvered ", "cold"]].tolist() == ["resistance", "immunity", "weakness"]
+        assert immunities.loc[1, "fire"] is None
+        assert speeds.attrs["table_name"] == "speed"
+
+
+class TestIncrementalLoad:
+
+    def test_delta_matches_full_load(self, raw_df, tmp_path, caplog):
+        incremental_db = str(tmp_path / "incremental.db")
+        full_db = str(tmp_path / "full.db")
+        generation = load_monster_frame(raw_df.copy(), db_path=incremental_db)
+
+        edited = raw_df.copy()
+        edited.loc[340, "HP"] = "9"
+        edited.loc[340, "Languages"] = "Common, Goblin, Sylvan, Klingon"
+        edited = edited.drop(index=368)
+        edited.loc[900] = edited.loc[340]
+        edited.loc[900, "Name"] = "Goblin Boss"
+
+        caplog.set_level(logging.INFO, logger="data_wrangling.data_munging")
+        assert load_monster_frame(edited.copy(), incremental=True, db_path=incremental_db) == generation + 1
+        assert "2 rows added or changed, 1 deleted" in caplog.messages
+        load_monster_frame(edited.copy(), db_path=full_db)
+
+        for table in [*MONSTER_TABLES, SOURCE_HASH_TABLE]:
+            assert table_rows(incremental_db, table) == table_rows(full_db, table), table
+
+        con = sqlite3.connect(incremental_db)
+        assert con.execute("SELECT hp FROM monster WHERE id=340").fetchone() == (9,)
+        assert con.execute("SELECT klingon FROM language WHERE id=340").fetchone() == (1.0,)
+        assert con.execute("SELECT count(*) FROM monster WHERE id=368").fetchone() == (0,)
+        assert (900,) in con.execute("SELECT rowid FROM monster_fts WHERE monster_fts MATCH 'goblin boss'").fetchall()
+        con.close()
+
+    def test_unchanged_sheet_writes_nothing(self, raw_df, tmp_path):
+        db_path = str(tmp_path / "monster.db")
+        generation = load_monster_frame(raw_df.copy(), db_path=db_path)
+        modified = os.stat(db_path).st_mtime_ns
+
+        assert load_monster_frame(raw_df.copy(), incremental=True, db_path=db_path) == generation
+        assert os.stat(db_path).st_mtime_ns == modified
+
+    def test_falls_back_to_full_load(self, raw_df, tmp_path):
+        db_path = str(tmp_path / "monster.db")
+
+        assert load_monster_frame(raw_df.copy(), incremental=True, db_path=db_path) == 1
+        assert len(table_rows(db_path, "monster")) == 801
+
+
+class TestWorkbookCache:
+
+    def test_stream_matches_read_excel(self, raw_df):
+        pd.testing.assert_frame_equal(stream_workbook_sheet(MONSTER_WORKBOOK_PATH, MONSTER_SHEET), raw_df)
+
+    def test_hit_and_miss(self, tmp_path, caplog):
+        path = str(tmp_path / "stats.xlsx")
+        cache_dir = str(tmp_path / "cache")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "Stats"
+        sheet.append(["Name", "HP", "CR"])
+        sheet.append(["Goblin", 7, 0.25])
+        sheet.append(["Ogre", 59.0, None])
+        workbook.save(path)
+        caplog.set_level(logging.INFO, logger="data_wrangling.data_munging")
+
+        first = read_workbook_sheet(path, "Stats", cache_dir)
+        second = read_workbook_sheet(path, "Stats", cache_dir)
+
+        pd.testing.assert_frame_equal(first, pd.read_excel(path, sheet_name="Stats", engine='openpyxl', dtype="string"))
+        pd.testing.assert_frame_equal(second, first)
+        assert ["cache miss" in message for message in caplog.messages] == [True, False]
+        assert len(os.listdir(cache_dir)) == 1
+
+        sheet.append(["Orc", 15, 0.5])
+        workbook.save(path)
+        caplog.clear()
+
+        assert len(read_workbook_sheet(path, "Stats", cache_dir)) == 3
+        assert "cache miss" in caplog.messages[0]
+        assert len(os.listdir(cache_dir)) == 2
@@ -0,0 +1,53 @@
+import json
+import pstats
+
+import pandas as pd
+import pytest
+
+from data_wrangling.data_munging import load_monster_frame, MONSTER_WORKBOOK_PATH, MONSTER_SHEET
+from data_wrangling.profiling import StageProfiler
+
+
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_excel(MONSTER_WORKBOOK_PATH, sheet_name=MONSTER_SHEET, engine='openpyxl', dtype="string")
+
+
+class TestStageProfiler:
+
+    def test_run_report(self, raw_df, tmp_path):
+        profiler = StageProfiler(profile_stage="run_table_stages", profile_path=str(tmp_path / "stages.prof"))
+
+        load_monster_frame(raw_df.copy(), db_path=str(tmp_path / "monster.db"), profiler=profiler)
+        profiler.report().write(str(tmp_path / "report.json"))
+
+        with open(tmp_path / "report.json") as report_file:
+            report = json.load(report_file)
+        stages = {stage["name"]: stage for stage in report["stages"]}
+        assert list(stages) == [
+            "rename_monster_columns", "hash_source_rows", "transform_monster_size", "transform_monster_type",
+            "transform_alignment", "transform_challenge_rating", "make_col_ints", "run_table_stages", "write_tables"
+        ]
+        # The 'varies' template row
+        assert stages["transform_monster_size"]["rows_dropped"] == 1
+        assert stages["transform_monster_size"]["rows_out"] == 801
+        assert stages["run_table_stages"]["tables"]["language"] == 801
+        assert stages["run_table_stages"]["rows_out"] is None
+        assert all(stage["wall_seconds"] > 0 and stage["peak_memory_bytes"] >= 0 for stage in report["stages"])
+        assert report["wall_seconds"] >= sum(stage["wall_seconds"] for stage in report["stages"])
+
+        functions = {function for _, _, function in pstats.Stats(report["profile_path"]).stats}
+        assert "build_deduplicated" in functions
+
+    def test_without_memory_tracing(self):
+        profiler = StageProfiler(trace_memory=False)
+
+        profiler.run("head", pd.DataFrame.head, pd.DataFrame({"a": range(10)}), 3)
+
+        stage = profiler.report().stages[0]
+        assert (stage.rows_in, stage.rows_out, stage.rows_dropped) == (10, 3, 7)
+        assert stage.peak_memory_bytes is None
+
+    def test_profile_stage_needs_path(self):
+        with pytest.raises(ValueError):
+            StageProfiler(profile_stage="write_tables")
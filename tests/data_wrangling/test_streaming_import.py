@@ -0,0 +1,98 @@
+import dataclasses
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from data_wrangling.data_munging import load_monster_frame, MONSTER_TABLES, SOURCE_HASH_TABLE, \
+    MONSTER_WORKBOOK_PATH, MONSTER_SHEET
+from data_wrangling.streaming_import import import_monster_file
+from db import IMPORTED_ID_START, upsert_rows
+
+
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_excel(MONSTER_WORKBOOK_PATH, sheet_name=MONSTER_SHEET, engine='openpyxl', dtype="string")
+
+@pytest.fixture
+def db_path(raw_df, tmp_path) -> str:
+    path = str(tmp_path / "monster.db")
+    load_monster_frame(raw_df.copy(), db_path=path)
+    return path
+
+def monster_rows(path: str, id: int) -> dict[str, dict]:
+    con = sqlite3.connect(path)
+    con.row_factory = sqlite3.Row
+    rows = {}
+    for table in MONSTER_TABLES:
+        row = dict(con.execute(f"SELECT * FROM {table} WHERE id=?", (id,)).fetchone())
+        del row["id"]
+        row.pop("monster_id", None)
+        # Columns only the import added are unset for workbook rows
+        rows[table] = {column: value for column, value in row.items() if value not in (None, 0)}
+    con.close()
+    return rows
+
+
+class TestStreamingImport:
+
+    @pytest.mark.parametrize("extension", ["csv", "jsonl"])
+    def test_appends_in_chunks(self, raw_df, db_path, tmp_path, extension):
+        export = str(tmp_path / f"homebrew.{extension}")
+        if extension == "csv":
+            raw_df.to_csv(export, index=False)
+        else:
+            raw_df.to_json(export, orient="records", lines=True)
+        progress = []
+
+        report = import_monster_file(
+            export, chunk_size=200, db_path=db_path,
+            progress=lambda step: progress.append(dataclasses.replace(step))
+        )
+
+        assert [step.rows_read for step in progress] == [200, 400, 600, 800, 802]
+        assert (report.chunks, report.rows_read, report.rows_written) == (5, 802, 801)
+        assert report.rows_per_second > 0
+        con = sqlite3.connect(db_path)
+        assert con.execute("SELECT count(*) FROM monster").fetchone() == (1602,)
+        assert con.execute("SELECT count(*) FROM language").fetchone() == (1602,)
+        con.close()
+        # Imported ids start at IMPORTED_ID_START, away from the workbook's
+        assert monster_rows(db_path, IMPORTED_ID_START + 340) == monster_rows(db_path, 340)
+
+    def test_incremental_load_keeps_imported_monsters(self, raw_df, db_path, tmp_path):
+        export = str(tmp_path / "homebrew.csv")
+        homebrew = raw_df.loc[[340]].copy()
+        homebrew["Name"] = "Homebrew Goblin"
+        homebrew.to_csv(export, index=False)
+        import_monster_file(export, db_path=db_path)
+        import_monster_file(export, db_path=db_path)
+
+        grown = raw_df.copy()
+        grown.loc[len(grown)] = grown.loc[368]
+        grown.loc[len(grown) - 1, "Name"] = "New Workbook Hobgoblin"
+        load_monster_frame(grown, incremental=True, db_path=db_path)
+
+        con = sqlite3.connect(db_path)
+        assert con.execute("SELECT id, name FROM monster WHERE id >= 802 ORDER BY id").fetchall() == [
+            (802, "New Workbook Hobgoblin"),
+            (IMPORTED_ID_START, "Homebrew Goblin"),
+            (IMPORTED_ID_START + 1, "Homebrew Goblin"),
+        ]
+        con.close()
+
+    def test_upsert_refuses_unhashed_ids(self, raw_df, db_path, tmp_path):
+        export = str(tmp_path / "homebrew.csv")
+        raw_df.loc[[340]].to_csv(export, index=False)
+        import_monster_file(export, db_path=db_path)
+        before = monster_rows(db_path, IMPORTED_ID_START)
+
+        with pytest.raises(ValueError, match=str(IMPORTED_ID_START)):
+            upsert_rows([], ids=[340, IMPORTED_ID_START], table_names=[*MONSTER_TABLES, SOURCE_HASH_TABLE], path=db_path)
+
+        assert monster_rows(db_path, IMPORTED_ID_START) == before
+        assert monster_rows(db_path, 340) == before
+
+    def test_unknown_format(self, db_path, tmp_path):
+        with pytest.raises(ValueError):
+            import_monster_file(str(tmp_path / "homebrew.xml"), db_path=db_path)
@@ -0,0 +1,70 @@
+import json
+import os
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from data_wrangling.benchmark import run_benchmark, QUERIES
+from data_wrangling.data_munging import rename_monster_columns, build_monster_tables, stream_workbook_sheet, \
+    MONSTER_WORKBOOK_PATH, MONSTER_SHEET
+from data_wrangling.synthetic import BestiaryGenerator, write_synthetic_workbook
+
+
+@pytest.fixture(scope="module")
+def source():
+    return pd.read_excel(MONSTER_WORKBOOK_PATH, sheet_name=MONSTER_SHEET, engine='openpyxl', dtype="string")
+
+
+class TestBestiaryGenerator:
+
+    def test_layout_and_distributions(self, source):
+        df = BestiaryGenerator(source, seed=1).frame(5_000)
+
+        assert list(df.columns) == list(source.columns)
+        assert (df.dtypes == "string").all()
+        assert df.index.equals(pd.RangeIndex(5_000))
+        assert df["Name"].is_unique
+        assert df["Languages"].isna().mean() == pytest.approx(source["Languages"].isna().mean(), abs=0.03)
+        # More variety than the 801 official monsters, still far fewer strings than rows
+        assert source["WRI"].nunique() < df["WRI"].nunique() < 1_000
+
+    def test_seeded(self, source):
+        first = BestiaryGenerator(source, seed=7).frame(300)
+        second = BestiaryGenerator(source, seed=7).frame(300)
+
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_chunks_parse(self, source):
+        chunks = list(BestiaryGenerator(source).chunks(2_500, chunk_size=1_000))
+        tables = build_monster_tables(rename_monster_columns(pd.concat(chunks)))
+
+        assert [len(chunk) for chunk in chunks] == [1_000, 1_000, 500]
+        assert len({len(table) for table in tables}) == 1
+
+    def test_workbook(self, tmp_path):
+        path = str(tmp_path / "synthetic.xlsx")
+
+        write_synthetic_workbook(path, 200)
+
+        df = stream_workbook_sheet(path, MONSTER_SHEET)
+        assert len(df) == 200
+        assert openpyxl.load_workbook(path, read_only=True).sheetnames == [MONSTER_SHEET]
+
+
+class TestBenchmark:
+
+    def test_results_file(self, tmp_path):
+        results_path = str(tmp_path / "results.json")
+
+        run_benchmark(sizes=[300, 600], results_path=results_path, in_memory_limit=300)
+
+        with open(results_path) as results_file:
+            results = json.load(results_file)
+        small, large = results["sizes"]
+        assert (small["rows"], large["rows"]) == (300, 600)
+        assert small["full_load"]["stages"]["write_tables"] > 0
+        assert large["full_load"] is None
+        assert large["db_bytes"] > small["db_bytes"] > 0
+        assert set(large["queries"]) == set(QUERIES)
+        assert all(latency["p99_ms"] >= latency["p50_ms"] > 0 for latency in large["queries"].values())
@@ -1,13 +1,114 @@
 import sqlite3
 import os
+import shutil
 
+import pandas as pd
 import pytest
 
-from db import get_monster, get_connection
+from db import get_monster, get_connection, write_tables, ConnectionPool, MONSTER_DB_PATH, STAGING_SUFFIX
 from util import ROOT_DIR
 from characters import PhysicalStats
 
+TABLES = ["monster", "speed", "skills", "saving_throw", "sense", "damage_mod", "language"]
+
+
+@pytest.fixture(scope="module")
+def etl_tables() -> list[pd.DataFrame]:
+    """
+    The bestiary as the frames the ETL hands to write_tables
+    """
+    source = sqlite3.connect(MONSTER_DB_PATH)
+    tables = []
+    for table in TABLES:
+        df = pd.read_sql(f"SELECT * FROM {table}", source, index_col="id")
+        if table == "monster":
+            df["cr"] = df["cr"].map(lambda cr: "VARIES" if pd.isna(cr) else f"{cr:g}")
+        df.attrs["table_name"] = table
+        tables.append(df)
+    source.close()
+    return tables
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    path = str(tmp_path / "monster.db")
+    shutil.copyfile(MONSTER_DB_PATH, path)
+    return path
+
+
 class TestDB:
 
     def test_get_monster(self):
         get_monster(1)
+
+
+class TestWriteTables:
+
+    def test_writes_migrated_database(self, etl_tables, db_path):
+        with sqlite3.connect(db_path) as con:
+            generation = con.execute("PRAGMA user_version").fetchone()[0]
+
+        assert write_tables(etl_tables, db_path) == generation + 1
+
+        con = sqlite3.connect(db_path)
+        assert con.execute("PRAGMA user_version").fetchone()[0] == generation + 1
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert con.execute("SELECT count(*) FROM monster").fetchone() == (801,)
+        assert con.execute("SELECT name, typeof(cr), cr FROM monster WHERE id=340").fetchone() == ("Goblin", "real", 0.25)
+        assert con.execute("SELECT count(*) FROM schema_migrations").fetchone()[0] >= 2
+        assert con.execute("SELECT rowid FROM monster_fts WHERE monster_fts MATCH 'hobgoblin'").fetchall()[0] == (368,)
+        con.close()
+        assert not os.path.exists(db_path + STAGING_SUFFIX)
+
+    def test_pool_moves_to_new_file(self, etl_tables, db_path):
+        pool = ConnectionPool(db_path, size=2)
+        with pool.connection() as con:
+            assert con.execute("SELECT hp FROM monster WHERE id=340").fetchone() == {"hp": 7}
+
+        monster = etl_tables[0].copy()
+        monster.loc[340, "hp"] = 99
+        monster.attrs["table_name"] = "monster"
+        write_tables([monster, *etl_tables[1:]], db_path)
+
+        with pool.connection() as con:
+            assert con.execute("SELECT hp FROM monster WHERE id=340").fetchone() == {"hp": 99}
+        # The new bestiary is copied into the same file, the open
+        # connection simply sees it
+        assert pool.stats().recycled == 0
+        assert pool.stats().created == 1
+
+    def test_reader_holding_a_transaction(self, etl_tables, db_path):
+        writer = sqlite3.connect(db_path, isolation_level=None)
+        writer.execute("UPDATE monster SET hp=8 WHERE id=340")
+        writer.execute("UPDATE monster SET hp=9 WHERE id=340")
+        reader = sqlite3.connect(db_path, isolation_level=None)
+        reader.execute("BEGIN")
+        assert reader.execute("SELECT hp FROM monster WHERE id=340").fetchone() == (9,)
+
+        write_tables(etl_tables, db_path)
+
+        # The open transaction keeps reading its snapshot
+        assert reader.execute("SELECT hp FROM monster WHERE id=340").fetchone() == (9,)
+        reader.execute("COMMIT")
+        assert reader.execute("SELECT hp FROM monster WHERE id=340").fetchone() == (7,)
+        reader.close()
+        writer.close()
+
+        con = sqlite3.connect(db_path)
+        assert con.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+        assert con.execute("SELECT count(*) FROM monster").fetchone() == (801,)
+        assert con.execute("SELECT hp FROM monster WHERE id=340").fetchone() == (7,)
+        con.close()
+        assert not os.path.exists(db_path + STAGING_SUFFIX)
+
+    def test_failed_load_leaves_database(self, etl_tables, db_path):
+        broken = pd.DataFrame({"monster_id": [1]}, index=pd.Index([1], name="id"))
+        broken.attrs["table_name"] = "speed"
+        with open(db_path, "rb") as db_file:
+            before = db_file.read()
+
+        with pytest.raises(sqlite3.OperationalError):
+            write_tables([*etl_tables, broken], db_path)
+
+        with open(db_path, "rb") as db_file:
+            assert db_file.read() == before
+        assert not os.path.exists(db_path + STAGING_SUFFIX)
@@ -0,0 +1,96 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from db import apply_migrations, available_migrations, MONSTER_DB_PATH
+
+TABLES = ["monster", "speed", "skills", "saving_throw", "sense", "damage_mod", "language"]
+
+JOIN_QUERY = "SELECT * FROM speed WHERE monster_id=:id"
+CR_QUERY = "SELECT id, name FROM monster WHERE cr BETWEEN :low AND :high"
+
+
+@pytest.fixture
+def etl_db(tmp_path) -> sqlite3.Connection:
+    """
+    Fresh copy of the bestiary written the way the ETL writes it, with
+    pandas to_sql and no schema of our own
+    """
+    source = sqlite3.connect(MONSTER_DB_PATH)
+    con = sqlite3.connect(tmp_path / "monster.db")
+    for table in TABLES:
+        df = pd.read_sql(f"SELECT * FROM {table}", source, index_col="id")
+        if table == "monster":
+            df["cr"] = df["cr"].map(to_cr_text)
+        df.to_sql(name=table, con=con, if_exists="replace")
+    source.close()
+    yield con
+    con.close()
+
+
+def to_cr_text(cr) -> str:
+    if isinstance(cr, str):
+        return cr
+    return "VARIES" if pd.isna(cr) else f"{cr:g}"
+
+
+def query_plan(con: sqlite3.Connection, statement: str, params: dict) -> str:
+    return " | ".join(row[3] for row in con.execute(f"EXPLAIN QUERY PLAN {statement}", params))
+
+
+class TestMigrations:
+
+    def test_query_plans(self, etl_db):
+        before_join = query_plan(etl_db, JOIN_QUERY, {"id": 340})
+        before_cr = query_plan(etl_db, CR_QUERY, {"low": 1, "high": 5})
+
+        apply_migrations(etl_db)
+
+        after_join = query_plan(etl_db, JOIN_QUERY, {"id": 340})
+        after_cr = query_plan(etl_db, CR_QUERY, {"low": 1, "high": 5})
+
+        assert before_join == "SCAN speed"
+        assert before_cr == "SCAN monster"
+        assert after_join == "SEARCH speed USING INDEX ix_speed_monster_id (monster_id=?)"
+        assert after_cr == "SEARCH monster USING INDEX ix_monster_cr (cr>? AND cr<?)"
+
+    def test_typed_columns(self, etl_db):
+        apply_migrations(etl_db)
+
+        assert etl_db.execute("SELECT typeof(cr), cr FROM monster WHERE id=340").fetchone() == ("real", 0.25)
+        assert etl_db.execute("SELECT count(*) FROM monster WHERE cr IS NULL").fetchone() == (4,)
+        assert etl_db.execute("SELECT count(*) FROM monster").fetchone() == (801,)
+        assert etl_db.execute("SELECT count(*) FROM sqlite_stat1").fetchone()[0] > 0
+        foreign_keys = etl_db.execute("PRAGMA foreign_key_list(speed)").fetchall()
+        assert [(fk[2], fk[3], fk[4]) for fk in foreign_keys] == [("monster", "monster_id", "id")]
+
+    def test_name_search_index(self, etl_db):
+        apply_migrations(etl_db)
+
+        matches = etl_db.execute("SELECT rowid FROM monster_fts WHERE monster_fts MATCH 'hobgoblin'").fetchall()
+        assert (368,) in matches
+
+        etl_db.execute("UPDATE monster SET name='Bugbear Chief' WHERE id=368")
+        assert (368,) in etl_db.execute("SELECT rowid FROM monster_fts WHERE monster_fts MATCH 'bugbear chief'").fetchall()
+        assert (368,) not in etl_db.execute("SELECT rowid FROM monster_fts WHERE monster_fts MATCH 'hobgoblin'").fetchall()
+
+    def test_idempotent(self, etl_db):
+        versions = [version for version, _ in available_migrations()]
+
+        assert apply_migrations(etl_db) == [filename for _, filename in available_migrations()]
+        assert apply_migrations(etl_db) == []
+        assert [row[0] for row in etl_db.execute("SELECT version FROM schema_migrations")] == versions
+
+    def test_failed_migration_rolls_back(self, etl_db, tmp_path):
+        migrations = tmp_path / "migrations"
+        migrations.mkdir()
+        (migrations / "0001_bad.sql").write_text(
+            "CREATE INDEX ix_bad ON monster (hp);\nSELECT no_such_column FROM monster;"
+        )
+
+        with pytest.raises(sqlite3.OperationalError):
+            apply_migrations(etl_db, migrations_dir=str(migrations))
+
+        assert etl_db.execute("SELECT count(*) FROM sqlite_master WHERE name='ix_bad'").fetchone() == (0,)
+        assert etl_db.execute("SELECT count(*) FROM schema_migrations").fetchone() == (0,)
@@ -0,0 +1,149 @@
+import os
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from characters import monsters_by_ids
+from db import ConnectionPool, PoolTimeoutError, MONSTER_DB_PATH, MemorySnapshotPool, use_memory_snapshot, \
+    close_pools, get_pool
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    path = str(tmp_path / "monster.db")
+    shutil.copyfile(MONSTER_DB_PATH, path)
+    return path
+
+
+class TestConnectionPool:
+
+    def test_wal_and_pragmas(self, db_path):
+        pool = ConnectionPool(db_path, size=1)
+
+        with pool.connection() as con:
+            assert con.execute("PRAGMA journal_mode").fetchone()["journal_mode"] == "wal"
+            assert con.execute("PRAGMA mmap_size").fetchone()["mmap_size"] == pool.mmap_size
+            assert con.execute("SELECT name FROM monster WHERE id=340").fetchone() == {"name": "Goblin"}
+
+    def test_read_only(self, db_path):
+        pool = ConnectionPool(db_path, size=1)
+
+        with pool.connection() as con:
+            with pytest.raises(sqlite3.OperationalError):
+                con.execute("DELETE FROM monster")
+
+    @pytest.mark.parametrize("read_only", [True, False])
+    def test_missing_database(self, tmp_path, read_only):
+        path = str(tmp_path / "missing.db")
+
+        with pytest.raises(sqlite3.OperationalError):
+            ConnectionPool(path, size=1, read_only=read_only)
+        assert not os.path.exists(path)
+
+    def test_read_only_pool_needs_no_write_access(self, db_path):
+        with sqlite3.connect(db_path) as con:
+            con.execute("PRAGMA journal_mode=DELETE")
+        os.chmod(db_path, 0o444)
+
+        pool = ConnectionPool(db_path, size=1)
+
+        with pool.connection() as con:
+            assert con.execute("PRAGMA journal_mode").fetchone()["journal_mode"] == "delete"
+            assert con.execute("SELECT name FROM monster WHERE id=340").fetchone() == {"name": "Goblin"}
+
+    def test_writer(self, db_path):
+        pool = ConnectionPool(db_path, size=1, read_only=False)
+
+        with pool.connection() as con:
+            con.execute("UPDATE monster SET hp=8 WHERE id=340")
+            con.commit()
+        with ConnectionPool(db_path, size=1).connection() as con:
+            assert con.execute("SELECT hp FROM monster WHERE id=340").fetchone() == {"hp": 8}
+
+    def test_bounded_with_wait_metrics(self, db_path):
+        pool = ConnectionPool(db_path, size=2, timeout=5)
+        checked_out = threading.Barrier(3)
+        release = threading.Event()
+
+        def hold():
+            with pool.connection():
+                checked_out.wait()
+                release.wait()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            holders = [executor.submit(hold) for _ in range(2)]
+            checked_out.wait()
+            assert pool.stats().in_use == 2
+
+            threading.Timer(0.05, release.set).start()
+            with pool.connection() as con:
+                assert con.execute("SELECT count(*) AS n FROM monster").fetchone()["n"] == 801
+            for holder in holders:
+                holder.result()
+
+        stats = pool.stats()
+        assert stats.created == 2
+        assert stats.checkouts == 3
+        assert stats.waits == 1
+        assert stats.max_wait_seconds > 0
+        assert stats.in_use == 0
+
+    def test_timeout(self, db_path):
+        pool = ConnectionPool(db_path, size=1, timeout=0.01)
+
+        with pool.connection():
+            with pytest.raises(PoolTimeoutError):
+                with pool.connection():
+                    pass
+        assert pool.stats().timeouts == 1
+
+    def test_concurrent_readers(self, db_path):
+        pool = ConnectionPool(db_path, size=4)
+
+        def read(monster_id: int) -> str:
+            with pool.connection() as con:
+                return con.execute("SELECT name FROM monster WHERE id=:id", {"id": monster_id}).fetchone()["name"]
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            names = list(executor.map(read, [340, 368] * 100))
+
+        assert names == ["Goblin", "Hobgoblin"] * 100
+        assert pool.stats().created <= 4
+
+
+class TestMemorySnapshotPool:
+
+    def test_no_disk_access_after_load(self, db_path):
+        pool = MemorySnapshotPool(db_path, size=2)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+        with pool.connection() as con:
+            assert con.execute("SELECT name FROM monster WHERE id=368").fetchone() == {"name": "Hobgoblin"}
+            with pytest.raises(sqlite3.OperationalError):
+                con.execute("DELETE FROM monster")
+
+    def test_report(self, db_path):
+        pool = MemorySnapshotPool(db_path, size=2)
+        with pool.connection():
+            pass
+
+        report = pool.report()
+        assert report.load_seconds > 0
+        assert report.database_bytes == os.path.getsize(db_path)
+        assert report.copies == 2
+        assert report.resident_bytes == 2 * report.database_bytes
+
+    def test_monster_queries_served_from_snapshot(self):
+        from_disk = monsters_by_ids([340, 368])
+        try:
+            pool = use_memory_snapshot()
+            assert get_pool() is pool
+            assert monsters_by_ids([340, 368]) == from_disk
+            assert pool.stats().checkouts == 1
+        finally:
+            close_pools()
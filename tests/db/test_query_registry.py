@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from db import QueryRegistry, InvalidQueryError, get_connection
+from util import ROOT_DIR
+
+MONSTER_SQL_DIR = os.path.join(ROOT_DIR, "characters/queries/monster/sql")
+
+
+class TestQueryRegistry:
+
+    def test_loads_every_sql_file(self):
+        registry = QueryRegistry(MONSTER_SQL_DIR)
+
+        assert "physical_stats" in registry
+        assert "monsters" in registry
+        assert len(registry.names) == len(os.listdir(MONSTER_SQL_DIR))
+
+    def test_validate_live_schema(self):
+        QueryRegistry(MONSTER_SQL_DIR).validate(get_connection())
+
+    def test_validate_bad_column(self, tmp_path):
+        (tmp_path / "bad.sql").write_text("SELECT no_such_column FROM monster WHERE id=:id;")
+        registry = QueryRegistry(str(tmp_path))
+
+        with pytest.raises(InvalidQueryError, match="bad.sql"):
+            registry.validate(get_connection())
+
+    def test_stats(self):
+        registry = QueryRegistry(MONSTER_SQL_DIR)
+        con = get_connection()
+
+        registry.fetchone(con, "physical_stats", {"id": 340})
+        registry.fetchall(con, "physical_stats", {"id": 368})
+
+        stats = registry.stats()
+        assert stats["physical_stats"].calls == 2
+        assert stats["physical_stats"].total_seconds > 0
+        assert stats["alignment"].calls == 0
+
+        registry.reset_stats()
+        assert registry.stats()["physical_stats"].calls == 0